@@ -0,0 +1,225 @@
+import sys
+import os
+from datetime import date, datetime, timedelta, timezone
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.connection import DM_DB_PATH, get_connection, resolve_db_path
+from sql.sqlite_db.instrumentation import current_recorder
+from sql.sqlite_db.summaries import remove_archived_versions
+from sql.sqlite_db.dbm_queries import HISTORY_VIEW
+
+# Archive database holding the expired dimension versions moved out of etl_dm.db
+ARCHIVE_DB_PATH = 'sql/sqlite_db/etl_dm_archive.db'
+ARCHIVE_TABLE = 'Dimension_Orders_Archive'
+# Expired versions that ended within this many days stay in Dimension_Orders
+RETENTION_DAYS = 365
+# Versions moved per transaction
+BATCH_SIZE = 5000
+# Free pages returned to the file system per incremental_vacuum step
+VACUUM_STEP_PAGES = 1000
+
+def enable_incremental_vacuum(conn):
+    """
+    Switch a database to auto_vacuum=INCREMENTAL, so pages freed by deletes can
+    be returned with PRAGMA incremental_vacuum instead of a full VACUUM.
+
+    The mode only takes effect through a VACUUM on a database that already has
+    pages; that VACUUM runs once, here. Returns True when it had to run.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+def _dimension_columns(conn, schema='main', table='Dimension_Orders'):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+def _create_archive_table(conn, column_types):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS archive.{ARCHIVE_TABLE} (
+            Archive_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            EID INTEGER,   -- EID the version had in Dimension_Orders; restarts after a dimension rebuild
+            {", ".join(f"{column} {kind}" for column, kind in column_types.items() if column != 'EID')},
+            Archived_At TEXT
+        )
+    ''')
+
+def _ensure_archive_table(conn):
+    """Create the archive table in the attached archive, adding columns the dimension gained since."""
+    column_types = {row[1]: row[2] for row in conn.execute("PRAGMA main.table_info(Dimension_Orders)")}
+    archived_columns = _dimension_columns(conn, 'archive', ARCHIVE_TABLE)
+    if archived_columns and 'Archive_ID' not in archived_columns:
+        # Archives keyed on EID (EIDs restart when the dimension is rebuilt) move to their own key
+        conn.execute(f"ALTER TABLE archive.{ARCHIVE_TABLE} RENAME TO {ARCHIVE_TABLE}_Old")
+        _create_archive_table(conn, column_types)
+        columns = ", ".join(archived_columns)
+        conn.execute(f'''
+            INSERT INTO archive.{ARCHIVE_TABLE} ({columns})
+            SELECT {columns} FROM archive.{ARCHIVE_TABLE}_Old ORDER BY EID
+        ''')
+        conn.execute(f"DROP TABLE archive.{ARCHIVE_TABLE}_Old")
+    _create_archive_table(conn, column_types)
+    archived_columns = set(_dimension_columns(conn, 'archive', ARCHIVE_TABLE))
+    for column, kind in column_types.items():
+        if column not in archived_columns:
+            conn.execute(f"ALTER TABLE archive.{ARCHIVE_TABLE} ADD COLUMN {column} {kind}")
+    # One archived row per dimension version. The EID tells apart versions with the same
+    # content (a same-day A -> B -> A change); the rest tells apart a rebuild's reused EIDs.
+    conn.execute("DROP INDEX IF EXISTS archive.idx_archive_version")
+    conn.execute(f'''
+        CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_archive_eid_version
+        ON {ARCHIVE_TABLE} (EID, Order_ID, Start_Date, End_Date, Row_Hash)
+    ''')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS archive.idx_archive_order_id_start_end
+        ON {ARCHIVE_TABLE} (Order_ID, Start_Date, End_Date)
+    ''')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS archive.idx_archive_customer_id_order_id
+        ON {ARCHIVE_TABLE} (Customer_ID, Order_ID)
+    ''')
+    return list(column_types)
+
+def _same_version(columns, archived, live):
+    """SQL condition: an archived row holds exactly the EID and content of a live version."""
+    return " AND ".join(f"{archived}.{column} IS {live}.{column}" for column in columns)
+
+def attach_archive(conn, archive_db_path=ARCHIVE_DB_PATH):
+    """
+    ATTACH the archive as 'archive' and create the temp view Dimension_Orders_History
+    over the live and archived versions, with the dimension's columns.
+
+    History queries built with include_archive=True (see dbm_queries.py) read
+    that view. A database without an archive yet gets an empty archive table.
+    """
+    conn.execute("ATTACH DATABASE ? AS archive", (resolve_db_path(archive_db_path),))
+    columns = ", ".join(_ensure_archive_table(conn))
+    conn.execute(f"DROP VIEW IF EXISTS temp.{HISTORY_VIEW}")
+    conn.execute(f'''
+        CREATE TEMP VIEW {HISTORY_VIEW} AS
+        SELECT {columns} FROM main.Dimension_Orders
+        UNION ALL
+        SELECT {columns} FROM archive.{ARCHIVE_TABLE}
+    ''')
+    conn.commit()
+
+def detach_archive(conn):
+    conn.execute(f"DROP VIEW IF EXISTS temp.{HISTORY_VIEW}")
+    conn.execute("DETACH DATABASE archive")
+
+def _vacuum_free_pages(conn, step=VACUUM_STEP_PAGES):
+    """Return the free pages to the file system a step at a time; returns the number of pages freed."""
+    freed = 0
+    while True:
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free_pages:
+            return freed
+        conn.execute(f"PRAGMA incremental_vacuum({min(step, free_pages)})").fetchall()
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if remaining >= free_pages:
+            return freed
+        freed += free_pages - remaining
+
+def archive_expired_versions(dm_db_path=DM_DB_PATH, archive_db_path=ARCHIVE_DB_PATH, retention_days=RETENTION_DAYS,
+                             batch_size=BATCH_SIZE, today=None):
+    """
+    Move expired Dimension_Orders versions that ended more than `retention_days`
+    ago into the archive database, then reclaim their space.
+
+    Each batch of at most `batch_size` versions is copied into the archive in
+    one transaction and deleted from the dimension in a second one, so no
+    transaction holds more than one batch and the sync's active-version
+    lookups are never blocked for long. A version is deleted only once the
+    archive holds a row with its EID and identical content, so a batch
+    interrupted between the two steps is finished by the next run instead of
+    being lost or duplicated. A batch that cannot be deleted in full (an
+    archived row with the same key but other content) raises instead of being
+    selected again. Active versions are never archived.
+    The per-customer version counts (see summaries.py) drop the archived
+    versions. Free pages are then returned with PRAGMA incremental_vacuum.
+
+    Returns the counts: versions archived, batches, and pages freed.
+    """
+    today = today or date.today()
+    cutoff = (date.fromisoformat(str(today)) - timedelta(days=retention_days)).isoformat()
+    conn = get_connection(dm_db_path)
+    recorder = current_recorder()
+    counts = {'archived': 0, 'batches': 0, 'pages_freed': 0, 'converted_to_incremental_vacuum': False}
+
+    attach_archive(conn, archive_db_path)
+    try:
+        column_list = _dimension_columns(conn)
+        columns = ", ".join(column_list)
+        with recorder.stage('archive.move') as stage:
+            while True:
+                archived_at = datetime.now(timezone.utc).isoformat()
+                with conn:
+                    # Oldest expired versions first, through the partial index on expired versions
+                    eids = [row[0] for row in conn.execute('''
+                        SELECT EID FROM Dimension_Orders
+                        WHERE Active = 'N' AND End_Date < ?
+                        ORDER BY End_Date, EID
+                        LIMIT ?
+                    ''', (cutoff, batch_size))]
+                    if not eids:
+                        break
+                    conn.execute("DROP TABLE IF EXISTS temp.Archive_Batch")
+                    conn.execute("CREATE TEMP TABLE Archive_Batch (EID INTEGER PRIMARY KEY)")
+                    conn.executemany("INSERT INTO temp.Archive_Batch (EID) VALUES (?)", [(eid,) for eid in eids])
+                    # Versions a previous, interrupted run already copied are not copied twice
+                    # (the content check covers versions without a Row_Hash, which never collide)
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO archive.{ARCHIVE_TABLE} ({columns}, Archived_At)
+                        SELECT {columns}, ? FROM main.Dimension_Orders d
+                        WHERE EID IN (SELECT EID FROM temp.Archive_Batch)
+                          AND NOT EXISTS (
+                              SELECT 1 FROM archive.{ARCHIVE_TABLE} a
+                              WHERE {_same_version(column_list, 'a', 'd')}
+                          )
+                    ''', (archived_at,))
+                with conn:
+                    # Delete only versions the archive holds with their EID and identical content
+                    customers = conn.execute(f'''
+                        DELETE FROM main.Dimension_Orders
+                        WHERE EID IN (SELECT EID FROM temp.Archive_Batch)
+                          AND EXISTS (
+                              SELECT 1 FROM archive.{ARCHIVE_TABLE} a
+                              WHERE {_same_version(column_list, 'a', 'main.Dimension_Orders')}
+                          )
+                        RETURNING Customer_ID
+                    ''').fetchall()
+                    if len(customers) < len(eids):
+                        # Selecting the same versions again would never finish
+                        raise RuntimeError(
+                            f"Archived only {len(customers)} of {len(eids)} versions: the archive holds "
+                            f"other content under the key of the rest (EIDs {eids[0]}..{eids[-1]})")
+                    remove_archived_versions(conn, (row[0] for row in customers))
+                counts['archived'] += len(customers)
+                counts['batches'] += 1
+            stage.add(rows_out=counts['archived'])
+        conn.execute("DROP TABLE IF EXISTS temp.Archive_Batch")
+    finally:
+        detach_archive(conn)
+
+    if counts['archived']:
+        with recorder.stage('archive.vacuum') as stage:
+            # A dimension created before incremental vacuum was enabled is converted once
+            counts['converted_to_incremental_vacuum'] = enable_incremental_vacuum(conn)
+            counts['pages_freed'] = _vacuum_free_pages(conn)
+            stage.add(rows_out=counts['pages_freed'])
+
+    print(f"Archived {counts['archived']} expired versions ending before {cutoff} in {counts['batches']} batches, "
+          f"freed {counts['pages_freed']} pages.")
+    return counts
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Move old expired dimension versions into the archive database.")
+    parser.add_argument('--retention-days', type=int, default=RETENTION_DAYS,
+                        help="Keep expired versions that ended within this many days")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Versions moved per transaction")
+    args = parser.parse_args()
+    archive_expired_versions(retention_days=args.retention_days, batch_size=args.batch_size)
@@ -0,0 +1,197 @@
+import uuid
+
+# Source tables with change capture, and the key column logged for each change
+CAPTURED_TABLES = {'Orders': 'Order_ID', 'Products': 'Product_ID'}
+
+def install_change_capture(conn, table='Orders'):
+    """
+    Create the change log, capture state and triggers for a source table.
+
+    Every INSERT, UPDATE and DELETE on the table appends the affected key to
+    <table>_Change_Log. Change_ID is AUTOINCREMENT, so IDs are never reused and
+    a consumer only needs to remember the last Change_ID it processed. The Epoch
+    identifies one incarnation of the log: dropping and recreating the table
+    starts a new epoch and consumers fall back to a full rescan. Safe to call on
+    a database that already has change capture installed.
+    """
+    key = CAPTURED_TABLES[table]
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table}_Change_Log (
+            Change_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            {key} INTEGER,
+            Operation TEXT,
+            Changed_At TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS Change_Capture_State (
+            Table_Name TEXT PRIMARY KEY,
+            Epoch TEXT
+        );
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO Change_Capture_State (Table_Name, Epoch) VALUES (?, ?)
+    ''', (table, uuid.uuid4().hex))
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_capture_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {table}_Change_Log ({key}, Operation) VALUES (NEW.{key}, 'I');
+        END;
+    ''')
+    # A key change is logged as a delete of the old key plus an update of the new one
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_capture_update AFTER UPDATE ON {table}
+        BEGIN
+            INSERT INTO {table}_Change_Log ({key}, Operation)
+            SELECT OLD.{key}, 'D' WHERE OLD.{key} IS NOT NEW.{key};
+            INSERT INTO {table}_Change_Log ({key}, Operation) VALUES (NEW.{key}, 'U');
+        END;
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_capture_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {table}_Change_Log ({key}, Operation) VALUES (OLD.{key}, 'D');
+        END;
+    ''')
+    conn.commit()
+
+def drop_change_capture(conn, table='Orders'):
+    """Remove the change log and capture state of a table (its triggers go with the table)."""
+    conn.execute(f'DROP TABLE IF EXISTS {table}_Change_Log;')
+    if conn.execute('''
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Change_Capture_State'
+    ''').fetchone():
+        conn.execute('DELETE FROM Change_Capture_State WHERE Table_Name = ?', (table,))
+
+def get_capture_position(conn, table='Orders', schema='main'):
+    """
+    Return (epoch, high_water_change_id) of a table's change log, or None when
+    the table has no change capture. `schema` is the name the source database
+    is attached under.
+    """
+    has_state = conn.execute(f'''
+        SELECT 1 FROM {schema}.sqlite_master
+        WHERE type = 'table' AND name = 'Change_Capture_State'
+    ''').fetchone()
+    if not has_state:
+        return None
+    state = conn.execute(f'''
+        SELECT Epoch FROM {schema}.Change_Capture_State WHERE Table_Name = ?
+    ''', (table,)).fetchone()
+    if not state:
+        return None
+    # sqlite_sequence keeps the highest Change_ID ever issued, even after the log is purged
+    sequence = conn.execute(f'''
+        SELECT seq FROM {schema}.sqlite_sequence WHERE name = ?
+    ''', (f'{table}_Change_Log',)).fetchone()
+    return state[0], sequence[0] if sequence else 0
+
+def is_change_log_complete(conn, last_change_id, high_water, table='Orders', schema='main'):
+    """
+    Check that every change in (last_change_id, high_water] is still in the log.
+
+    Change_IDs are issued without gaps, so the log is complete when the first
+    entry after the watermark is the next ID. A purged or truncated log fails
+    this check and the consumer has to rescan the whole table.
+    """
+    if last_change_id > high_water:
+        return False
+    if last_change_id == high_water:
+        return True
+    first_pending = conn.execute(f'''
+        SELECT MIN(Change_ID) FROM {schema}.{table}_Change_Log WHERE Change_ID > ?
+    ''', (last_change_id,)).fetchone()[0]
+    return first_pending == last_change_id + 1
+
+def table_fingerprint(conn, table, schema='main'):
+    """
+    Return a cheap fingerprint that changes whenever a table's content changes.
+
+    Tables with change capture are fingerprinted by (epoch, highest Change_ID),
+    which any insert, update or delete advances, without reading the table.
+    Other tables fall back to (row count, max rowid), which catches inserts and
+    deletes but not in-place updates.
+    """
+    position = get_capture_position(conn, table, schema) if table in CAPTURED_TABLES else None
+    if position is not None:
+        return ['log', *position]
+    count, max_rowid = conn.execute(f'SELECT COUNT(*), MAX(rowid) FROM {schema}.{table}').fetchone()
+    return ['rows', count, max_rowid]
+
+def purge_change_log(conn, through_change_id, table='Orders'):
+    """Delete change log entries up to and including `through_change_id`."""
+    conn.execute(f'''
+        DELETE FROM {table}_Change_Log WHERE Change_ID <= ?
+    ''', (through_change_id,))
+    conn.commit()
+
+def ensure_watermark_table(conn):
+    """Create the per-consumer high-water mark table in the consumer's database."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS Sync_Watermark (
+            Consumer TEXT PRIMARY KEY,
+            Epoch TEXT,
+            Last_Change_ID INTEGER,
+            Target_Sequence INTEGER,  -- AUTOINCREMENT position of the consumer's table when written
+            Updated_At TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(Sync_Watermark)")}
+    if 'Target_Sequence' not in columns:
+        conn.execute("ALTER TABLE Sync_Watermark ADD COLUMN Target_Sequence INTEGER")
+
+def table_sequence(conn, table):
+    """Highest AUTOINCREMENT key ever issued for a table (0 for none); dropping the table resets it."""
+    has_sequence = conn.execute('''
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_sequence'
+    ''').fetchone()
+    if not has_sequence:
+        return 0
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    return row[0] if row else 0
+
+def is_watermark_current(conn, consumer, target_table):
+    """
+    Check that a consumer's watermark still describes its target table.
+
+    A watermark is stale when the target table is empty, or when the table was
+    dropped and recreated after the watermark was written (its AUTOINCREMENT
+    sequence is then behind the recorded one); the consumer has to rescan.
+    """
+    row = conn.execute('''
+        SELECT Target_Sequence FROM Sync_Watermark WHERE Consumer = ?
+    ''', (consumer,)).fetchone()
+    if not row or not conn.execute(f"SELECT 1 FROM {target_table} LIMIT 1").fetchone():
+        return False
+    return table_sequence(conn, target_table) >= (row[0] or 0)
+
+def clear_watermarks(conn):
+    """Forget every consumer's position, e.g. when the tables they fed are recreated."""
+    if conn.execute('''
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Sync_Watermark'
+    ''').fetchone():
+        conn.execute("DELETE FROM Sync_Watermark")
+
+def read_watermark(conn, consumer):
+    """Return (epoch, last_change_id) recorded for a consumer, or (None, None)."""
+    row = conn.execute('''
+        SELECT Epoch, Last_Change_ID FROM Sync_Watermark WHERE Consumer = ?
+    ''', (consumer,)).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+def write_watermark(conn, consumer, epoch, last_change_id, target_table=None):
+    """
+    Record the last change a consumer has processed (commit is left to the caller),
+    with the AUTOINCREMENT position of the table it writes (see is_watermark_current).
+    """
+    target_sequence = table_sequence(conn, target_table) if target_table else None
+    conn.execute('''
+        INSERT INTO Sync_Watermark (Consumer, Epoch, Last_Change_ID, Target_Sequence, Updated_At)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(Consumer) DO UPDATE SET
+            Epoch = excluded.Epoch,
+            Last_Change_ID = excluded.Last_Change_ID,
+            Target_Sequence = excluded.Target_Sequence,
+            Updated_At = excluded.Updated_At
+    ''', (consumer, epoch, last_change_id, target_sequence))
@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+import sys
+import os
+from pathlib import Path
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.instrumentation import current_recorder
+
+# Root directory of the project; relative database paths are resolved against it
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Paths to the source and dimension databases
+DB_PATH = 'sql/sqlite_db/etl.db'
+DM_DB_PATH = 'sql/sqlite_db/etl_dm.db'
+
+# Pragmas applied to every new connection, per profile (in order; journal_mode first)
+#   default:   scripts and tests that read and write; WAL lets readers run during a write
+#   bulk_load: the loaders; no fsync per commit, big cache and mmap. A crash mid-load can
+#              lose the last transactions, but the loader reruns from the source. The dimension
+#              sync stays on default: the SCD history it writes cannot be reloaded from the source.
+#   read_only: validation; opened with mode=ro, so no write can happen even by mistake
+PROFILES = {
+    'default': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,        # KiB (negative), ~64 MB
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,      # 256 MB
+    },
+    'bulk_load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -512000,       # ~512 MB
+        'temp_store': 'MEMORY',
+        'mmap_size': 1073741824,     # 1 GB
+    },
+    'read_only': {
+        'query_only': 'ON',
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,
+    },
+}
+
+# Connections are per thread (sqlite3 connections must stay on their thread) and per process
+_local = threading.local()
+
+def resolve_db_path(db_path):
+    """Absolute path of a database; relative paths are taken from the project root."""
+    if db_path == ':memory:' or os.path.isabs(db_path):
+        return db_path
+    return os.path.join(PROJECT_ROOT, db_path)
+
+def connect(db_path=DB_PATH, profile='default', check_same_thread=True):
+    """
+    Open a new connection with a profile's pragmas. The caller owns and closes it;
+    use get_connection to share one connection per database within a process.
+    `check_same_thread=False` is for pools that hand a connection to one thread at a time.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown connection profile '{profile}', expected one of {sorted(PROFILES)}")
+    db_path = resolve_db_path(db_path)
+    if profile == 'read_only':
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Database file not found at {db_path}")
+        conn = sqlite3.connect(f"{Path(db_path).as_uri()}?mode=ro", uri=True, check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    for pragma, value in PROFILES[profile].items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    current_recorder().trace(conn)
+    return conn
+
+def get_connection(db_path=DB_PATH, profile='default'):
+    """
+    Return this thread's shared connection to a database for a profile, opening it on first use.
+
+    Callers must not close it (use close_connections) and must not change
+    connection-wide state such as row_factory; set row_factory on a cursor instead.
+    """
+    if getattr(_local, 'pid', None) != os.getpid():
+        # A forked child must not reuse its parent's connections
+        _local.pid = os.getpid()
+        _local.connections = {}
+    key = (resolve_db_path(db_path), profile)
+    conn = _local.connections.get(key)
+    if conn is None:
+        conn = _local.connections[key] = connect(*key)
+    else:
+        # Shared connections may outlive one instrumented run
+        current_recorder().trace(conn)
+    return conn
+
+def close_connections():
+    """Close every shared connection this thread opened."""
+    connections = getattr(_local, 'connections', {}) if getattr(_local, 'pid', None) == os.getpid() else {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
@@ -1,27 +1,98 @@
 import sqlite3
+import sys
+import os
 from datetime import datetime
 
-# Paths to the source and dimension databases
-SOURCE_DB_PATH = 'sql/sqlite_db/etl.db'
-DM_DB_PATH = 'sql/sqlite_db/etl_dm.db'
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.change_capture import (
+    ensure_watermark_table,
+    get_capture_position,
+    is_change_log_complete,
+    is_watermark_current,
+    read_watermark,
+    write_watermark
+)
+from sql.sqlite_db.indexes import apply_indexes
+from sql.sqlite_db.row_hash import compute_row_hash, get_tracked_columns
+from sql.sqlite_db.summaries import DM_SUMMARIES, add_expired_versions, add_new_rows, create_summary_tables, last_key
+from sql.sqlite_db.connection import DB_PATH, DM_DB_PATH, get_connection, resolve_db_path
+from sql.sqlite_db.instrumentation import current_recorder, start_run, finish_run
+
+# Source database the dimension is built from (see connection.py for the paths)
+SOURCE_DB_PATH = DB_PATH
+
+# Sync modes: 'row' compares one source record at a time, 'merge' runs the
+# whole expire-and-insert step as set-based statements over an ATTACHed source
+SYNC_MODES = ('row', 'merge')
+
+# Name this sync records its change log position under in Sync_Watermark
+WATERMARK_CONSUMER = 'Dimension_Orders'
+
+# Per-row lookup of an order's active version, served by a partial index on Active = 'Y'
+ACTIVE_VERSION_QUERY = '''
+    SELECT EID, Row_Hash FROM Dimension_Orders
+    WHERE Order_ID = ? AND Active = 'Y'
+'''
+
+def _sql_row_hash(*args):
+    """SQL adapter for compute_row_hash: row_hash('Col1', value1, 'Col2', value2, ...)."""
+    return compute_row_hash(args[0::2], args[1::2])
+
+def _row_hash_expression(columns, alias):
+    """Build the row_hash(...) call over the given columns of a table alias."""
+    return "row_hash(" + ", ".join(f"'{col}', {alias}.{col}" for col in columns) + ")"
+
+def shard_expression(column, shard_count):
+    """
+    SQL expression giving the hash partition (0 .. shard_count - 1) of an Order_ID column.
+    A multiplicative hash, so consecutive Order_IDs spread over every shard; the
+    key is first reduced to 31 bits so the product fits SQLite's 64-bit integers.
+    indexes.shard_index indexes Orders on this expression.
+    """
+    return f"(((abs({column}) % 2147483648) * 2654435761) % 4294967296) % {shard_count}"
+
+def shard_of(order_id, shard_count):
+    """Python twin of shard_expression."""
+    return (((abs(order_id) % 2147483648) * 2654435761) % 4294967296) % shard_count
+
+def _shard_condition(shard, column):
+    """SQL condition keeping only the rows of one (index, count) shard, or '' for the whole table."""
+    if shard is None:
+        return ""
+    index, count = shard
+    return f"{shard_expression(column, count)} = {int(index)}"
+
+def sync_dimension_table(source_db_path=SOURCE_DB_PATH, dm_db_path=DM_DB_PATH, mode='merge',
+                         incremental=False, shard=None):
+    """
+    Bring Dimension_Orders up to date with the source Orders table (SCD Type 2).
+
+    `shard=(index, count)` syncs only the orders in one hash partition of
+    Order_ID into `dm_db_path`. partitioned_dm.py runs one such sync per shard file.
+    """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode '{mode}', expected one of {SYNC_MODES}")
+    if incremental and mode != 'merge':
+        raise ValueError("Incremental sync is only supported in 'merge' mode")
 
-def sync_dimension_table():
     today = datetime.now().strftime('%Y-%m-%d')
     max_date = '9999-12-31'
 
-    # Connect to source and dimension databases
-    source_conn = sqlite3.connect(SOURCE_DB_PATH)
-    source_conn.row_factory = sqlite3.Row  # Enable dictionary-style row access
-    dm_conn = sqlite3.connect(DM_DB_PATH)
-    dm_conn.row_factory = sqlite3.Row
+    # Shared connections (see connection.py): the source is only read
+    source_conn = get_connection(source_db_path, 'read_only')
+    dm_conn = get_connection(dm_db_path)
+    dm_conn.create_function('row_hash', -1, _sql_row_hash, deterministic=True)
 
     source_cursor = source_conn.cursor()
+    source_cursor.row_factory = sqlite3.Row  # Enable dictionary-style row access
     dm_cursor = dm_conn.cursor()
+    dm_cursor.row_factory = sqlite3.Row
 
     # Fetch all columns from the source table schema
     source_cursor.execute("PRAGMA table_info(Orders)")
     source_columns = [row[1] for row in source_cursor.fetchall()]  # Extract column names
-    source_columns_str = ", ".join(source_columns)  # Prepare for SELECT query
 
     # Fetch all columns from the dimension table schema
     dm_cursor.execute("PRAGMA table_info(Dimension_Orders)")
@@ -33,12 +104,43 @@ def sync_dimension_table():
         dm_cursor.execute(f"ALTER TABLE Dimension_Orders ADD COLUMN {column} TEXT")  # Add as TEXT by default
         print(f"Added missing column {column} to Dimension_Orders")
 
+    # Add the fingerprint column and backfill it for versions written before it existed
+    if 'Row_Hash' not in dimension_columns:
+        dm_cursor.execute("ALTER TABLE Dimension_Orders ADD COLUMN Row_Hash TEXT")
+        print("Added missing column Row_Hash to Dimension_Orders")
+    dm_cursor.execute(f'''
+        UPDATE Dimension_Orders
+        SET Row_Hash = {_row_hash_expression(get_tracked_columns(source_columns), 'Dimension_Orders')}
+        WHERE Row_Hash IS NULL
+    ''')
+    # Dimension databases created before an index was added to the spec get it here
+    apply_indexes(dm_conn, ['Dimension_Orders'])
+    # Version counts kept up to date with the versions this sync expires and inserts
+    create_summary_tables(dm_conn, DM_SUMMARIES)
+    dm_conn.commit()
+
+    with current_recorder().stage(f'sync.{mode}'):
+        if mode == 'merge':
+            _merge_sync(dm_conn, source_db_path, source_columns, today, max_date, incremental, shard)
+        else:
+            _row_sync(source_cursor, dm_cursor, source_columns, today, max_date, shard)
+
+    # Commit changes
+    dm_conn.commit()
+
+    print("Dimension table synced successfully.")
+
+def _row_sync(source_cursor, dm_cursor, source_columns, today, max_date, shard=None):
+    """Compare and apply each source record with its own lookup, insert and update statements."""
+    source_columns_str = ", ".join(source_columns)  # Prepare for SELECT query
+
     # Check if Dimension_Orders table is empty
     dm_cursor.execute("SELECT COUNT(*) FROM Dimension_Orders")
     is_dimension_empty = dm_cursor.fetchone()[0] == 0
 
     # Fetch all records from the source table
-    source_cursor.execute(f"SELECT {source_columns_str} FROM Orders")
+    shard_condition = _shard_condition(shard, 'Order_ID')
+    source_cursor.execute(f"SELECT {source_columns_str} FROM Orders {'WHERE ' + shard_condition if shard else ''}")
     source_data = source_cursor.fetchall()
 
     if not source_data:
@@ -46,67 +148,195 @@ def sync_dimension_table():
     else:
         print(f"Fetched {len(source_data)} records from the source table 'Orders'.")
 
-    for record in source_data:
-        record_dict = dict(record)  # Convert the row to a dictionary
-        order_id = record_dict['Order_ID']
-
-        if is_dimension_empty:
-            # If Dimension_Orders table is empty, perform an initial load
-            placeholders = ", ".join("?" for _ in source_columns)
-            columns_str = ", ".join(source_columns)
-            dm_cursor.execute(f'''
-                INSERT INTO Dimension_Orders 
-                ({columns_str}, Start_Date, End_Date, Active)
-                VALUES ({placeholders}, ?, ?, ?)
-            ''', (*record, today, max_date, 'Y'))
-        else:
-            # Check if the record exists in the dimension table by Order_ID
-            dm_cursor.execute('''
-                SELECT * FROM Dimension_Orders 
-                WHERE Order_ID = ? AND Active = 'Y'
-            ''', (order_id,))
-            existing_record = dm_cursor.fetchone()
-
-            if not existing_record:
-                # Insert new record
-                placeholders = ", ".join("?" for _ in source_columns)
-                columns_str = ", ".join(source_columns)
-                dm_cursor.execute(f'''
-                    INSERT INTO Dimension_Orders 
-                    ({columns_str}, Start_Date, End_Date, Active)
-                    VALUES ({placeholders}, ?, ?, ?)
-                ''', (*record, today, max_date, 'Y'))
+    tracked_columns = get_tracked_columns(source_columns)
+    placeholders = ", ".join("?" for _ in source_columns)
+    columns_str = ", ".join(source_columns)
+    insert_query = f'''
+        INSERT INTO Dimension_Orders
+        ({columns_str}, Row_Hash, Start_Date, End_Date, Active)
+        VALUES ({placeholders}, ?, ?, ?, ?)
+    '''
+
+    inserted = expired = 0
+    after_eid = last_key(dm_cursor.connection, 'Summary_Customer_Versions')
+    expired_customers = []
+    with current_recorder().stage('sync.row_lookup') as stage:
+        for record in source_data:
+            order_id = record['Order_ID']
+            row_hash = compute_row_hash(tracked_columns, [record[col] for col in tracked_columns])
+
+            if is_dimension_empty:
+                # If Dimension_Orders table is empty, perform an initial load
+                dm_cursor.execute(insert_query, (*record, row_hash, today, max_date, 'Y'))
+                inserted += 1
             else:
-                # Compare source data with existing data
-                existing_record_dict = dict(existing_record)
-                changes_detected = any(
-                    record_dict[col] != existing_record_dict.get(col)
-                    for col in source_columns
-                )
-
-                if changes_detected:
-                    # Update the existing record's End_Date and set Active to 'N'
+                # Check if the record exists in the dimension table by Order_ID
+                dm_cursor.execute(ACTIVE_VERSION_QUERY, (order_id,))
+                existing_record = dm_cursor.fetchone()
+
+                if not existing_record:
+                    # Insert new record
+                    dm_cursor.execute(insert_query, (*record, row_hash, today, max_date, 'Y'))
+                    inserted += 1
+                elif existing_record['Row_Hash'] != row_hash:
+                    # Source row changed: update the existing record's End_Date and set Active to 'N'
                     dm_cursor.execute('''
                         UPDATE Dimension_Orders
                         SET End_Date = ?, Active = 'N'
                         WHERE EID = ?
-                    ''', (today, existing_record_dict['EID']))
+                        RETURNING Customer_ID
+                    ''', (today, existing_record['EID']))
+                    expired_customers.append(dm_cursor.fetchone()[0])
 
                     # Insert the updated record
-                    placeholders = ", ".join("?" for _ in source_columns)
-                    columns_str = ", ".join(source_columns)
-                    dm_cursor.execute(f'''
-                        INSERT INTO Dimension_Orders 
-                        ({columns_str}, Start_Date, End_Date, Active)
-                        VALUES ({placeholders}, ?, ?, ?)
-                    ''', (*record, today, max_date, 'Y'))
-
-    # Commit changes and close connections
-    dm_conn.commit()
-    source_conn.close()
-    dm_conn.close()
+                    dm_cursor.execute(insert_query, (*record, row_hash, today, max_date, 'Y'))
+                    expired += 1
+                    inserted += 1
+        stage.add(rows_in=len(source_data), rows_out=inserted, rows_expired=expired)
 
-    print("Dimension table synced successfully.")
+    # Apply this run's version changes to the summary counts
+    add_expired_versions(dm_cursor.connection, expired_customers)
+    add_new_rows(dm_cursor.connection, DM_SUMMARIES, after_eid)
+
+def _merge_sync(dm_conn, source_db_path, source_columns, today, max_date, incremental=False, shard=None):
+    """
+    Apply the SCD2 expire-and-insert step as set-based statements.
+
+    The source database is ATTACHed as 'src' so each step is a single statement
+    joining Orders to Dimension_Orders on Order_ID, run inside one transaction.
+    Changes are detected by comparing each active version's Row_Hash with the
+    fingerprint of its source row. Produces the same Start_Date/End_Date/Active
+    history as the row loop.
+
+    With `incremental=True` only the Order_IDs logged in Orders_Change_Log since
+    this consumer's watermark are merged, and orders deleted from the source get
+    their active version expired. When there is no usable watermark (first run,
+    rebuilt source, purged log, or an empty or recreated Dimension_Orders) the
+    whole table is rescanned instead.
+    """
+    columns_str = ", ".join(source_columns)
+    source_columns_str = ", ".join(f"s.{col}" for col in source_columns)
+    source_hash = _row_hash_expression(get_tracked_columns(source_columns), 's')
+    # Limit the source rows to this sync's shard (empty for an unpartitioned dimension)
+    shard_scope = f"AND {_shard_condition(shard, 's.Order_ID')}" if shard else ""
+    recorder = current_recorder()
+
+    dm_conn.execute("ATTACH DATABASE ? AS src", (resolve_db_path(source_db_path),))
+    try:
+        if incremental:
+            ensure_watermark_table(dm_conn)
+
+        with dm_conn:
+            # Restrict every statement to the changed keys, or to nothing for a full merge
+            scope = ""
+            capture_position = None
+            expire_deleted = False
+            if incremental:
+                capture_position = get_capture_position(dm_conn, 'Orders', schema='src')
+                if capture_position is None:
+                    raise ValueError("Incremental sync needs change capture on the source Orders table")
+                epoch, high_water = capture_position
+                last_epoch, last_change_id = read_watermark(dm_conn, WATERMARK_CONSUMER)
+                expire_deleted = True
+
+                if last_epoch == epoch and is_watermark_current(dm_conn, WATERMARK_CONSUMER, 'Dimension_Orders') \
+                        and is_change_log_complete(dm_conn, last_change_id, high_water, 'Orders', schema='src'):
+                    dm_conn.execute("DROP TABLE IF EXISTS temp.Changed_Keys")
+                    dm_conn.execute("CREATE TEMP TABLE Changed_Keys (Order_ID INTEGER PRIMARY KEY)")
+                    dm_conn.execute(f'''
+                        INSERT OR IGNORE INTO temp.Changed_Keys (Order_ID)
+                        SELECT Order_ID FROM src.Orders_Change_Log s
+                        WHERE Change_ID > ? AND Change_ID <= ? AND Order_ID IS NOT NULL
+                          {shard_scope}
+                    ''', (last_change_id, high_water))
+                    scope = "AND {key} IN (SELECT Order_ID FROM temp.Changed_Keys)"
+                    changed_count = dm_conn.execute("SELECT COUNT(*) FROM temp.Changed_Keys").fetchone()[0]
+                    print(f"Processing {changed_count} changed Order_IDs from the change log.")
+                else:
+                    print("No usable change log position, rescanning the whole source table 'Orders'.")
+
+            if not scope:
+                source_count = dm_conn.execute(
+                    f"SELECT COUNT(*) FROM src.Orders s WHERE 1 = 1 {shard_scope}"
+                ).fetchone()[0]
+                if not source_count:
+                    print("No data found in the source table 'Orders'.")
+                else:
+                    print(f"Fetched {source_count} records from the source table 'Orders'.")
+
+            # Expire the active version of every order whose source row changed
+            with recorder.stage('sync.expire') as stage:
+                expired_customers = dm_conn.execute(f'''
+                    UPDATE Dimension_Orders
+                    SET End_Date = ?, Active = 'N'
+                    WHERE Active = 'Y'
+                      {scope.format(key='Dimension_Orders.Order_ID')}
+                      AND EXISTS (
+                          SELECT 1 FROM src.Orders s
+                          WHERE s.Order_ID = Dimension_Orders.Order_ID
+                            AND {source_hash} IS NOT Dimension_Orders.Row_Hash
+                      )
+                    RETURNING Customer_ID
+                ''', (today,)).fetchall()
+
+                # Expire the active version of every order deleted from the source
+                if expire_deleted:
+                    expired_customers += dm_conn.execute(f'''
+                        UPDATE Dimension_Orders
+                        SET End_Date = ?, Active = 'N'
+                        WHERE Active = 'Y'
+                          {scope.format(key='Dimension_Orders.Order_ID')}
+                          AND NOT EXISTS (
+                              SELECT 1 FROM src.Orders s
+                              WHERE s.Order_ID = Dimension_Orders.Order_ID
+                          )
+                        RETURNING Customer_ID
+                    ''', (today,)).fetchall()
+                expired = len(expired_customers)
+                add_expired_versions(dm_conn, (row[0] for row in expired_customers))
+                stage.add(rows_out=expired)
+
+            # Insert a new active version for every order without one: new orders
+            # plus the orders expired above, in source order like the row loop
+            with recorder.stage('sync.insert') as stage:
+                after_eid = last_key(dm_conn, 'Summary_Customer_Versions')
+                inserted = dm_conn.execute(f'''
+                    INSERT INTO Dimension_Orders
+                    ({columns_str}, Row_Hash, Start_Date, End_Date, Active)
+                    SELECT {source_columns_str}, {source_hash}, ?, ?, 'Y'
+                    FROM src.Orders s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM Dimension_Orders d
+                        WHERE d.Order_ID = s.Order_ID AND d.Active = 'Y'
+                    )
+                      {scope.format(key='s.Order_ID')}
+                      {shard_scope}
+                    ORDER BY s.Order_ID
+                ''', (today, max_date)).rowcount
+                add_new_rows(dm_conn, DM_SUMMARIES, after_eid)
+                stage.add(rows_out=inserted)
+
+            # Advance the watermark in the same transaction as the dimension changes
+            if capture_position is not None:
+                write_watermark(dm_conn, WATERMARK_CONSUMER, *capture_position, target_table='Dimension_Orders')
+
+            print(f"Merged dimension: {expired} versions expired, {inserted} versions inserted.")
+        dm_conn.execute("DROP TABLE IF EXISTS temp.Changed_Keys")
+    finally:
+        dm_conn.execute("DETACH DATABASE src")
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Sync Dimension_Orders with the source Orders table.")
+    parser.add_argument('--incremental', action='store_true', help="Merge only the changes logged since the last run")
+    parser.add_argument('--report', help="Write a JSON run report (stage timings and SQL statement stats)")
+    args = parser.parse_args()
 
-# Run the sync function
-sync_dimension_table()
\ No newline at end of file
+    if args.report:
+        start_run()
+    sync_dimension_table(incremental=args.incremental)
+    # Facts are keyed on the EIDs the sync just wrote
+    from sql.sqlite_db.fact_orders import load_fact_orders
+    load_fact_orders()
+    if args.report:
+        finish_run(args.report)
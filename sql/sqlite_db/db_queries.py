@@ -1,3 +1,26 @@
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.order_dates import to_order_day
+
+# Row-level rule predicates over Orders, shared by the queries below and by the
+# single-pass validation engine in validation.py
+# Order_Day is NULL when Order_Date was not a valid dd/mm/YYYY date at load time
+INVALID_ORDER_DATE_FORMAT = "Order_Day IS NULL"
+NEGATIVE_QUANTITY = "Quantity < 0"
+MISSING_CUSTOMER_NAME = "Customer_Name IS NULL"
+INVALID_EMAIL = "Email NOT LIKE '%_@__%.__%'"
+# Orders dated outside 2024; Order_Day bounds as index-friendly integer ranges
+VALID_ORDER_DAYS = (to_order_day('2024-01-01'), to_order_day('2024-12-31'))
+ORDER_DATE_OUT_OF_RANGE = f"Order_Day < {VALID_ORDER_DAYS[0]} OR Order_Day > {VALID_ORDER_DAYS[1]}"
+INVALID_PRODUCT_REFERENCE = "NOT EXISTS (SELECT 1 FROM Products p WHERE p.Product_ID = Orders.Product_ID)"
+
+# Row-level rule predicate over Products
+NULL_PRODUCT_NAME = "Product_Name IS NULL"
+
 # Query to Validate Customer_ID Uniqueness
 def validate_customer_id_unique():
     return """
@@ -9,61 +32,43 @@ def validate_customer_id_unique():
 
 # Query to Validate Correct Date Format
 def validate_order_date_format():
-    return """
+    return f"""
         SELECT Order_ID, Order_Date
         FROM Orders
-        WHERE Order_Date IS NULL
-           OR NOT (Order_Date GLOB '????-??-??' 
-                   AND LENGTH(Order_Date) = 10
-                   AND CAST(substr(Order_Date, 1, 4) AS INTEGER) > 0
-                   AND substr(Order_Date, 6, 2) BETWEEN '01' AND '12'
-                   AND CASE 
-                       WHEN substr(Order_Date, 6, 2) IN ('01', '03', '05', '07', '08', '10', '12') THEN substr(Order_Date, 9, 2) BETWEEN '01' AND '31'
-                       WHEN substr(Order_Date, 6, 2) IN ('04', '06', '09', '11') THEN substr(Order_Date, 9, 2) BETWEEN '01' AND '30'
-                       WHEN substr(Order_Date, 6, 2) = '02' THEN (
-                           CASE 
-                               WHEN (CAST(substr(Order_Date, 1, 4) AS INTEGER) % 4 = 0 
-                                     AND CAST(substr(Order_Date, 1, 4) AS INTEGER) % 100 != 0) 
-                                  OR CAST(substr(Order_Date, 1, 4) AS INTEGER) % 400 = 0 THEN substr(Order_Date, 9, 2) BETWEEN '01' AND '29'
-                               ELSE substr(Order_Date, 9, 2) BETWEEN '01' AND '28'
-                           END
-                       )
-                       ELSE 0
-                   END = 1
-               );
+        WHERE {INVALID_ORDER_DATE_FORMAT};
     """
 
 # Query to find orders with negative quantities
 def get_orders_with_negative_quantity():
-    return """
+    return f"""
         SELECT Order_ID, Customer_ID, Product_ID, Quantity
         FROM Orders
-        WHERE Quantity < 0
+        WHERE {NEGATIVE_QUANTITY}
     """
 
 # Query to find orders with missing Customer_Name
 def get_orders_with_missing_customer_name():
-    return """
+    return f"""
         SELECT Order_ID, Customer_ID, Customer_Name, Product_ID, Quantity
         FROM Orders
-        WHERE Customer_Name IS NULL
+        WHERE {MISSING_CUSTOMER_NAME}
     """
 
 # Query to ensure unique Product_ID (no duplicates allowed in Orders)
 def get_orders_with_duplicate_product_id():
     return """
-        SELECT Product_ID, COUNT(*) 
-        FROM Orders 
-        GROUP BY Product_ID 
+        SELECT Product_ID, COUNT(*)
+        FROM Orders
+        GROUP BY Product_ID
         HAVING COUNT(*) > 1
     """
 
 # Query to ensure Product_Name cannot be NULL in Products
 def get_orders_with_null_product_name():
-    return """
-        SELECT * 
-        FROM Products 
-        WHERE Product_Name IS NULL
+    return f"""
+        SELECT *
+        FROM Products
+        WHERE {NULL_PRODUCT_NAME}
     """
 
 # Query to get email customer in Orders
@@ -72,10 +77,10 @@ def get_invalid_email_customers():
     Query to find customers with invalid email format.
     Returns rows where the email does not match the expected pattern.
     """
-    query = """
-    SELECT * 
+    query = f"""
+    SELECT *
     FROM Orders
-    WHERE Email NOT LIKE '%_@__%.__%';
+    WHERE {INVALID_EMAIL};
     """
     return query
 
@@ -83,13 +88,25 @@ def get_orders_with_invalid_date_range():
     """
     Query to find orders where the Order_Date is outside the range '2024-01-01' to '2024-12-31'.
     """
-    query = """
-    SELECT * 
+    query = f"""
+    SELECT *
     FROM Orders
-    WHERE Order_Date < '2024-01-01' OR Order_Date > '2024-12-31';
+    WHERE {ORDER_DATE_OUT_OF_RANGE};
     """
     return query
 
+def get_orders_outside_date_range():
+    """
+    Query to find orders dated outside [start, end], an indexed range query on Order_Day.
+    Bind two parameters: the start and end Order_Day (see order_dates.to_order_day).
+    Orders with an invalid date are reported by validate_order_date_format instead.
+    """
+    return """
+        SELECT Order_ID, Order_Date
+        FROM Orders
+        WHERE Order_Day < ? OR Order_Day > ?
+    """
+
 def get_invalid_product_references():
     """
     Returns the SQL query to check for invalid Product_ID references in the Orders table.
@@ -99,4 +116,28 @@ def get_invalid_product_references():
         FROM Orders o
         LEFT JOIN Products p ON o.Product_ID = p.Product_ID
         WHERE p.Product_ID IS NULL;
-    """
\ No newline at end of file
+    """
+
+def get_product_quantity_by_day():
+    """
+    Query to fetch one product's orders and quantity per day from the Summary_Product_Day summary.
+    Bind three parameters: the Product_ID and the start and end Order_Day.
+    """
+    return """
+        SELECT Order_Day, Orders, Quantity
+        FROM Summary_Product_Day
+        WHERE Product_ID = ? AND Order_Day BETWEEN ? AND ?
+        ORDER BY Order_Day
+    """
+
+def get_top_customers_by_quantity():
+    """
+    Query to fetch the customers with the largest total quantity from the Summary_Customer_Orders summary.
+    Bind one parameter: the number of customers.
+    """
+    return """
+        SELECT Customer_ID, Orders, Quantity, Last_Order_Day
+        FROM Summary_Customer_Orders
+        ORDER BY Quantity DESC, Customer_ID
+        LIMIT ?
+    """
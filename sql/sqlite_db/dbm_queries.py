@@ -7,19 +7,96 @@ def get_customers_with_duplicates():
         FROM Dimension_Orders
         GROUP BY Customer_ID, Order_ID
         HAVING COUNT(*) > 1
+        ORDER BY Customer_ID, Order_ID
     """
 
-def get_order_history_for_customer(customer_id, order_id):
+def get_order_history_for_customer():
     """
     Query to fetch all records for a specific Customer_ID and Order_ID.
+    Bind two parameters: the Customer_ID and the Order_ID.
     """
-    return f"""
+    return """
         SELECT EID, Start_Date, End_Date, Active
         FROM Dimension_Orders
-        WHERE Customer_ID = {customer_id} AND Order_ID = {order_id}
+        WHERE Customer_ID = ? AND Order_ID = ?
         ORDER BY Start_Date ASC
     """
 
+# Temp view over Dimension_Orders and the archived versions, created by archive.attach_archive
+HISTORY_VIEW = 'Dimension_Orders_History'
+
+def _versions_table(include_archive):
+    return HISTORY_VIEW if include_archive else 'Dimension_Orders'
+
+def get_order_history_for_keys(include_archive=False):
+    """
+    Query to fetch the full version history of many (Customer_ID, Order_ID) keys in one round-trip.
+    Bind one parameter: a JSON array of [Customer_ID, Order_ID] pairs.
+    With include_archive, archived versions are included (the archive must be attached, see archive.py).
+    """
+    return f"""
+        SELECT d.Customer_ID, d.Order_ID, d.EID, d.Start_Date, d.End_Date, d.Active
+        FROM json_each(?) k
+        JOIN {_versions_table(include_archive)} d
+          ON d.Customer_ID = json_extract(k.value, '$[0]')
+         AND d.Order_ID = json_extract(k.value, '$[1]')
+        ORDER BY d.Customer_ID, d.Order_ID, d.Start_Date, d.EID
+    """
+
+def get_orders_as_of(include_archive=False):
+    """
+    Query to fetch the version of each order that was current on a date (Start_Date <= date < End_Date).
+    Bind three parameters: a JSON array of Order_IDs, then the date twice ('YYYY-MM-DD').
+    With include_archive, archived versions are included (the archive must be attached, see archive.py).
+    """
+    return f"""
+        SELECT d.*
+        FROM json_each(?) k
+        JOIN {_versions_table(include_archive)} d
+          ON d.Order_ID = k.value
+         AND d.Start_Date <= ?
+         AND d.End_Date > ?
+        ORDER BY d.Order_ID, d.Start_Date, d.EID
+    """
+
+def get_scd_integrity_violations():
+    """
+    Query to check the SCD Type 2 invariants of every order in one pass and return only violating versions.
+    Versions are ordered per Order_ID by (Start_Date, End_Date, EID), the order of the
+    (Order_ID, Start_Date, End_Date) index, so a version replaced on the day it opened comes first.
+    Violations (comma separated when a version has several):
+        gap                 the previous version ended before this one started
+        overlap             the previous version ended after this one started
+        active_not_latest   an active version is followed by a newer one
+        end_date_mismatch   active versions must end on 9999-12-31, inactive ones earlier
+        multiple_active     the order has more than one active version
+    An order whose latest version is inactive was deleted from the source and is not a violation.
+    """
+    return """
+        SELECT Order_ID, Customer_ID, EID, Start_Date, End_Date, Active, Violations
+        FROM (
+            SELECT *,
+                   rtrim(
+                       CASE WHEN Previous_End_Date < Start_Date THEN 'gap,' ELSE '' END ||
+                       CASE WHEN Previous_End_Date > Start_Date THEN 'overlap,' ELSE '' END ||
+                       CASE WHEN Active = 'Y' AND Next_Start_Date IS NOT NULL THEN 'active_not_latest,' ELSE '' END ||
+                       CASE WHEN (Active = 'Y') IS NOT (End_Date = '9999-12-31') THEN 'end_date_mismatch,' ELSE '' END ||
+                       CASE WHEN Active = 'Y' AND Active_Count > 1 THEN 'multiple_active,' ELSE '' END,
+                   ',') AS Violations
+            FROM (
+                SELECT Order_ID, Customer_ID, EID, Start_Date, End_Date, Active,
+                       LAG(End_Date) OVER versions AS Previous_End_Date,
+                       LEAD(Start_Date) OVER versions AS Next_Start_Date,
+                       SUM(Active = 'Y') OVER (versions ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+                           AS Active_Count
+                FROM Dimension_Orders
+                WINDOW versions AS (PARTITION BY Order_ID ORDER BY Start_Date, End_Date, EID)
+            )
+        )
+        WHERE Violations <> ''
+        ORDER BY Order_ID, Start_Date, End_Date, EID
+    """
+
 def get_all_column_names():
     """Query to get column names of the Dimension_Orders table"""
     return """
@@ -34,4 +111,41 @@ def get_active_records_count_per_customer():
         WHERE Active = 'Y' 
         GROUP BY Customer_ID, Order_ID
         HAVING COUNT(*) = 1
-    """
\ No newline at end of file
+    """
+
+def get_orders_with_multiple_active_records():
+    """Query to find Customer_ID and Order_ID combinations with more than one active record"""
+    return """
+        SELECT Customer_ID, Order_ID, COUNT(*) AS Active_Count
+        FROM Dimension_Orders
+        WHERE Active = 'Y'
+        GROUP BY Customer_ID, Order_ID
+        HAVING COUNT(*) > 1
+        ORDER BY Customer_ID, Order_ID
+    """
+
+def get_order_facts_for_customer():
+    """
+    Query to fetch a customer's order facts with their current dimension attributes, joined on EID.
+    Bind one parameter: the Customer_ID.
+    """
+    return """
+        SELECT f.Order_ID, f.EID, d.Customer_Name, d.Order_Date, f.Product_ID, f.Quantity
+        FROM Fact_Orders f
+        JOIN Dimension_Orders d ON d.EID = f.EID
+        WHERE f.Customer_ID = ?
+        ORDER BY f.Order_ID
+    """
+
+def get_customers_with_most_expired_versions():
+    """
+    Query to fetch the customers whose orders changed most, from the Summary_Customer_Versions summary.
+    Bind one parameter: the number of customers.
+    """
+    return """
+        SELECT Customer_ID, Active_Versions, Expired_Versions
+        FROM Summary_Customer_Versions
+        WHERE Expired_Versions > 0
+        ORDER BY Expired_Versions DESC, Customer_ID
+        LIMIT ?
+    """
@@ -0,0 +1,48 @@
+import json
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.dbm_queries import get_order_history_for_keys, get_orders_as_of
+
+def _as_id(value):
+    """Plain int for JSON (numpy integers are not serialisable); NULL/NaN stays None."""
+    return None if value is None or value != value else int(value)
+
+def _rows_as_dicts(cursor):
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+def get_order_histories(conn, keys, include_archive=False):
+    """
+    Return {(Customer_ID, Order_ID): [versions oldest first]} for many keys.
+
+    All keys go to SQLite as one JSON parameter, so the whole batch is a
+    single indexed query instead of one query per key. Keys without any
+    version map to an empty list. With `include_archive` the versions moved
+    out by archive.py are included; attach the archive first (archive.attach_archive).
+    """
+    keys = [(_as_id(customer_id), _as_id(order_id)) for customer_id, order_id in keys]
+    histories = {key: [] for key in keys}
+    cursor = conn.execute(get_order_history_for_keys(include_archive), (json.dumps(keys),))
+    for row in _rows_as_dicts(cursor):
+        histories[(row['Customer_ID'], row['Order_ID'])].append(row)
+    return histories
+
+def get_order_as_of(conn, order_ids, as_of_date, include_archive=False):
+    """
+    Return {Order_ID: version} with the version of each order that was current
+    on `as_of_date` ('YYYY-MM-DD' or a date), or None for orders that did not
+    exist on that date (not yet loaded, or already deleted). Dates older than
+    the archive retention need `include_archive` (see get_order_histories).
+    """
+    as_of_date = str(as_of_date)
+    order_ids = [_as_id(order_id) for order_id in order_ids]
+    versions = {order_id: None for order_id in order_ids}
+    cursor = conn.execute(get_orders_as_of(include_archive), (json.dumps(order_ids), as_of_date, as_of_date))
+    for row in _rows_as_dicts(cursor):
+        # Same-day changes close a version on the day it opened; the latest one wins
+        versions[row['Order_ID']] = row
+    return versions
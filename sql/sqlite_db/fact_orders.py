@@ -0,0 +1,153 @@
+import sys
+import os
+from itertools import islice
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.indexes import apply_indexes
+from sql.sqlite_db.connection import DB_PATH, DM_DB_PATH, connect, get_connection
+from sql.sqlite_db.instrumentation import current_recorder
+
+# Number of fact rows written per executemany call
+BATCH_SIZE = 5000
+
+UPSERT_FACT_QUERY = '''
+    INSERT INTO Fact_Orders (Order_ID, EID, Customer_ID, Product_ID, Order_Day, Quantity)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (Order_ID) DO UPDATE SET
+        EID = excluded.EID,
+        Customer_ID = excluded.Customer_ID,
+        Product_ID = excluded.Product_ID,
+        Order_Day = excluded.Order_Day,
+        Quantity = excluded.Quantity
+'''
+
+def create_fact_table(conn):
+    """Create Fact_Orders (and its indexes) if the database does not have it yet."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS Fact_Orders (
+            Order_ID INTEGER PRIMARY KEY,     -- One fact per source order
+            EID INTEGER NOT NULL,             -- Current Dimension_Orders version of the order
+            Customer_ID INTEGER,
+            Product_ID INTEGER,               -- NULL when the order's Product_ID is not in Products
+            Order_Day INTEGER,
+            Quantity INTEGER,
+            FOREIGN KEY(EID) REFERENCES Dimension_Orders(EID)
+        );
+    ''')
+    apply_indexes(conn, ['Fact_Orders'])
+
+class SurrogateKeyMap:
+    """
+    Order_ID -> EID of the active Dimension_Orders version, held in memory.
+
+    Built with one pass over the active versions, then kept current by
+    refresh(), which reads only the versions inserted since the last load or
+    refresh (EIDs only grow, so the newest version of an order wins). Lookups
+    are a dict access instead of one indexed subquery per order.
+    """
+
+    def __init__(self, dm_conn):
+        self._conn = dm_conn
+        self._keys = {}
+        self._max_eid = 0
+        cursor = dm_conn.execute("SELECT Order_ID, EID FROM Dimension_Orders WHERE Active = 'Y'")
+        self._add(cursor)
+
+    def _add(self, rows):
+        for order_id, eid in rows:
+            self._keys[order_id] = eid
+            self._max_eid = max(self._max_eid, eid)
+
+    def refresh(self):
+        """Pick up versions inserted since the map was built or last refreshed; returns how many."""
+        before = self._max_eid
+        rows = self._conn.execute('''
+            SELECT Order_ID, EID FROM Dimension_Orders
+            WHERE EID > ? AND Active = 'Y'
+            ORDER BY EID
+        ''', (before,)).fetchall()
+        self._add(rows)
+        return len(rows)
+
+    def get(self, order_id):
+        return self._keys.get(order_id)
+
+    def __len__(self):
+        return len(self._keys)
+
+def _fact_rows(orders, key_map, product_ids, counts):
+    """Yield the fact row of every source order with a dimension version, counting the rest."""
+    for order_id, customer_id, product_id, order_day, quantity in orders:
+        counts['rows_in'] += 1
+        eid = key_map.get(order_id)
+        if eid is None:
+            counts['unresolved_orders'] += 1  # Not synced into the dimension yet
+            continue
+        if product_id not in product_ids:
+            counts['unresolved_products'] += 1
+            product_id = None
+        yield order_id, eid, customer_id, product_id, order_day, quantity
+
+def load_fact_orders(source_db_path=DB_PATH, dm_db_path=DM_DB_PATH, key_map=None, batch_size=BATCH_SIZE):
+    """
+    Load Fact_Orders from the source Orders, keyed on the dimension's EID.
+
+    Run after sync_dimension_table. Each order's current EID comes from a
+    SurrogateKeyMap (pass one to reuse it across runs; it is refreshed first)
+    and its Product_ID is checked against the set of Products keys, both
+    built once per run. Facts are upserted in batches, only for orders whose
+    EID or product key changed, and facts of orders deleted from the source
+    are removed. Returns the counts per outcome.
+    """
+    dm_conn = get_connection(dm_db_path)
+    create_fact_table(dm_conn)
+    source_conn = connect(source_db_path, 'read_only')
+    recorder = current_recorder()
+    counts = {'rows_in': 0, 'unresolved_orders': 0, 'unresolved_products': 0, 'upserted': 0, 'deleted': 0}
+
+    try:
+        with recorder.stage('facts.key_maps') as stage:
+            if key_map is None:
+                key_map = SurrogateKeyMap(dm_conn)
+            else:
+                key_map.refresh()
+            product_ids = {row[0] for row in source_conn.execute("SELECT Product_ID FROM Products")}
+            # Keys of the facts already loaded, to skip unchanged orders and find deleted ones
+            loaded = {
+                order_id: (eid, product_id)
+                for order_id, eid, product_id in dm_conn.execute("SELECT Order_ID, EID, Product_ID FROM Fact_Orders")
+            }
+            stage.add(rows_out=len(key_map))
+
+        orders = source_conn.execute(
+            "SELECT Order_ID, Customer_ID, Product_ID, Order_Day, Quantity FROM Orders ORDER BY Order_ID"
+        )
+        changed = (
+            row for row in _fact_rows(orders, key_map, product_ids, counts)
+            if loaded.pop(row[0], None) != (row[1], row[3])
+        )
+        with dm_conn, recorder.stage('facts.insert') as stage:
+            while True:
+                batch = list(islice(changed, batch_size))
+                if not batch:
+                    break
+                dm_conn.executemany(UPSERT_FACT_QUERY, batch)
+                counts['upserted'] += len(batch)
+
+            # Orders left in `loaded` were not in the source any more
+            dm_conn.executemany("DELETE FROM Fact_Orders WHERE Order_ID = ?", ((order_id,) for order_id in loaded))
+            counts['deleted'] = len(loaded)
+            stage.add(rows_in=counts['rows_in'], rows_out=counts['upserted'],
+                      rows_rejected=counts['unresolved_orders'])
+    finally:
+        source_conn.close()
+
+    print(f"Fact_Orders loaded: {counts['upserted']} facts written, {counts['deleted']} removed, "
+          f"{counts['unresolved_orders']} orders without a dimension version, "
+          f"{counts['unresolved_products']} unknown products.")
+    return counts
+
+if __name__ == '__main__':
+    load_fact_orders()
@@ -0,0 +1,154 @@
+import re
+import sys
+import os
+from collections import namedtuple
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# A secondary index. `where` makes it a partial index over the matching rows only.
+IndexSpec = namedtuple('IndexSpec', ['name', 'table', 'columns', 'where'], defaults=(None,))
+
+# Secondary indexes per table, applied by setup_db.py / setup_dm_db.py (and by the
+# dimension sync for databases created before an index was added). Only keyed
+# lookups, joins and range queries get an index: every bulk load pays for each
+# one, and the whole-table data-quality checks read every row anyway.
+INDEXES = {
+    'Orders': [
+        # Order_Day range queries and the per-day summaries
+        IndexSpec('idx_orders_order_day', 'Orders', ('Order_Day',)),
+        IndexSpec('idx_orders_customer_id_order_date', 'Orders', ('Customer_ID', 'Order_Date')),
+        # Orders -> Products join
+        IndexSpec('idx_orders_product_id', 'Orders', ('Product_ID',)),
+    ],
+    # Product_ID is the primary key; Products needs no secondary index
+    'Products': [],
+    'Dimension_Orders': [
+        # Active version lookup by Order_ID (sync and SCD checks)
+        IndexSpec('idx_dimension_orders_active_order_id', 'Dimension_Orders', ('Order_ID',), "Active = 'Y'"),
+        IndexSpec('idx_dimension_orders_customer_id_order_id', 'Dimension_Orders', ('Customer_ID', 'Order_ID')),
+        IndexSpec('idx_dimension_orders_active_customer_id_order_id', 'Dimension_Orders',
+                  ('Customer_ID', 'Order_ID'), "Active = 'Y'"),
+        # As-of lookups: the version of an order whose [Start_Date, End_Date) covers a date
+        IndexSpec('idx_dimension_orders_order_id_start_end', 'Dimension_Orders',
+                  ('Order_ID', 'Start_Date', 'End_Date')),
+        # Expired versions oldest first, for archiving (see archive.py)
+        IndexSpec('idx_dimension_orders_expired_end_date', 'Dimension_Orders', ('End_Date', 'EID'), "Active = 'N'"),
+    ],
+    'Fact_Orders': [
+        IndexSpec('idx_fact_orders_eid', 'Fact_Orders', ('EID',)),
+        IndexSpec('idx_fact_orders_customer_id', 'Fact_Orders', ('Customer_ID',)),
+    ],
+}
+
+# Indexes an earlier schema created that the spec above replaces or no longer wants
+RETIRED_INDEXES = [
+    'idx_dimension_orders_order_id_active',
+    'idx_orders_quantity',
+    'idx_orders_customer_name',
+    'idx_orders_invalid_email',
+    'idx_products_product_name',
+]
+
+# Orders index on the shard number of a partitioned dimension (see partitioned_dm.py),
+# named for its shard count: idx_orders_shard_<count>
+SHARD_INDEX_PREFIX = 'idx_orders_shard_'
+
+# Tables big enough that a full SCAN of them counts as a query plan regression
+LARGE_TABLES = ('Orders', 'Products', 'Dimension_Orders', 'Fact_Orders')
+
+# Words that can follow a table name in FROM/JOIN without being its alias
+_CLAUSE_KEYWORDS = {'WHERE', 'ON', 'JOIN', 'LEFT', 'INNER', 'CROSS', 'GROUP', 'ORDER', 'LIMIT', 'SET', 'USING'}
+
+def index_sql(spec):
+    """CREATE INDEX statement for one IndexSpec."""
+    sql = f"CREATE INDEX IF NOT EXISTS {spec.name} ON {spec.table} ({', '.join(spec.columns)})"
+    if spec.where:
+        sql += f" WHERE {spec.where}"
+    return sql
+
+def apply_indexes(conn, tables):
+    """
+    Create the spec'd indexes of the given tables that the database does not have yet.
+
+    Safe to run repeatedly. An existing index whose definition no longer matches
+    the spec is dropped and recreated, and retired indexes are dropped. Tables
+    missing from the database are skipped. Commit is left to the caller.
+    """
+    existing = {
+        name: sql for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'")
+    }
+    for name in RETIRED_INDEXES:
+        if name in existing:
+            conn.execute(f"DROP INDEX {name}")
+
+    created = []
+    for table in tables:
+        has_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if not has_table:
+            continue
+        for spec in INDEXES[table]:
+            sql = index_sql(spec)
+            stored = existing.get(spec.name)
+            if stored is not None and stored != sql.replace(" IF NOT EXISTS", ""):
+                conn.execute(f"DROP INDEX {spec.name}")
+                stored = None
+            if stored is None:
+                conn.execute(sql)
+                created.append(spec.name)
+    return created
+
+def shard_index(shard_count):
+    """IndexSpec of the Orders index on the shard number of Order_ID for `shard_count` shards."""
+    from sql.sqlite_db.create_dm import shard_expression  # create_dm imports this module
+    return IndexSpec(f"{SHARD_INDEX_PREFIX}{int(shard_count)}", 'Orders', (shard_expression('Order_ID', shard_count),))
+
+def apply_shard_index(conn, shard_count):
+    """
+    Create the Orders shard-number index for `shard_count` shards and drop the
+    ones of other shard counts, which no sync would use. Returns the index name.
+    Commit is left to the caller.
+    """
+    spec = shard_index(shard_count)
+    stale = conn.execute('''
+        SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'Orders' AND name GLOB ? AND name != ?
+    ''', (f"{SHARD_INDEX_PREFIX}*", spec.name)).fetchall()
+    for (name,) in stale:
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute(index_sql(spec))
+    return spec.name
+
+def _table_aliases(sql):
+    """Map every name a large table is referenced by in a query (its own name and aliases) to the table."""
+    aliases = {table: table for table in LARGE_TABLES}
+    pattern = r"\b(?:FROM|JOIN)\s+(?:\w+\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?"
+    for table, alias in re.findall(pattern, sql, flags=re.IGNORECASE):
+        if table in LARGE_TABLES and alias and alias.upper() not in _CLAUSE_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+def find_full_scans(conn, sql, params=()):
+    """
+    Run EXPLAIN QUERY PLAN on a query and return the plan lines that SCAN a
+    large table without any index. Scans through an index (covering or
+    partial) and searches are fine.
+    """
+    aliases = _table_aliases(sql)
+    full_scans = []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+        detail = row[-1]
+        match = re.match(r"SCAN (?:TABLE )?(\w+)(.*)", detail)
+        if match and match.group(1) in aliases and "INDEX" not in match.group(2):
+            full_scans.append(detail)
+    return full_scans
+
+if __name__ == '__main__':
+    from sql.sqlite_db.connection import DB_PATH, DM_DB_PATH, get_connection
+    # Bring existing databases up to the index spec without rebuilding them
+    for db_path, tables in ((DB_PATH, ['Orders', 'Products']), (DM_DB_PATH, ['Dimension_Orders', 'Fact_Orders'])):
+        conn = get_connection(db_path)
+        created = apply_indexes(conn, tables)
+        conn.commit()
+        print(f"{db_path}: created {created or 'no new indexes'}")
@@ -0,0 +1,115 @@
+import re
+import sys
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.db_queries import VALID_ORDER_DAYS
+
+# Rules a row must pass to be loaded at all, whatever the loader's options
+REQUIRED_RULES = ('missing_customer_id', 'missing_order_date')
+
+# Python twin of db_queries.INVALID_EMAIL (Email NOT LIKE '%_@__%.__%')
+_VALID_EMAIL = re.compile(r'.+@.{2,}\..{2,}', re.DOTALL)
+
+def _is_negative(value):
+    """Quantity < 0 the way SQLite compares it: numbers and numeric text only."""
+    if isinstance(value, (int, float)):
+        return value < 0
+    try:
+        return float(value) < 0
+    except (TypeError, ValueError):
+        return False
+
+def _product_key(value):
+    """Product_ID the way an INTEGER PRIMARY KEY stores it ('567' and 567.0 are 567)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else number
+
+# Row-level rules checked at ingest, by validation rule name (see validation.RULES),
+# over one normalised Orders row:
+# (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email, Order_Date_ISO, Order_Day)
+ORDER_ROW_RULES = {
+    'missing_customer_id': lambda row, product_ids: not row[0],
+    'missing_order_date': lambda row, product_ids: not row[2],
+    'order_date_format': lambda row, product_ids: bool(row[2]) and row[7] is None,
+    'order_date_range': lambda row, product_ids: row[7] is not None and not (
+        VALID_ORDER_DAYS[0] <= row[7] <= VALID_ORDER_DAYS[1]),
+    'negative_quantity': lambda row, product_ids: _is_negative(row[4]),
+    'missing_customer_name': lambda row, product_ids: row[1] is None,
+    'invalid_email': lambda row, product_ids: row[5] is not None and not _VALID_EMAIL.fullmatch(str(row[5])),
+    'invalid_product_reference': lambda row, product_ids: _product_key(row[3]) not in product_ids,
+}
+
+class OrderRowChecker:
+    """
+    Evaluates the row-level rules on Orders rows while the loader holds them.
+
+    Product_ID references are checked against a set of Products keys read once
+    from the target database (inside the load's transaction, so it includes
+    products loaded earlier in the same run) and extended with every Products
+    batch written after that. Without `reject_invalid` only REQUIRED_RULES
+    reject a row; with it, a row failing any rule is rejected.
+    """
+
+    def __init__(self, conn, reject_invalid=False):
+        self._conn = conn
+        self._product_ids = None
+        self.rules = ORDER_ROW_RULES if reject_invalid else {
+            name: ORDER_ROW_RULES[name] for name in REQUIRED_RULES
+        }
+
+    def add_products(self, rows):
+        """Record Products rows written during the load."""
+        if self._product_ids is not None:
+            self._product_ids.update(_product_key(row[0]) for row in rows)
+
+    def _products(self):
+        if self._product_ids is None:
+            self._product_ids = {row[0] for row in self._conn.execute("SELECT Product_ID FROM Products")}
+        return self._product_ids
+
+    def split(self, batch):
+        """Return (clean rows, [(row, [failed rule names])]) for one Orders batch."""
+        product_ids = self._products() if 'invalid_product_reference' in self.rules else None
+        clean, rejected = [], []
+        for row in batch:
+            failed = [name for name, rule in self.rules.items() if rule(row, product_ids)]
+            if failed:
+                rejected.append((row, failed))
+            else:
+                clean.append(row)
+        return clean, rejected
+
+def create_reject_table(conn):
+    """Create Rejected_Orders if the database does not have it yet."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS Rejected_Orders (
+            Reject_ID INTEGER PRIMARY KEY,
+            Source TEXT,
+            Customer_ID INTEGER,
+            Customer_Name TEXT,
+            Order_Date TEXT,
+            Product_ID INTEGER,
+            Quantity INTEGER,
+            Email TEXT,
+            Rule_Codes TEXT,     -- Comma-separated rule names the row failed
+            Rejected_At TEXT
+        );
+    ''')
+
+def write_rejects(cursor, source, rejected):
+    """Insert one batch of (row, failed rules) pairs; returns rows rejected per first failed rule."""
+    rejected_at = datetime.now(timezone.utc).isoformat()
+    cursor.executemany('''
+        INSERT INTO Rejected_Orders (Source, Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity,
+                                     Email, Rule_Codes, Rejected_At)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(str(source), *row[:6], ",".join(failed), rejected_at) for row, failed in rejected])
+    return Counter(failed[0] for _, failed in rejected)
@@ -0,0 +1,229 @@
+import json
+import re
+import time
+from datetime import datetime, timezone
+
+# Literals in traced SQL are replaced by '?', so one statement run with
+# different parameters is reported as one entry
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+# NULL bound as a value (in a VALUES or argument list), not NULL in IS NULL
+_NULL_VALUE = re.compile(r"(?<=[(,])(\s*)NULL(?=\s*[,)])", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# Table written by an INSERT / REPLACE / UPDATE / DELETE, and table of a CREATE TRIGGER
+_DML_TABLE = re.compile(
+    r"^\s*(?:(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+"
+    r"(?:[\w\"]+\.)?\"?(\w+)", re.IGNORECASE)
+_TRIGGER_TABLE = re.compile(r"^\s*CREATE\s+(?:TEMP\w*\s+)?TRIGGER\b.*?\bON\s+(?:[\w\"]+\.)?\"?(\w+)",
+                            re.IGNORECASE | re.DOTALL)
+
+# Longest SQL text kept per statement entry and slowest sample
+MAX_SQL_LENGTH = 2000
+
+def normalise_sql(sql):
+    """Collapse whitespace and replace string/number literals and bound NULLs by '?'."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _NULL_VALUE.sub(r'\1?', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+class StageRecord:
+    """Accumulated timing and row counts of one named stage (entered any number of times)."""
+
+    def __init__(self, name, on_exit=None):
+        self.name = name
+        self._on_exit = on_exit
+        self.calls = 0
+        self.seconds = 0.0
+        self.counts = {'rows_in': 0, 'rows_out': 0, 'rows_rejected': 0}
+        self._started = None
+
+    def add(self, **counts):
+        """Add to rows_in / rows_out / rows_rejected, or to any other named counter."""
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._on_exit is not None:
+            self._on_exit()
+        self.seconds += time.perf_counter() - self._started
+        self.calls += 1
+        return False
+
+    def to_dict(self):
+        return {'calls': self.calls, 'seconds': round(self.seconds, 6), **self.counts}
+
+class RunRecorder:
+    """
+    Records one pipeline run: per-stage timings and row counts, plus per-statement SQL stats.
+
+    Statements are captured with sqlite3's trace callback, which fires when a
+    statement starts. A statement's time is measured up to the next traced
+    statement (or the end of the stage that ran it), so it includes fetching
+    its rows and its triggers, and is an approximation for statements that
+    overlap. Each execution counts once, so an executemany or a loop running
+    the same text counts each run; statements are grouped by their normalised
+    text only. sqlite3 also calls back for every trigger program and trigger
+    statement, with the text of the statement that fired it: a repeat of the
+    running text is counted under `trigger_callbacks` instead when it writes
+    to a table with triggers. So repeated runs of identical text (same bound
+    values) on such a table count as one execution.
+    Meant for one thread: statements traced from other threads interleave.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.statements = {}
+        self._traced = []
+        self._trigger_tables = set()   # Lower-case names of tables with triggers, on any traced connection
+        self._running = None   # (normalised sql, expanded sql, start time) of the last traced statement
+        self._running_triggers = 0   # Trigger callbacks of the running statement
+
+    def stage(self, name):
+        """Context manager timing one pass through a stage; the record accumulates over passes."""
+        self._close_statement()
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = StageRecord(name, self._close_statement)
+        return record
+
+    def add(self, name, **counts):
+        """Add row counts to a stage without timing anything."""
+        self.stage(name).add(**counts)
+
+    def trace(self, conn):
+        """Record every statement run on a connection (safe to call repeatedly)."""
+        if not any(traced is conn for traced in self._traced):
+            self._trigger_tables.update(
+                row[0].lower() for row in conn.execute('''
+                    SELECT tbl_name FROM sqlite_master WHERE type = 'trigger'
+                    UNION SELECT tbl_name FROM sqlite_temp_master WHERE type = 'trigger'
+                '''))
+            conn.set_trace_callback(self._on_statement)
+            self._traced.append(conn)
+
+    def _fires_triggers(self, sql):
+        match = _DML_TABLE.match(sql)
+        return match is not None and match.group(1).lower() in self._trigger_tables
+
+    def _on_statement(self, sql):
+        if self._running is not None and sql == self._running[1] and self._fires_triggers(sql):
+            # A trigger of the running statement, reported with its text
+            self._running_triggers += 1
+            return
+        now = time.perf_counter()
+        self._close_statement(now)
+        self._running = (normalise_sql(sql)[:MAX_SQL_LENGTH], sql, now)
+        trigger = _TRIGGER_TABLE.match(sql)
+        if trigger is not None:
+            self._trigger_tables.add(trigger.group(1).lower())
+
+    def _close_statement(self, now=None):
+        if self._running is None:
+            return
+        key, sql, started = self._running
+        self._running = None
+        elapsed = (now or time.perf_counter()) - started
+        entry = self.statements.get(key)
+        if entry is None:
+            entry = self.statements[key] = {'count': 0, 'trigger_callbacks': 0, 'total_seconds': 0.0,
+                                            'slowest_seconds': 0.0, 'slowest_sample': None}
+        entry['count'] += 1
+        entry['trigger_callbacks'] += self._running_triggers
+        self._running_triggers = 0
+        entry['total_seconds'] += elapsed
+        if elapsed >= entry['slowest_seconds']:
+            entry['slowest_seconds'] = elapsed
+            entry['slowest_sample'] = sql[:MAX_SQL_LENGTH]
+
+    def finish(self):
+        """Stop tracing every connection this recorder traced."""
+        self._close_statement()
+        for conn in self._traced:
+            try:
+                conn.set_trace_callback(None)
+            except Exception:
+                pass  # Already closed
+        self._traced = []
+
+    def report(self):
+        """The run report as a JSON-serialisable dict; statements sorted by total time."""
+        self._close_statement()
+        statements = [
+            {'sql': sql, **{name: round(value, 6) if isinstance(value, float) else value
+                            for name, value in entry.items()}}
+            for sql, entry in sorted(self.statements.items(), key=lambda item: -item[1]['total_seconds'])
+        ]
+        return {
+            'started_at': self.started_at,
+            'total_seconds': round(time.perf_counter() - self._start, 6),
+            'stages': {name: record.to_dict() for name, record in self.stages.items()},
+            'statements': statements,
+        }
+
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+class _NullStage:
+    """Stage returned when instrumentation is off: entering, leaving and counting do nothing."""
+
+    def add(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+class NullRecorder:
+    """Recorder used when instrumentation is off; every method is a no-op."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def add(self, name, **counts):
+        pass
+
+    def trace(self, conn):
+        pass
+
+    def finish(self):
+        pass
+
+_NULL_RECORDER = NullRecorder()
+_current = _NULL_RECORDER
+
+def current_recorder():
+    """The recorder of the run in progress, or a no-op recorder when instrumentation is off."""
+    return _current
+
+def start_run():
+    """Switch instrumentation on for this process and return the new run's recorder."""
+    global _current
+    _current.finish()
+    _current = RunRecorder()
+    return _current
+
+def finish_run(report_path=None):
+    """Switch instrumentation off, optionally write the JSON report, and return the report (or None)."""
+    global _current
+    recorder, _current = _current, _NULL_RECORDER
+    recorder.finish()
+    if not recorder.enabled:
+        return None
+    if report_path:
+        recorder.write_report(report_path)
+    return recorder.report()
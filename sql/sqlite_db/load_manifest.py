@@ -0,0 +1,160 @@
+import json
+import uuid
+import sys
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.row_hash import compute_row_hash
+
+# Checksums are sums of 64-bit row hashes modulo 2**64: adding rows in any
+# order, in any number of batches, files or loads, gives the same value
+CHECKSUM_MODULUS = 2 ** 64
+
+# Source columns of each loaded table covered by its checksum (the derived
+# Order_Date_ISO / Order_Day are recomputed from Order_Date)
+CHECKSUM_COLUMNS = {
+    'Products': ('Product_ID', 'Product_Name'),
+    'Orders': ('Customer_ID', 'Customer_Name', 'Order_Date', 'Product_ID', 'Quantity', 'Email'),
+}
+
+def ensure_manifest_table(conn):
+    """Create the Load_Manifest table if the database does not have it yet."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS Load_Manifest (
+            Load_ID TEXT,
+            Source TEXT,
+            Sheet TEXT,
+            Target_Table TEXT,
+            Rows_Seen INTEGER,
+            Rows_Skipped INTEGER,
+            Skip_Reasons TEXT,     -- JSON object: reason -> row count
+            Rows_Inserted INTEGER,
+            Checksum TEXT,         -- Hex sum of the inserted rows' hashes (see row_checksum)
+            Loaded_At TEXT,
+            PRIMARY KEY (Load_ID, Source, Sheet)
+        );
+    ''')
+
+def row_checksum(columns, values):
+    """64-bit hash of one row, built on row_hash.compute_row_hash so SQLite's type conversions hash alike."""
+    return int(compute_row_hash(columns, values)[:16], 16)
+
+def format_checksum(value):
+    return f"{value % CHECKSUM_MODULUS:016x}"
+
+class _ChecksumAggregate:
+    """SQL aggregate content_checksum('Col1', value1, 'Col2', value2, ...) over a table's rows."""
+
+    def __init__(self):
+        self.total = 0
+
+    def step(self, *args):
+        self.total += row_checksum(args[0::2], args[1::2])
+
+    def finalize(self):
+        return format_checksum(self.total)
+
+def table_checksum(conn, table):
+    """Row count and content checksum of a loaded table, in one pass inside SQLite."""
+    conn.create_aggregate('content_checksum', -1, _ChecksumAggregate)
+    arguments = ", ".join(f"'{column}', {column}" for column in CHECKSUM_COLUMNS[table])
+    return conn.execute(f"SELECT COUNT(*), content_checksum({arguments}) FROM {table}").fetchone()
+
+class SheetManifest:
+    """Counts and checksum of one sheet of one source, accumulated while it loads."""
+
+    def __init__(self, source, sheet):
+        self.source = source
+        self.sheet = sheet
+        self.rows_seen = 0
+        self.skip_reasons = Counter()
+        self.rows_inserted = 0
+        self.checksum = 0
+
+    @property
+    def rows_skipped(self):
+        return sum(self.skip_reasons.values())
+
+    def add_parsed(self, rows_seen, skip_reasons):
+        """Add rows read from the source and the reasons rows were skipped (reason -> count)."""
+        self.rows_seen += rows_seen
+        self.skip_reasons.update(skip_reasons)
+
+    def add_inserted(self, rows, duplicates=0, rejected=None):
+        """
+        Add rows that landed in the target table (values in CHECKSUM_COLUMNS order first),
+        the number of parsed rows the table ignored as duplicate keys, and the rows
+        rejected by ingest rules (rule -> count, see ingest_rules.py).
+        """
+        columns = CHECKSUM_COLUMNS[self.sheet]
+        for row in rows:
+            self.checksum += row_checksum(columns, row[:len(columns)])
+        self.rows_inserted += len(rows)
+        if duplicates:
+            self.skip_reasons['duplicate_key'] += duplicates
+        if rejected:
+            self.skip_reasons.update(rejected)
+
+class LoadManifest:
+    """The per-source, per-sheet entries of one load run, written to Load_Manifest at the end."""
+
+    def __init__(self, load_id=None):
+        self.load_id = load_id or uuid.uuid4().hex
+        self.sheets = {}
+
+    def sheet(self, source, sheet):
+        key = (str(source), sheet)
+        if key not in self.sheets:
+            self.sheets[key] = SheetManifest(*key)
+        return self.sheets[key]
+
+    def write(self, conn):
+        """Insert this load's entries; call inside the load's transaction so they commit with the rows."""
+        ensure_manifest_table(conn)
+        loaded_at = datetime.now(timezone.utc).isoformat()
+        conn.executemany('''
+            INSERT INTO Load_Manifest (Load_ID, Source, Sheet, Target_Table, Rows_Seen, Rows_Skipped,
+                                       Skip_Reasons, Rows_Inserted, Checksum, Loaded_At)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (self.load_id, entry.source, entry.sheet, entry.sheet, entry.rows_seen, entry.rows_skipped,
+             json.dumps(dict(sorted(entry.skip_reasons.items()))), entry.rows_inserted,
+             format_checksum(entry.checksum), loaded_at)
+            for entry in self.sheets.values()
+        ])
+
+def reconcile(conn, tables=tuple(CHECKSUM_COLUMNS)):
+    """
+    Compare every loaded table with the sum of its Load_Manifest entries.
+
+    Returns {table: {'manifest_rows', 'target_rows', 'manifest_checksum',
+    'target_checksum', 'matches'}}. The target side is one COUNT(*) and one
+    checksum aggregate per table; the source is not read again. Rows changed
+    or added outside the loader (or a loaded table whose manifest entries were
+    lost) show up as a mismatch. Works on a read-only connection.
+    """
+    has_manifest = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Load_Manifest'"
+    ).fetchone()
+    results = {}
+    for table in tables:
+        manifest_rows, checksums = 0, 0
+        entries = conn.execute(
+            "SELECT Rows_Inserted, Checksum FROM Load_Manifest WHERE Target_Table = ?", (table,)
+        ) if has_manifest else []
+        for rows_inserted, checksum in entries:
+            manifest_rows += rows_inserted
+            checksums += int(checksum, 16)
+        target_rows, target_checksum = table_checksum(conn, table)
+        results[table] = {
+            'manifest_rows': manifest_rows,
+            'target_rows': target_rows,
+            'manifest_checksum': format_checksum(checksums),
+            'target_checksum': target_checksum,
+            'matches': manifest_rows == target_rows and format_checksum(checksums) == target_checksum,
+        }
+    return results
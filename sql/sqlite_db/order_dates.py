@@ -0,0 +1,32 @@
+from datetime import date, datetime
+
+# Format Order_Date is stored in (the way it appears in the source workbook)
+ORDER_DATE_FORMAT = '%d/%m/%Y'
+
+# Order_Day counts days since 1970-01-01, so date ranges are integer ranges
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def to_order_day(value):
+    """Convert a date (or 'YYYY-MM-DD' string) to its Order_Day number."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal() - EPOCH_ORDINAL
+
+def parse_order_date(order_date):
+    """
+    Parse an Order_Date value once at load time.
+
+    Accepts a datetime/date or a 'dd/mm/YYYY' string and returns the canonical
+    (ISO 'YYYY-MM-DD', Order_Day) pair, or (None, None) when the value is not a
+    valid date in that format.
+    """
+    if isinstance(order_date, datetime):
+        order_date = order_date.date()
+    elif isinstance(order_date, str):
+        try:
+            order_date = datetime.strptime(order_date.strip(), ORDER_DATE_FORMAT).date()
+        except ValueError:
+            return None, None
+    elif not isinstance(order_date, date):
+        return None, None
+    return order_date.isoformat(), to_order_day(order_date)
@@ -0,0 +1,193 @@
+import json
+import sys
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db import dbm_queries
+from sql.sqlite_db.connection import DB_PATH, DM_DB_PATH, connect
+from sql.sqlite_db.validation import RULES, SAMPLE_SIZE, run_validation
+
+# Rows fetched from a check's cursor at a time while counting
+FETCH_SIZE = 10000
+
+# One independent check: a standalone query run against one database.
+#   informational: the query lists rows for the caller to inspect (e.g. history
+#                  counts) rather than violations, so rows do not fail the check
+Check = namedtuple('Check', ['name', 'db_path', 'query', 'params', 'informational'], defaults=((), False))
+
+# The registered validation rules (see validation.RULES) of one table, answered
+# together by one single-pass scan of it (validation.run_validation). A scan is
+# one parallel job that gives a result per rule.
+TableScan = namedtuple('TableScan', ['table', 'db_path', 'rule_names'])
+
+# Outcome of one check: the exact number of rows its query returned, the first
+# `sample_size` of them (dicts, in the query's ORDER BY, on its key columns),
+# how long it took, and the error text if the query itself failed
+CheckResult = namedtuple('CheckResult', ['name', 'db_path', 'count', 'sample', 'seconds', 'error', 'informational'])
+
+def data_checks(db_path=DB_PATH):
+    """The data-quality rules of validation.RULES (see tests/test_data_unittest.py) over etl.db, one scan per table."""
+    tables = []
+    for rule in RULES:
+        if rule.table not in tables:
+            tables.append(rule.table)
+    return [TableScan(table, db_path, tuple(rule.name for rule in RULES if rule.table == table)) for table in tables]
+
+def scd_checks(dm_db_path=DM_DB_PATH):
+    """The SCD Type 2 checks of tests/test_scd.py, over etl_dm.db."""
+    return [
+        Check('multiple_active_records', dm_db_path, dbm_queries.get_orders_with_multiple_active_records()),
+        Check('changed_orders', dm_db_path, dbm_queries.get_customers_with_duplicates(), informational=True),
+        Check('scd_integrity', dm_db_path, dbm_queries.get_scd_integrity_violations()),
+    ]
+
+def run_check(check, sample_size=SAMPLE_SIZE):
+    """
+    Run one check on its own read-only connection; query errors are captured, not raised.
+
+    The cursor is read FETCH_SIZE rows at a time and only the sample is kept,
+    so a check with millions of violating rows needs no more memory than one
+    with a handful. The sample is the first rows in the query's order, so check
+    queries end with an ORDER BY on their key columns (see scd_checks): without
+    one, the sample could change between runs or after a VACUUM or an index change.
+    """
+    start_time = time.perf_counter()
+    count, sample, error = 0, [], None
+    try:
+        conn = connect(check.db_path, 'read_only')
+        try:
+            cursor = conn.execute(check.query, check.params)
+            columns = [description[0] for description in cursor.description or ()]
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows[:max(sample_size - len(sample), 0)]:
+                    sample.append(dict(zip(columns, row)))
+                count += len(rows)
+        finally:
+            conn.close()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    return CheckResult(check.name, check.db_path, count, sample, time.perf_counter() - start_time, error,
+                       check.informational)
+
+def run_table_scan(scan, sample_size=SAMPLE_SIZE):
+    """
+    Run one table's rules in a single scan on its own read-only connection and
+    return a CheckResult per rule, each with the scan's duration. A failed scan
+    fails every rule with its error.
+    """
+    start_time = time.perf_counter()
+    results, error = {}, None
+    try:
+        conn = connect(scan.db_path, 'read_only')
+        try:
+            results = run_validation(conn, list(scan.rule_names), sample_size)
+        finally:
+            conn.close()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    seconds = time.perf_counter() - start_time
+    return [
+        CheckResult(name, scan.db_path, results[name].count if name in results else 0,
+                    results[name].sample if name in results else [], seconds, error, False)
+        for name in scan.rule_names
+    ]
+
+def _run_job(job, sample_size):
+    if isinstance(job, TableScan):
+        return run_table_scan(job, sample_size)
+    return [run_check(job, sample_size)]
+
+def describe(result):
+    """One-line count plus the sample, one row per line, for assertion messages and logs."""
+    if result.error:
+        return f"{result.name}: {result.error}"
+    lines = [f"{result.name}: {result.count} rows"
+             + (f", first {len(result.sample)}:" if 0 < len(result.sample) < result.count else "")]
+    lines.extend(f"  {row}" for row in result.sample)
+    return "\n".join(lines)
+
+class CheckReport:
+    """Results of one parallel run, in check order, with the run's wall-clock time."""
+
+    def __init__(self, results, seconds):
+        self.results = results
+        self.seconds = seconds
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    @property
+    def serial_seconds(self):
+        """Sum of the per-check durations: what running them one after another would roughly take."""
+        return sum(result.seconds for result in self.results.values())
+
+    def failures(self):
+        """Checks that errored or, unless informational, returned violating rows."""
+        return [
+            result for result in self.results.values()
+            if result.error or (result.count and not result.informational)
+        ]
+
+    def to_dict(self):
+        failed = {result.name for result in self.failures()}
+        return {
+            'seconds': round(self.seconds, 6),
+            'serial_seconds': round(self.serial_seconds, 6),
+            'checks': {
+                name: {
+                    'db_path': result.db_path,
+                    'count': result.count,
+                    'sample': result.sample,
+                    'seconds': round(result.seconds, 6),
+                    'passed': name not in failed,
+                    'error': result.error,
+                }
+                for name, result in self.results.items()
+            },
+        }
+
+def run_checks(checks, workers=None, sample_size=SAMPLE_SIZE):
+    """
+    Run independent checks and table scans at the same time and gather them
+    into a CheckReport, with one result per check and per scanned rule.
+
+    Each check or scan runs in a worker thread with its own read-only (mode=ro)
+    connection. sqlite3 releases the GIL while a query runs, so the run takes
+    about as long as its slowest job rather than the sum of all of them.
+    `workers` caps the threads (default one per job). Each result holds an
+    exact count and at most `sample_size` rows (see run_check).
+    """
+    names = [name for job in checks for name in (job.rule_names if isinstance(job, TableScan) else [job.name])]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Check names must be unique: {names}")
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or max(len(checks), 1)) as executor:
+        results = [result for job_results in executor.map(lambda job: _run_job(job, sample_size), checks)
+                   for result in job_results]
+    return CheckReport({result.name: result for result in results}, time.perf_counter() - start_time)
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the data-quality and SCD checks in parallel.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker threads (default one per check)")
+    parser.add_argument('--json', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = run_checks(data_checks() + scd_checks(), args.workers)
+    failed = {result.name for result in report.failures()}
+    for name, result in report.results.items():
+        status = "INFO" if result.informational and not result.error else ("FAIL" if name in failed else "PASS")
+        print(f"{status} {describe(result)} ({result.seconds:.3f}s)")
+    print(f"{len(report.results)} checks in {report.seconds:.3f}s (serial {report.serial_seconds:.3f}s)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as report_file:
+            json.dump(report.to_dict(), report_file, indent=2)
+    sys.exit(1 if failed else 0)
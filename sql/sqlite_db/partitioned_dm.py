@@ -0,0 +1,148 @@
+import argparse
+import heapq
+import multiprocessing
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.setup_dm_db import setup_dimension_database
+from sql.sqlite_db.create_dm import SOURCE_DB_PATH, sync_dimension_table
+from sql.sqlite_db.change_capture import table_sequence
+from sql.sqlite_db.connection import DM_DB_PATH, connect
+from sql.sqlite_db.indexes import shard_index
+
+# Number of shard files Dimension_Orders is split into by default
+DEFAULT_SHARD_COUNT = 4
+# EIDs of shard k are issued above k * SHARD_EID_BLOCK, so they are unique across
+# shard files and facts can be keyed on them as on a single-file dimension
+SHARD_EID_BLOCK = 10 ** 12
+
+def shard_paths(dm_db_path=DM_DB_PATH, shard_count=DEFAULT_SHARD_COUNT):
+    """Paths of the shard files of a partitioned dimension: etl_dm.db -> etl_dm_shard_00.db, ..."""
+    root, ext = os.path.splitext(dm_db_path)
+    return [f"{root}_shard_{index:02d}{ext}" for index in range(shard_count)]
+
+def reserve_eid_block(shard_path, index):
+    """
+    Start a shard's Dimension_Orders AUTOINCREMENT at the shard's EID block.
+    A no-op once the shard has issued EIDs in its block.
+    """
+    conn = connect(shard_path)
+    try:
+        start = index * SHARD_EID_BLOCK
+        if table_sequence(conn, 'Dimension_Orders') < start:
+            with conn:
+                conn.execute("DELETE FROM sqlite_sequence WHERE name = 'Dimension_Orders'")
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('Dimension_Orders', ?)", (start,))
+    finally:
+        conn.close()
+
+def check_shard_index(source_db_path=SOURCE_DB_PATH, shard_count=DEFAULT_SHARD_COUNT):
+    """
+    Raise unless the source Orders has the shard-number index for `shard_count`
+    shards (created by setup_db.py --shards), through which each shard's sync
+    seeks its own orders instead of hashing every row of Orders. The sync never
+    changes the source schema itself.
+    """
+    name = shard_index(shard_count).name
+    conn = connect(source_db_path, 'read_only')
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+    finally:
+        conn.close()
+    if not exists:
+        raise ValueError(f"The source Orders table has no index {name}; "
+                         f"create it with `setup_db.py --keep --shards {shard_count}`")
+
+def setup_partitioned_dimension(dm_db_path=DM_DB_PATH, shard_count=DEFAULT_SHARD_COUNT):
+    """Create an empty Dimension_Orders (with its indexes and EID block) in every shard file."""
+    for index, path in enumerate(shard_paths(dm_db_path, shard_count)):
+        setup_dimension_database(path)
+        reserve_eid_block(path, index)
+
+def _sync_shard(source_db_path, shard_path, index, shard_count, mode, incremental):
+    """Worker: sync one hash partition of Orders into its shard file."""
+    sync_dimension_table(source_db_path, shard_path, mode=mode, incremental=incremental,
+                         shard=(index, shard_count))
+    return shard_path
+
+def sync_partitioned_dimension(source_db_path=SOURCE_DB_PATH, dm_db_path=DM_DB_PATH,
+                               shard_count=DEFAULT_SHARD_COUNT, mode='merge', incremental=False,
+                               workers=None):
+    """
+    Sync Dimension_Orders into `shard_count` files, one worker process per shard.
+
+    Every version of an order lives in the shard given by create_dm.shard_of(Order_ID),
+    so the shards sync independently: each worker reads only its slice of Orders,
+    through an index on the shard number (check_shard_index), and writes only
+    its own file, with no lock shared between them. Each shard issues EIDs from
+    its own block, so EIDs are unique across shards. `workers` caps the number
+    of processes (default one per shard); 1 syncs the shards one after another
+    in this process.
+    """
+    check_shard_index(source_db_path, shard_count)
+    for index, path in enumerate(shard_paths(dm_db_path, shard_count)):
+        reserve_eid_block(path, index)
+    jobs = [
+        (source_db_path, path, index, shard_count, mode, incremental)
+        for index, path in enumerate(shard_paths(dm_db_path, shard_count))
+    ]
+    workers = min(workers or shard_count, shard_count)
+    if workers == 1:
+        return [_sync_shard(*job) for job in jobs]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.starmap(_sync_shard, jobs)
+
+def _query_shard(path, query, params):
+    conn = connect(path, 'read_only')
+    try:
+        cursor = conn.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        return columns, cursor.fetchall()
+    finally:
+        conn.close()
+
+def query_shards(query, params=(), dm_db_path=DM_DB_PATH, shard_count=DEFAULT_SHARD_COUNT,
+                 key=None, parallel=True):
+    """
+    Run one dbm_queries query on every shard and return (columns, rows).
+
+    Shards are read in parallel threads over read-only connections (sqlite3
+    releases the GIL while a query runs). Rows are concatenated in shard order,
+    or, given `key` (a function of a row), merged in key order; each shard's
+    rows must already be sorted by that key, as the query's ORDER BY makes them.
+
+    Results equal the single-file query for queries that group or filter per
+    order (an order never spans shards). Aggregates over several orders, such
+    as counts per customer, come back as one partial row per shard to be
+    combined by the caller.
+    """
+    paths = shard_paths(dm_db_path, shard_count)
+    if parallel and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            results = list(executor.map(lambda path: _query_shard(path, query, params), paths))
+    else:
+        results = [_query_shard(path, query, params) for path in paths]
+
+    columns = results[0][0]
+    shard_rows = [rows for _, rows in results]
+    if key is not None:
+        return columns, list(heapq.merge(*shard_rows, key=key))
+    return columns, [row for rows in shard_rows for row in rows]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sync Dimension_Orders into hash-partitioned shard files.")
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARD_COUNT, help="Number of shard files")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default one per shard)")
+    parser.add_argument('--setup', action='store_true', help="(Re)create the shard files first")
+    parser.add_argument('--incremental', action='store_true', help="Only re-check orders in the change log")
+    args = parser.parse_args()
+
+    if args.setup:
+        setup_partitioned_dimension(shard_count=args.shards)
+    synced = sync_partitioned_dimension(shard_count=args.shards, incremental=args.incremental,
+                                        workers=args.workers)
+    print(f"Synced {len(synced)} shards: {', '.join(synced)}")
@@ -0,0 +1,379 @@
+import ast
+import glob
+import hashlib
+import json
+import threading
+import time
+import sys
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.change_capture import read_watermark, table_fingerprint
+from sql.sqlite_db.connection import DB_PATH, DM_DB_PATH, PROJECT_ROOT, close_connections, connect, resolve_db_path
+
+# Sidecar database recording each stage's last successful run, next to etl.db
+STATE_DB_PATH = 'sql/sqlite_db/pipeline_state.db'
+# Default source: the workbook the README loads
+SOURCE_PATH = os.path.join(PROJECT_ROOT, 'orders_test_data.xlsx')
+# Bytes read at a time when hashing source files
+HASH_CHUNK_SIZE = 1024 * 1024
+# Stages fingerprint their code from worker threads; ast.parse is not safe to run
+# in several threads at once on every Python version (3.11 raises SystemError)
+_PARSE_LOCK = threading.Lock()
+
+# One pipeline run's settings, passed to every stage
+PipelineConfig = namedtuple('PipelineConfig', ['source_path', 'db_path', 'dm_db_path', 'reject_invalid'],
+                            defaults=(SOURCE_PATH, DB_PATH, DM_DB_PATH, False))
+
+# A node of the pipeline graph. `inputs(config)` and `outputs(config)` return
+# JSON-serialisable fingerprints: the stage is skipped while both are the same
+# as after its last successful run. `code` lists the project files the stage
+# runs: their contents, and those of every project module they import, are
+# part of the input fingerprint (see code_files). `run(config)` returns a
+# JSON-serialisable summary.
+Stage = namedtuple('Stage', ['name', 'deps', 'code', 'inputs', 'outputs', 'run'])
+
+def file_digest(path):
+    """
+    SHA-256 of a file's content, read in chunks. For a directory or a glob, a
+    hash over the name and content hash of every file in it, in name order, so
+    copying the same files in again gives the same digest.
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(path) or not os.path.exists(path):
+        paths = sorted(glob.glob(os.path.join(path, '*') if os.path.isdir(path) else path))
+        if not paths:
+            raise FileNotFoundError(f"No source files found at {path}")
+        for file_path in paths:
+            if os.path.isfile(file_path):
+                digest.update(f"{os.path.basename(file_path)}\x1f{file_digest(file_path)}\x1e".encode('utf-8'))
+        return digest.hexdigest()
+    with open(path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _project_module_path(name, search_dirs):
+    """File of a module imported as `name`, or None when it is not a project module (stdlib, third-party)."""
+    relative = os.path.join(*name.split('.'))
+    for directory in search_dirs:
+        for candidate in (relative + '.py', os.path.join(relative, '__init__.py')):
+            path = os.path.join(directory, candidate)
+            if os.path.isfile(path):
+                return os.path.normpath(path)
+    return None
+
+def code_files(paths):
+    """
+    The files at `paths` (relative to the project root) and every project
+    module they import, directly or through other project modules, sorted.
+
+    Imports are read from the parsed source, including those inside
+    functions, so nothing is run. A module counts as a project module when it
+    resolves to a file under the project root, tests/ (which the loaders put on
+    sys.path) or the importing file's own directory.
+    """
+    found = set()
+    pending = [os.path.normpath(os.path.join(PROJECT_ROOT, path)) for path in paths]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        with open(path, encoding='utf-8') as source_file:
+            source = source_file.read()
+        with _PARSE_LOCK:
+            tree = ast.parse(source, path)
+        search_dirs = (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'tests'), os.path.dirname(path))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                # `from package import module` imports the module, `from module import name` the module itself
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                module_path = _project_module_path(name, search_dirs)
+                if module_path is not None:
+                    pending.append(module_path)
+    return sorted(found)
+
+def tables_exist(db_path, tables):
+    """Which of the tables the database has (all False when the database does not exist)."""
+    fingerprints = table_fingerprints(db_path, tables) or {}
+    return {table: fingerprints.get(table) is not None for table in tables}
+
+def table_row_counts(db_path, tables):
+    """Row count of each table, None for a missing table (or every table when the database does not exist)."""
+    if not os.path.exists(resolve_db_path(db_path)):
+        return {table: None for table in tables}
+    conn = connect(db_path, 'read_only')
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] if table in existing else None
+            for table in tables
+        }
+    finally:
+        conn.close()
+
+def table_fingerprints(db_path, tables):
+    """
+    Fingerprints of tables (see change_capture.table_fingerprint), None for a
+    missing table, or None for all of them when the database does not exist.
+    """
+    if not os.path.exists(resolve_db_path(db_path)):
+        return None
+    conn = connect(db_path, 'read_only')
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        fingerprints = {
+            table: table_fingerprint(conn, table) if table in existing else None for table in tables
+        }
+        if 'Sync_Watermark' in existing:
+            # Expiring a version changes no row count; the sync's watermark moves with it
+            fingerprints['Sync_Watermark'] = list(read_watermark(conn, 'Dimension_Orders'))
+        return fingerprints
+    finally:
+        conn.close()
+
+# Stage implementations. Imports are local so `--help` and skipped stages stay cheap.
+
+def _setup_source(config):
+    from sql.sqlite_db.setup_db import setup_database
+    setup_database(config.db_path, reset=False)
+    return {}
+
+def _setup_dimension(config):
+    from sql.sqlite_db.setup_dm_db import setup_dimension_database
+    setup_dimension_database(config.dm_db_path, reset=False)
+    return {}
+
+def _load(config):
+    sys.path.append(os.path.join(PROJECT_ROOT, 'tests'))
+    from load_data import detect_source_format, load_data_to_db, load_workbooks_to_db
+    try:
+        single_source = os.path.exists(config.source_path) and detect_source_format(config.source_path)
+    except ValueError:
+        single_source = False
+    if not single_source:
+        # Not a workbook or an export directory: a directory or glob of workbook drops
+        return load_workbooks_to_db(config.source_path, config.db_path, reject_invalid=config.reject_invalid,
+                                    replace=True)
+    return load_data_to_db(config.source_path, config.db_path, reject_invalid=config.reject_invalid,
+                           replace=True)
+
+def _sync(config):
+    from sql.sqlite_db.create_dm import sync_dimension_table
+    from sql.sqlite_db.fact_orders import load_fact_orders
+    sync_dimension_table(config.db_path, config.dm_db_path, incremental=True)
+    return load_fact_orders(config.db_path, config.dm_db_path)
+
+def _check_summary(report):
+    return {
+        'checks': len(report.results),
+        'failed': sorted(result.name for result in report.failures()),
+        'seconds': round(report.seconds, 6),
+    }
+
+def _validate_orders(config):
+    from sql.sqlite_db.parallel_validation import data_checks, run_checks
+    return _check_summary(run_checks(data_checks(config.db_path)))
+
+def _validate_dimension(config):
+    from sql.sqlite_db.parallel_validation import run_checks, scd_checks
+    return _check_summary(run_checks(scd_checks(config.dm_db_path)))
+
+SOURCE_TABLES = ['Orders', 'Products']
+DIMENSION_TABLES = ['Dimension_Orders', 'Fact_Orders']
+
+# The README's manual sequence as a graph. setup_dm_db does not depend on the
+# source, and Orders validation only needs the load, so each of them runs
+# next to another stage.
+STAGES = [
+    Stage('setup_db', (), ('sql/sqlite_db/setup_db.py',),
+          lambda config: {},
+          lambda config: tables_exist(config.db_path, SOURCE_TABLES),
+          _setup_source),
+    Stage('setup_dm_db', (), ('sql/sqlite_db/setup_dm_db.py',),
+          lambda config: {},
+          lambda config: tables_exist(config.dm_db_path, DIMENSION_TABLES),
+          _setup_dimension),
+    Stage('load_data', ('setup_db',), ('tests/load_data.py',),
+          lambda config: {'source': file_digest(config.source_path), 'reject_invalid': config.reject_invalid},
+          lambda config: table_fingerprints(config.db_path, SOURCE_TABLES),
+          _load),
+    # The sync also reads the dimension it extends: a dropped or emptied one is a changed input
+    Stage('create_dm', ('load_data', 'setup_dm_db'),
+          ('sql/sqlite_db/create_dm.py', 'sql/sqlite_db/fact_orders.py'),
+          lambda config: {'source': table_fingerprints(config.db_path, SOURCE_TABLES),
+                          'dimension': table_row_counts(config.dm_db_path, ['Dimension_Orders'])},
+          lambda config: table_fingerprints(config.dm_db_path, DIMENSION_TABLES),
+          _sync),
+    Stage('validate_orders', ('load_data',), ('sql/sqlite_db/parallel_validation.py',),
+          lambda config: table_fingerprints(config.db_path, SOURCE_TABLES),
+          lambda config: {},
+          _validate_orders),
+    Stage('validate_scd', ('create_dm',), ('sql/sqlite_db/parallel_validation.py',),
+          lambda config: table_fingerprints(config.dm_db_path, DIMENSION_TABLES),
+          lambda config: {},
+          _validate_dimension),
+]
+
+def stage_fingerprint(stage, config):
+    """Hash of a stage's inputs and of the code it runs, with every project module that code imports."""
+    code = {os.path.relpath(path, PROJECT_ROOT): file_digest(path) for path in code_files(stage.code)}
+    payload = json.dumps([stage.inputs(config), code], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def output_fingerprint(stage, config):
+    payload = json.dumps(stage.outputs(config), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class PipelineState:
+    """The input and output fingerprints and summary of each stage's last successful run."""
+
+    def __init__(self, path=STATE_DB_PATH):
+        self.conn = connect(path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS Pipeline_State (
+                Stage TEXT PRIMARY KEY,
+                Input_Fingerprint TEXT,
+                Output_Fingerprint TEXT,
+                Result TEXT,
+                Seconds REAL,
+                Finished_At TEXT
+            );
+        ''')
+        self.conn.commit()
+
+    def get(self, stage):
+        """Return (input fingerprint, output fingerprint, result) of the last successful run, or None."""
+        row = self.conn.execute('''
+            SELECT Input_Fingerprint, Output_Fingerprint, Result FROM Pipeline_State WHERE Stage = ?
+        ''', (stage,)).fetchone()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+    def put(self, stage, inputs, outputs, result, seconds):
+        with self.conn:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO Pipeline_State
+                    (Stage, Input_Fingerprint, Output_Fingerprint, Result, Seconds, Finished_At)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (stage, inputs, outputs, json.dumps(result, default=str), seconds,
+                  datetime.now(timezone.utc).isoformat()))
+
+    def clear(self, stages=None):
+        with self.conn:
+            if stages is None:
+                self.conn.execute("DELETE FROM Pipeline_State")
+            else:
+                self.conn.executemany("DELETE FROM Pipeline_State WHERE Stage = ?", [(stage,) for stage in stages])
+
+    def close(self):
+        self.conn.close()
+
+# Outcome of one stage in one run: 'ran', 'skipped', 'failed' or 'blocked' (a dependency failed)
+StageResult = namedtuple('StageResult', ['name', 'status', 'seconds', 'result', 'error'])
+
+def _execute(stage, config, previous, force):
+    """
+    Run one stage unless its fingerprints match `previous` (its last successful
+    run). Returns the StageResult and, when it ran, its (input, output) fingerprints.
+    """
+    start_time = time.perf_counter()
+    try:
+        inputs = stage_fingerprint(stage, config)
+        if not force and previous and previous[0] == inputs and previous[1] == output_fingerprint(stage, config):
+            return StageResult(stage.name, 'skipped', time.perf_counter() - start_time, previous[2], None), None
+        result = stage.run(config)
+        # Inputs are recorded as the run left them: a stage that reads tables it also
+        # writes (create_dm and the dimension) is otherwise rerun on the next run for
+        # its own changes. Upstream stages finish before it starts, so nothing else
+        # changes its inputs meanwhile. Downstream stages see its outputs through
+        # their own input fingerprints.
+        fingerprints = (stage_fingerprint(stage, config), output_fingerprint(stage, config))
+        return StageResult(stage.name, 'ran', time.perf_counter() - start_time, result, None), fingerprints
+    except Exception as error:
+        seconds = time.perf_counter() - start_time
+        return StageResult(stage.name, 'failed', seconds, None, f"{type(error).__name__}: {error}"), None
+    finally:
+        # Worker threads are reused by later stages; do not keep this stage's connections open
+        close_connections()
+
+def run_pipeline(config=None, stages=STAGES, state_path=STATE_DB_PATH, force=(), workers=None):
+    """
+    Run the pipeline graph, each stage as soon as all its dependencies are done.
+
+    Independent stages run at the same time in worker threads (each thread
+    opens its own SQLite connections). A stage whose input fingerprint (source
+    file hash or upstream table fingerprints, plus its code) and output
+    fingerprint match its last successful run is skipped, and its recorded
+    summary is reported again. Stages named in `force`, or every stage when
+    `force` is True, always run. A failed stage blocks everything downstream
+    of it. Returns {stage name: StageResult} in graph order.
+    """
+    config = config or PipelineConfig()
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages {missing}")
+
+    # Only this thread touches the state database
+    state = PipelineState(state_path)
+    results = {}
+    running = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers or len(stages)) as executor:
+            while len(results) < len(stages):
+                for stage in stages:
+                    if stage.name in results or stage.name in running:
+                        continue
+                    dep_results = [results.get(dep) for dep in stage.deps]
+                    if any(result and result.status in ('failed', 'blocked') for result in dep_results):
+                        results[stage.name] = StageResult(stage.name, 'blocked', 0.0, None, None)
+                    elif all(dep_results):
+                        forced = force is True or stage.name in force
+                        running[stage.name] = executor.submit(
+                            _execute, stage, config, state.get(stage.name), forced)
+                if not running:
+                    if len(results) < len(stages):
+                        raise ValueError("The stage graph has a cycle")
+                    break
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [name for name, future in running.items() if future in done]:
+                    result, fingerprints = running.pop(name).result()
+                    if fingerprints is not None:
+                        state.put(name, *fingerprints, result.result, result.seconds)
+                    results[name] = result
+    finally:
+        state.close()
+    return {stage.name: results[stage.name] for stage in stages}
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the ETL pipeline, skipping stages whose inputs did not change.")
+    parser.add_argument('source', nargs='?', default=SOURCE_PATH,
+                        help="Workbook, CSV/JSON Lines export directory, or directory/glob of workbook drops")
+    parser.add_argument('--force', nargs='*', metavar='STAGE',
+                        help="Run these stages (every stage when none are named) even if unchanged")
+    parser.add_argument('--reject-invalid', action='store_true',
+                        help="Send Orders rows failing a row-level data-quality rule to Rejected_Orders")
+    parser.add_argument('--workers', type=int, help="Stages run at the same time (default: every ready stage)")
+    args = parser.parse_args()
+
+    force = () if args.force is None else (args.force or True)
+    start_time = time.perf_counter()
+    results = run_pipeline(PipelineConfig(args.source, reject_invalid=args.reject_invalid), force=force,
+                           workers=args.workers)
+    for result in results.values():
+        print(f"{result.status.upper():8} {result.name} ({result.seconds:.2f}s) {result.error or result.result or ''}")
+    print(f"Pipeline finished in {time.perf_counter() - start_time:.2f}s")
+    sys.exit(1 if any(result.status in ('failed', 'blocked') for result in results.values()) else 0)
@@ -0,0 +1,211 @@
+import inspect
+import queue
+import threading
+import time
+import sys
+import os
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db import db_queries, dbm_queries
+from sql.sqlite_db.connection import DB_PATH, DM_DB_PATH, connect
+
+# Connections per database kept open by a QueryService
+POOL_SIZE = 4
+# Least recently used results beyond this many are evicted
+CACHE_SIZE = 256
+# Results with more rows than this are returned but not cached
+MAX_CACHED_ROWS = 10000
+
+# Rows of one query run, with the column names of the cursor
+QueryResult = namedtuple('QueryResult', ['columns', 'rows'])
+
+def module_queries(module):
+    """
+    {name: SQL} for every public query function of a query module that needs no
+    arguments, i.e. whose values are bound as parameters (see db_queries.py).
+    """
+    queries = {}
+    for name, function in inspect.getmembers(module, inspect.isfunction):
+        if function.__module__ != module.__name__ or name.startswith('_'):
+            continue
+        required = [parameter for parameter in inspect.signature(function).parameters.values()
+                    if parameter.default is inspect.Parameter.empty]
+        if not required:
+            queries[name] = function()
+    return queries
+
+class _QueryStats:
+    """Calls, cache hits and execution latency of one registered query."""
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add_execution(self, seconds):
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self):
+        executions = self.calls - self.hits
+        return {
+            'calls': self.calls,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.calls if self.calls else 0.0,
+            'executions': executions,
+            'mean_ms': self.total_seconds / executions * 1000 if executions else 0.0,
+            'max_ms': self.max_seconds * 1000,
+        }
+
+class QueryService:
+    """
+    Registered, parameterised queries on one database, run on pooled
+    connections behind an LRU result cache.
+
+    Queries are registered once by name and always run with the same SQL text,
+    so each pooled connection prepares a statement once and reuses it from
+    sqlite3's statement cache; values are bound, never formatted into the SQL.
+    Results are cached per (query, parameters). The cache is dropped whenever
+    PRAGMA data_version on a dedicated connection changes, which happens when
+    any other connection (a load, a sync) commits to the database, so a
+    cached result is never older than the last commit. The service only reads
+    (read_only profile by default). Safe to share between threads.
+    """
+
+    def __init__(self, db_path, queries=None, pool_size=POOL_SIZE, cache_size=CACHE_SIZE, profile='read_only'):
+        self.db_path = db_path
+        self.profile = profile
+        self.cache_size = cache_size
+        self._queries = {}
+        self._stats = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(connect(db_path, profile, check_same_thread=False))
+        # Never used for queries: its data_version only moves on other connections' commits
+        self._monitor = connect(db_path, profile, check_same_thread=False)
+        self._data_version = self._read_data_version()
+        self.invalidations = 0
+        for name, sql in (queries or {}).items():
+            self.register(name, sql)
+
+    def register(self, name, sql):
+        """Register a query under a name; bind its values with run(name, params)."""
+        with self._lock:
+            self._queries[name] = sql
+            self._stats.setdefault(name, _QueryStats())
+            # A re-registered query must not answer from results of its old SQL
+            for key in [key for key in self._cache if key[0] == name]:
+                del self._cache[key]
+
+    @property
+    def queries(self):
+        return dict(self._queries)
+
+    def _read_data_version(self):
+        return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_data_version(self):
+        """Drop every cached result if the database changed since the last check. Call with the lock held."""
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._cache.clear()
+            self.invalidations += 1
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of a with block."""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def run(self, name, params=(), use_cache=True):
+        """Return the QueryResult of a registered query, from the cache when the database is unchanged."""
+        if name not in self._queries:
+            raise KeyError(f"Unknown query '{name}', expected one of {sorted(self._queries)}")
+        key = (name, tuple(params))
+        stats = self._stats[name]
+        with self._lock:
+            stats.calls += 1
+            if use_cache:
+                self._check_data_version()
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    stats.hits += 1
+                    return self._cache[key]
+
+        start_time = time.perf_counter()
+        with self.connection() as conn:
+            cursor = conn.execute(self._queries[name], key[1])
+            columns = tuple(description[0] for description in cursor.description or ())
+            result = QueryResult(columns, tuple(cursor.fetchall()))
+        seconds = time.perf_counter() - start_time
+
+        with self._lock:
+            stats.add_execution(seconds)
+            if use_cache and len(result.rows) <= MAX_CACHED_ROWS:
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def invalidate(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        """Overall and per-query calls, cache hit rate and execution latency."""
+        with self._lock:
+            calls = sum(stats.calls for stats in self._stats.values())
+            hits = sum(stats.hits for stats in self._stats.values())
+            return {
+                'calls': calls,
+                'hits': hits,
+                'hit_rate': hits / calls if calls else 0.0,
+                'entries': len(self._cache),
+                'invalidations': self.invalidations,
+                'queries': {name: stats.to_dict() for name, stats in self._stats.items() if stats.calls},
+            }
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+        self._monitor.close()
+
+def source_query_service(db_path=DB_PATH, **options):
+    """QueryService over etl.db with every query of db_queries.py registered."""
+    return QueryService(db_path, module_queries(db_queries), **options)
+
+def dimension_query_service(dm_db_path=DM_DB_PATH, **options):
+    """QueryService over etl_dm.db with every query of dbm_queries.py registered."""
+    return QueryService(dm_db_path, module_queries(dbm_queries), **options)
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Run a registered query through the query service.")
+    parser.add_argument('name', help="Query function name from db_queries.py or dbm_queries.py")
+    parser.add_argument('params', nargs='*', help="Values bound to the query's parameters")
+    parser.add_argument('--repeat', type=int, default=1, help="Run the query this many times and print the stats")
+    args = parser.parse_args()
+
+    service = (dimension_query_service if args.name in module_queries(dbm_queries) else source_query_service)()
+    params = [int(value) if value.lstrip('-').isdigit() else value for value in args.params]
+    for _ in range(args.repeat):
+        result = service.run(args.name, params)
+    print(result.columns)
+    for row in result.rows:
+        print(row)
+    print(json.dumps(service.stats(), indent=2))
+    service.close()
@@ -0,0 +1,27 @@
+import hashlib
+
+# Source columns derived from other columns at load time. They are copied into
+# the dimension but left out of Row_Hash, since they cannot change on their own
+DERIVED_COLUMNS = {'Order_Date_ISO', 'Order_Day'}
+
+def get_tracked_columns(source_columns):
+    """Return the source columns whose changes create a new dimension version."""
+    return [col for col in source_columns if col not in DERIVED_COLUMNS]
+
+def compute_row_hash(columns, values):
+    """
+    Fingerprint one source row over its tracked columns.
+
+    Columns are hashed by name in sorted order and NULL values are left out, so
+    adding a column (which is NULL on existing rows) does not change the hash of
+    rows that have no value for it. Integral floats hash like ints, and every
+    value is compared by its text form, matching SQLite's affinity conversions.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for column, value in sorted(zip(columns, values), key=lambda pair: pair[0]):
+        if value is None:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        digest.update(f"{column}\x1f{value}\x1e".encode('utf-8'))
+    return digest.hexdigest()
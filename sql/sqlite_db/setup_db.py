@@ -1,39 +1,90 @@
-import sqlite3
-
-# Path to SQLite database
-DB_PATH = 'sql/sqlite_db/etl.db'
-
-# Establish a connection
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-
-# Drop tables if they exist to ensure schema updates
-cursor.execute('DROP TABLE IF EXISTS Orders;')
-cursor.execute('DROP TABLE IF EXISTS Products;')
-
-# Create the Orders table with the updated schema
-cursor.execute('''
-    CREATE TABLE Orders (
-        Order_ID INTEGER PRIMARY KEY,
-        Customer_ID INTEGER,
-        Customer_Name TEXT,
-        Order_Date TEXT,
-        Product_ID INTEGER,
-        Quantity INTEGER,
-        Email TEXT
-    );
-''')
-
-# Create the Products table
-cursor.execute('''
-    CREATE TABLE Products (
-        Product_ID INTEGER PRIMARY KEY,
-        Product_Name TEXT
-    );
-''')
-
-# Commit changes and close the connection
-conn.commit()
-conn.close()
-
-print("Database and tables set up successfully.")
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.change_capture import install_change_capture, drop_change_capture
+from sql.sqlite_db.indexes import apply_indexes, apply_shard_index
+from sql.sqlite_db.load_manifest import ensure_manifest_table
+from sql.sqlite_db.ingest_rules import create_reject_table
+from sql.sqlite_db.summaries import SOURCE_SUMMARIES, create_summary_tables
+from sql.sqlite_db.connection import DB_PATH, get_connection
+
+def setup_database(db_path=DB_PATH, reset=True, shard_count=None):
+    """
+    Create the source tables. With `reset` (the default) existing tables are
+    dropped first; without it only missing tables, indexes and triggers are
+    created and loaded data is kept (see pipeline.py). `shard_count` also
+    indexes Orders for a partitioned dimension of that many shards (see
+    partitioned_dm.py), replacing the index of another shard count.
+    """
+    # Shared connection for this database (see connection.py)
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+
+    # Drop tables if they exist to ensure schema updates
+    if reset:
+        cursor.execute('DROP TABLE IF EXISTS Orders;')
+        cursor.execute('DROP TABLE IF EXISTS Products;')
+        cursor.execute('DROP TABLE IF EXISTS Load_Manifest;')
+        cursor.execute('DROP TABLE IF EXISTS Rejected_Orders;')
+        for table in SOURCE_SUMMARIES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table};')
+        drop_change_capture(conn, 'Orders')
+        drop_change_capture(conn, 'Products')
+
+    # Create the Orders table with the updated schema
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Orders (
+            Order_ID INTEGER PRIMARY KEY,
+            Customer_ID INTEGER,
+            Customer_Name TEXT,
+            Order_Date TEXT,
+            Product_ID INTEGER,
+            Quantity INTEGER,
+            Email TEXT,
+            Order_Date_ISO TEXT,  -- Order_Date parsed once at load time, NULL when invalid
+            Order_Day INTEGER     -- Days since 1970-01-01, indexed for date range checks
+        );
+    ''')
+
+    # Create the Products table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Products (
+            Product_ID INTEGER PRIMARY KEY,
+            Product_Name TEXT
+        );
+    ''')
+
+    # Rows seen, skipped, inserted and checksummed per loaded source sheet (see load_manifest.py)
+    ensure_manifest_table(conn)
+
+    # Orders rows the loader rejected, with the rules they failed (see ingest_rules.py)
+    create_reject_table(conn)
+
+    # Purchasing-pattern summaries the loader keeps up to date (see summaries.py)
+    create_summary_tables(conn, SOURCE_SUMMARIES)
+
+    # Secondary indexes for the validation queries (see indexes.py)
+    apply_indexes(conn, ['Orders', 'Products'])
+    if shard_count:
+        apply_shard_index(conn, shard_count)
+
+    # Log inserted, updated and deleted keys for incremental dimension syncs and
+    # for the validation cache's table fingerprints
+    install_change_capture(conn, 'Orders')
+    install_change_capture(conn, 'Products')
+
+    # Commit changes
+    conn.commit()
+
+    print("Database and tables set up successfully.")
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Create the source database tables.")
+    parser.add_argument('--keep', action='store_true', help="Only create missing tables, keep existing data")
+    parser.add_argument('--shards', type=int, help="Index Orders for a partitioned dimension of this many shards")
+    args = parser.parse_args()
+    setup_database(reset=not args.keep, shard_count=args.shards)
@@ -1,34 +1,80 @@
-import sqlite3
-
-# Path to SQLite database for dimension table
-DM_DB_PATH = 'sql/sqlite_db/etl_dm.db'
-
-# Establish a connection
-conn = sqlite3.connect(DM_DB_PATH)
-cursor = conn.cursor()
-cursor.execute('DROP TABLE IF EXISTS Dimension_Orders;')
-if not cursor.fetchone():
-    # Create the Dimension_Orders table
-    cursor.execute('''
-        CREATE TABLE Dimension_Orders (
-            EID INTEGER PRIMARY KEY AUTOINCREMENT,
-            Order_ID INTEGER,
-            Customer_ID INTEGER,
-            Customer_Name TEXT,
-            Order_Date TEXT,
-            Product_ID INTEGER,
-            Quantity INTEGER,
-            Email TEXT,
-            Start_Date TEXT,
-            End_Date TEXT,
-            Active TEXT,
-            FOREIGN KEY(Order_ID) REFERENCES Orders(Order_ID)  -- Optional: If you want to relate to source DB Order_ID
-        );
-    ''')
-    print("Dimension_Orders table created successfully.")
-else:
-    print("Dimension_Orders table already exists. No changes made.")
-
-# Commit changes and close the connection
-conn.commit()
-conn.close()
\ No newline at end of file
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.indexes import apply_indexes
+from sql.sqlite_db.connection import DM_DB_PATH, get_connection
+from sql.sqlite_db.fact_orders import create_fact_table
+from sql.sqlite_db.summaries import DM_SUMMARIES, create_summary_tables
+from sql.sqlite_db.archive import enable_incremental_vacuum
+from sql.sqlite_db.change_capture import clear_watermarks
+
+def setup_dimension_database(dm_db_path=DM_DB_PATH, reset=True):
+    """
+    Create the dimension tables. With `reset` (the default) existing tables are
+    dropped first; without it an existing dimension, its facts and summaries
+    are kept (see pipeline.py).
+    """
+    # Shared connection for this database (see connection.py)
+    conn = get_connection(dm_db_path)
+    cursor = conn.cursor()
+    if reset:
+        cursor.execute('DROP TABLE IF EXISTS Fact_Orders;')
+        for table in DM_SUMMARIES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table};')
+        cursor.execute('DROP TABLE IF EXISTS Dimension_Orders;')
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Dimension_Orders'")
+    if not cursor.fetchone():
+        # Pages freed by archiving are reclaimed with incremental_vacuum (see archive.py);
+        # switching the mode takes a VACUUM, cheap while the dimension is empty
+        enable_incremental_vacuum(conn)
+        # A new dimension holds none of the changes a recorded watermark covers,
+        # so the next incremental sync has to rescan the source (see create_dm.py),
+        # and version counts of a dropped dimension are rebuilt below from the new one
+        clear_watermarks(conn)
+        for table in DM_SUMMARIES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table};')
+        # Create the Dimension_Orders table
+        cursor.execute('''
+            CREATE TABLE Dimension_Orders (
+                EID INTEGER PRIMARY KEY AUTOINCREMENT,
+                Order_ID INTEGER,
+                Customer_ID INTEGER,
+                Customer_Name TEXT,
+                Order_Date TEXT,
+                Product_ID INTEGER,
+                Quantity INTEGER,
+                Email TEXT,
+                Order_Date_ISO TEXT,
+                Order_Day INTEGER,
+                Row_Hash TEXT,  -- Fingerprint of the tracked source columns (see row_hash.compute_row_hash)
+                Start_Date TEXT,
+                End_Date TEXT,
+                Active TEXT,
+                FOREIGN KEY(Order_ID) REFERENCES Orders(Order_ID)  -- Optional: If you want to relate to source DB Order_ID
+            );
+        ''')
+        print("Dimension_Orders table created successfully.")
+    else:
+        print("Dimension_Orders table already exists. No changes made.")
+
+    # Secondary indexes for the sync lookups and SCD queries (see indexes.py)
+    apply_indexes(conn, ['Dimension_Orders'])
+
+    # Order facts keyed on the dimension's EID (see fact_orders.py)
+    create_fact_table(conn)
+
+    # Version counts the dimension sync keeps up to date (see summaries.py)
+    create_summary_tables(conn, DM_SUMMARIES)
+
+    # Commit changes
+    conn.commit()
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Create the dimension database tables.")
+    parser.add_argument('--keep', action='store_true', help="Only create missing tables, keep existing data")
+    args = parser.parse_args()
+    setup_dimension_database(reset=not args.keep)
@@ -0,0 +1,207 @@
+import sys
+import os
+from collections import Counter, namedtuple
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# A summary table kept up to date from the rows added to its base table.
+# `query` aggregates the base table; its {scope} placeholder is '' for a full
+# rebuild or a condition on `key` for the rows added since a known key.
+# `upsert` is the ON CONFLICT clause that adds one aggregate row to the summary.
+SummarySpec = namedtuple('SummarySpec', ['name', 'base_table', 'key', 'columns', 'ddl', 'query', 'upsert'])
+
+SUMMARY_TABLES = {
+    # Quantity ordered per product per day; orders without a valid Order_Day are left out
+    'Summary_Product_Day': SummarySpec(
+        'Summary_Product_Day', 'Orders', 'Order_ID',
+        ('Product_ID', 'Order_Day', 'Orders', 'Quantity'),
+        '''
+            CREATE TABLE IF NOT EXISTS Summary_Product_Day (
+                Product_ID INTEGER NOT NULL,
+                Order_Day INTEGER NOT NULL,
+                Orders INTEGER NOT NULL,
+                Quantity INTEGER NOT NULL,
+                PRIMARY KEY (Product_ID, Order_Day)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            SELECT Product_ID, Order_Day, COUNT(*), IFNULL(SUM(Quantity), 0)
+            FROM Orders
+            WHERE Product_ID IS NOT NULL AND Order_Day IS NOT NULL {scope}
+            GROUP BY Product_ID, Order_Day
+        ''',
+        '''
+            ON CONFLICT (Product_ID, Order_Day) DO UPDATE SET
+                Orders = Orders + excluded.Orders,
+                Quantity = Quantity + excluded.Quantity
+        '''
+    ),
+    # Orders, total quantity and most recent order day per customer
+    'Summary_Customer_Orders': SummarySpec(
+        'Summary_Customer_Orders', 'Orders', 'Order_ID',
+        ('Customer_ID', 'Orders', 'Quantity', 'Last_Order_Day'),
+        '''
+            CREATE TABLE IF NOT EXISTS Summary_Customer_Orders (
+                Customer_ID INTEGER PRIMARY KEY,
+                Orders INTEGER NOT NULL,
+                Quantity INTEGER NOT NULL,
+                Last_Order_Day INTEGER      -- NULL when no order of the customer has a valid Order_Day
+            )
+        ''',
+        '''
+            SELECT Customer_ID, COUNT(*), IFNULL(SUM(Quantity), 0), MAX(Order_Day)
+            FROM Orders
+            WHERE Customer_ID IS NOT NULL {scope}
+            GROUP BY Customer_ID
+        ''',
+        '''
+            ON CONFLICT (Customer_ID) DO UPDATE SET
+                Orders = Orders + excluded.Orders,
+                Quantity = Quantity + excluded.Quantity,
+                Last_Order_Day = COALESCE(MAX(Last_Order_Day, excluded.Last_Order_Day),
+                                          Last_Order_Day, excluded.Last_Order_Day)
+        '''
+    ),
+    # Active and expired versions per customer still in Dimension_Orders (archive.py removes archived ones)
+    'Summary_Customer_Versions': SummarySpec(
+        'Summary_Customer_Versions', 'Dimension_Orders', 'EID',
+        ('Customer_ID', 'Active_Versions', 'Expired_Versions'),
+        '''
+            CREATE TABLE IF NOT EXISTS Summary_Customer_Versions (
+                Customer_ID INTEGER PRIMARY KEY,
+                Active_Versions INTEGER NOT NULL,
+                Expired_Versions INTEGER NOT NULL
+            )
+        ''',
+        '''
+            SELECT Customer_ID, SUM(Active = 'Y'), SUM(Active <> 'Y')
+            FROM Dimension_Orders
+            WHERE Customer_ID IS NOT NULL {scope}
+            GROUP BY Customer_ID
+        ''',
+        '''
+            ON CONFLICT (Customer_ID) DO UPDATE SET
+                Active_Versions = Active_Versions + excluded.Active_Versions,
+                Expired_Versions = Expired_Versions + excluded.Expired_Versions
+        '''
+    ),
+}
+
+# Summaries of the source database (maintained by the loader) and of the
+# dimension database (maintained by the dimension sync)
+SOURCE_SUMMARIES = ('Summary_Product_Day', 'Summary_Customer_Orders')
+DM_SUMMARIES = ('Summary_Customer_Versions',)
+
+def _insert_sql(spec, scope=""):
+    query = spec.query.format(scope=scope)
+    return f"INSERT INTO {spec.name} ({', '.join(spec.columns)}) {query} {spec.upsert}"
+
+def create_summary_tables(conn, tables):
+    """
+    Create the given summary tables if the database does not have them yet.
+
+    A table created next to a base table that already has rows is filled with
+    a rebuild, so the increments applied from then on start from the right
+    totals. Summaries whose base table is missing from the database are
+    skipped. Returns the names of the tables created. Commit is left to the caller.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    created = []
+    for table in tables:
+        spec = SUMMARY_TABLES[table]
+        if table in existing or spec.base_table not in existing:
+            continue
+        conn.execute(spec.ddl)
+        created.append(table)
+    rebuild_summaries(conn, created)
+    return created
+
+def add_new_rows(conn, tables, after_key):
+    """
+    Add the base table rows whose key is above `after_key` to the given summaries.
+
+    The loader calls this after each Orders batch (keys above the batch's
+    first Order_ID - 1) and the sync after inserting versions (EIDs above the
+    largest before the sync). One grouped upsert per summary, reading only the
+    new rows through the base table's primary key.
+    """
+    for table in tables:
+        spec = SUMMARY_TABLES[table]
+        conn.execute(_insert_sql(spec, f"AND {spec.key} > ?"), (after_key,))
+
+def add_expired_versions(conn, customer_ids):
+    """Move the versions the sync expired (one Customer_ID per version) from active to expired."""
+    expired = Counter(customer_id for customer_id in customer_ids if customer_id is not None)
+    spec = SUMMARY_TABLES['Summary_Customer_Versions']
+    conn.executemany(
+        f"INSERT INTO {spec.name} ({', '.join(spec.columns)}) VALUES (?, ?, ?) {spec.upsert}",
+        [(customer_id, -count, count) for customer_id, count in expired.items()]
+    )
+
+def remove_archived_versions(conn, customer_ids):
+    """Drop versions moved to the archive (one Customer_ID per version) from the expired counts."""
+    archived = Counter(customer_id for customer_id in customer_ids if customer_id is not None)
+    conn.executemany('''
+        UPDATE Summary_Customer_Versions SET Expired_Versions = Expired_Versions - ?
+        WHERE Customer_ID = ?
+    ''', [(count, customer_id) for customer_id, count in archived.items()])
+    # A customer with no versions left has no row in a rebuild either
+    conn.executemany('''
+        DELETE FROM Summary_Customer_Versions
+        WHERE Customer_ID = ? AND Active_Versions = 0 AND Expired_Versions = 0
+    ''', [(customer_id,) for customer_id in archived])
+
+def last_key(conn, table):
+    """Largest key of a summary's base table (0 when empty), the `after_key` for the rows added next."""
+    spec = SUMMARY_TABLES[table]
+    return conn.execute(f"SELECT IFNULL(MAX({spec.key}), 0) FROM {spec.base_table}").fetchone()[0]
+
+def rebuild_summaries(conn, tables):
+    """Recompute the given summaries from their base tables. Commit is left to the caller."""
+    for table in tables:
+        spec = SUMMARY_TABLES[table]
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(_insert_sql(spec))
+
+def check_summaries(conn, tables):
+    """
+    Compare the given summaries with a full recomputation from their base tables.
+
+    Returns {table: number of summary rows that are missing, extra or different}.
+    0 means the incrementally maintained table matches a rebuild. Base table
+    changes made outside the loader and the sync show up here. Works on a
+    read-only connection.
+    """
+    results = {}
+    for table in tables:
+        spec = SUMMARY_TABLES[table]
+        stored = f"SELECT {', '.join(spec.columns)} FROM {table}"
+        rebuilt = spec.query.format(scope="")
+        results[table] = conn.execute(f'''
+            SELECT COUNT(*) FROM (
+                SELECT * FROM ({stored} EXCEPT {rebuilt})
+                UNION ALL
+                SELECT * FROM ({rebuilt} EXCEPT {stored})
+            )
+        ''').fetchone()[0]
+    return results
+
+if __name__ == '__main__':
+    import argparse
+    from sql.sqlite_db.connection import DB_PATH, DM_DB_PATH, get_connection
+    parser = argparse.ArgumentParser(description="Check or rebuild the summary tables.")
+    parser.add_argument('--rebuild', action='store_true', help="Recompute every summary from its base table")
+    args = parser.parse_args()
+
+    inconsistent = False
+    for db_path, tables in ((DB_PATH, SOURCE_SUMMARIES), (DM_DB_PATH, DM_SUMMARIES)):
+        conn = get_connection(db_path)
+        with conn:
+            create_summary_tables(conn, tables)
+            if args.rebuild:
+                rebuild_summaries(conn, tables)
+        for table, mismatched in check_summaries(conn, tables).items():
+            print(f"{table}: {'consistent' if not mismatched else f'{mismatched} rows differ from a rebuild'}")
+            inconsistent = inconsistent or bool(mismatched)
+    sys.exit(1 if inconsistent else 0)
@@ -0,0 +1,204 @@
+import sys
+import os
+from collections import namedtuple
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db import db_queries
+from sql.sqlite_db.change_capture import table_fingerprint
+from sql.sqlite_db.instrumentation import current_recorder
+
+# Number of offending rows kept per rule by default
+SAMPLE_SIZE = 10
+
+# A registered data-quality rule.
+#   kind 'row':   `predicate` flags each offending row; `columns` are sampled from it.
+#   kind 'group': rows sharing `columns` must be unique; one violation per duplicated group.
+#   query:        the equivalent standalone query in db_queries.py
+#   reads:        other tables the predicate reads, for result caching
+ValidationRule = namedtuple('ValidationRule', ['name', 'table', 'kind', 'predicate', 'columns', 'query', 'reads'],
+                            defaults=((),))
+
+# Outcome of one rule: exact violation count and up to SAMPLE_SIZE offending rows (dicts)
+ValidationResult = namedtuple('ValidationResult', ['rule', 'count', 'sample'])
+
+RULES = [
+    ValidationRule('customer_id_unique', 'Orders', 'group', None,
+                   ('Customer_ID', 'Order_Date'), db_queries.validate_customer_id_unique),
+    ValidationRule('order_date_format', 'Orders', 'row', db_queries.INVALID_ORDER_DATE_FORMAT,
+                   ('Order_ID', 'Order_Date'), db_queries.validate_order_date_format),
+    ValidationRule('negative_quantity', 'Orders', 'row', db_queries.NEGATIVE_QUANTITY,
+                   ('Order_ID', 'Customer_ID', 'Product_ID', 'Quantity'), db_queries.get_orders_with_negative_quantity),
+    ValidationRule('missing_customer_name', 'Orders', 'row', db_queries.MISSING_CUSTOMER_NAME,
+                   ('Order_ID', 'Customer_ID', 'Customer_Name', 'Product_ID', 'Quantity'),
+                   db_queries.get_orders_with_missing_customer_name),
+    ValidationRule('duplicate_product_id', 'Orders', 'group', None,
+                   ('Product_ID',), db_queries.get_orders_with_duplicate_product_id),
+    ValidationRule('invalid_email', 'Orders', 'row', db_queries.INVALID_EMAIL,
+                   ('Order_ID', 'Customer_ID', 'Email'), db_queries.get_invalid_email_customers),
+    ValidationRule('order_date_range', 'Orders', 'row', db_queries.ORDER_DATE_OUT_OF_RANGE,
+                   ('Order_ID', 'Order_Date'), db_queries.get_orders_with_invalid_date_range),
+    ValidationRule('invalid_product_reference', 'Orders', 'row', db_queries.INVALID_PRODUCT_REFERENCE,
+                   ('Order_ID', 'Product_ID'), db_queries.get_invalid_product_references, ('Products',)),
+    ValidationRule('null_product_name', 'Products', 'row', db_queries.NULL_PRODUCT_NAME,
+                   ('Product_ID', 'Product_Name'), db_queries.get_orders_with_null_product_name),
+]
+
+def get_rules(names=None):
+    """Return the registered rules, optionally restricted to the given rule names."""
+    if names is None:
+        return list(RULES)
+    rules = {rule.name: rule for rule in RULES}
+    unknown = set(names) - set(rules)
+    if unknown:
+        raise ValueError(f"Unknown validation rules: {sorted(unknown)}")
+    return [rules[name] for name in names]
+
+def compile_table_scan(table, rules):
+    """
+    Compile every rule on one table into a single SELECT.
+
+    Each row rule becomes a 0/1 flag column (CASE WHEN predicate). Each group
+    rule becomes a COUNT(*) and a ROW_NUMBER() window over its columns, so
+    duplicate checks are answered by the same pass over the table instead of a
+    separate GROUP BY. Only rows that violate at least one rule are returned,
+    in rowid order (the Order_ID / Product_ID key), so the sampled rows are the
+    same on every run whatever order the scan visits the table in.
+    Returns (sql, selected_columns); the last selected value is the rowid.
+    """
+    columns = []
+    for rule in rules:
+        for column in rule.columns:
+            if column not in columns:
+                columns.append(column)
+
+    expressions = []
+    conditions = []
+    for index, rule in enumerate(rules):
+        if rule.kind == 'row':
+            expressions.append(f"CASE WHEN ({rule.predicate}) THEN 1 ELSE 0 END AS rule_{index}")
+            conditions.append(f"rule_{index} = 1")
+        else:
+            partition = ", ".join(rule.columns)
+            expressions.append(f"COUNT(*) OVER (PARTITION BY {partition}) AS rule_{index}")
+            expressions.append(f"ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY rowid) AS rank_{index}")
+            conditions.append(f"(rule_{index} > 1 AND rank_{index} = 1)")
+
+    sql = f"""
+        SELECT * FROM (
+            SELECT {", ".join(columns + expressions)}, rowid AS scan_key
+            FROM {table}
+        )
+        WHERE {" OR ".join(conditions)}
+        ORDER BY scan_key
+    """
+    return sql, columns
+
+def scan_table(conn, table, rules, sample_size=SAMPLE_SIZE):
+    """Run the compiled scan for one table and count/sample violations per rule."""
+    sql, columns = compile_table_scan(table, rules)
+    counts = [0] * len(rules)
+    samples = [[] for _ in rules]
+    column_count = len(columns)
+
+    flagged_rows = 0
+    cursor = conn.execute(sql)
+    for row in cursor:
+        flagged_rows += 1
+        values = dict(zip(columns, row[:column_count]))
+        flags = row[column_count:-1]
+        position = 0
+        for index, rule in enumerate(rules):
+            if rule.kind == 'row':
+                violated = flags[position] == 1
+                position += 1
+            else:
+                violated = flags[position] > 1 and flags[position + 1] == 1
+                position += 2
+            if not violated:
+                continue
+            counts[index] += 1
+            if len(samples[index]) < sample_size:
+                sample = {column: values[column] for column in rule.columns}
+                if rule.kind == 'group':
+                    sample['Count'] = flags[position - 2]
+                samples[index].append(sample)
+    current_recorder().add(f'validate.scan.{table}', rows_out=flagged_rows)
+
+    return {
+        rule.name: ValidationResult(rule.name, counts[index], samples[index])
+        for index, rule in enumerate(rules)
+    }
+
+def rule_cache_key(conn, cache, rule, sample_size, fingerprints):
+    """Cache key of a rule: its SQL text plus the current fingerprints of the tables it reads."""
+    tables = sorted({rule.table, *rule.reads})
+    for table in tables:
+        if table not in fingerprints:
+            fingerprints[table] = table_fingerprint(conn, table)
+    sql = f"{rule.query()}\n{rule.predicate}\n{rule.columns}\nsample={sample_size} in rowid order"
+    return cache.make_key(sql, [[table, fingerprints[table]] for table in tables])
+
+def run_validation(conn, rule_names=None, sample_size=SAMPLE_SIZE, cache=None):
+    """
+    Validate the database in one scan per table.
+
+    Returns {rule name: ValidationResult} for every selected rule. All Orders
+    rules share one pass over Orders and the Products rule one pass over
+    Products, instead of one full query per rule.
+
+    With a ValidationCache, rules whose SQL and input tables are unchanged
+    since a cached run are answered from the cache, and only the remaining
+    rules are scanned.
+    """
+    rules = get_rules(rule_names)
+    results = {}
+    keys = {}
+    fingerprints = {}
+    recorder = current_recorder()
+    if cache is not None:
+        with recorder.stage('validate.cache') as stage:
+            for rule in rules:
+                keys[rule.name] = rule_cache_key(conn, cache, rule, sample_size, fingerprints)
+                cached = cache.get(keys[rule.name])
+                if cached is not None:
+                    results[rule.name] = ValidationResult(rule.name, cached['count'], cached['sample'])
+            stage.add(rows_in=len(rules), rows_out=len(results))
+
+    pending = [rule for rule in rules if rule.name not in results]
+    tables = []
+    for rule in pending:
+        if rule.table not in tables:
+            tables.append(rule.table)
+    for table in tables:
+        with recorder.stage(f'validate.scan.{table}'):
+            scanned = scan_table(conn, table, [rule for rule in pending if rule.table == table], sample_size)
+        results.update(scanned)
+        if cache is not None:
+            for name, result in scanned.items():
+                cache.put(keys[name], name, {'count': result.count, 'sample': result.sample})
+    return {rule.name: results[rule.name] for rule in rules}
+
+if __name__ == '__main__':
+    import argparse
+    from sql.sqlite_db.connection import get_connection
+    from sql.sqlite_db.instrumentation import start_run, finish_run
+    from sql.sqlite_db.validation_cache import ValidationCache
+    parser = argparse.ArgumentParser(description="Run every validation rule in one scan per table.")
+    parser.add_argument('--cache', action='store_true', help="Reuse results of rules whose tables did not change")
+    parser.add_argument('--report', help="Write a JSON run report (stage timings and SQL statement stats)")
+    args = parser.parse_args()
+
+    if args.report:
+        start_run()
+    conn = get_connection(profile='read_only')
+    cache = ValidationCache() if args.cache else None
+    for name, result in run_validation(conn, cache=cache).items():
+        status = "PASS" if result.count == 0 else "FAIL"
+        print(f"{status} {name}: {result.count} violations {result.sample}")
+    if cache is not None:
+        print(f"Validation cache: {cache.stats()}")
+        cache.close()
+    if args.report:
+        finish_run(args.report)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sql.sqlite_db.connection import connect
+
+# Sidecar database holding cached rule results, next to etl.db
+CACHE_DB_PATH = 'sql/sqlite_db/validation_cache.db'
+# Least recently used entries beyond this many are evicted
+MAX_ENTRIES = 256
+
+class ValidationCache:
+    """
+    Persistent cache of validation rule results.
+
+    Entries are keyed on a rule's SQL text plus the fingerprints of the tables
+    it reads (see change_capture.table_fingerprint), so a result is reused only
+    while none of those tables has changed. Results live in a small sidecar
+    SQLite file rather than in etl.db, which keeps validation connections
+    read-only. The cache holds at most `max_entries` results and evicts the
+    least recently used ones.
+    """
+
+    def __init__(self, path=CACHE_DB_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.conn = connect(path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS Validation_Cache (
+                Cache_Key TEXT PRIMARY KEY,
+                Rule TEXT,
+                Result TEXT,
+                Created_At TEXT DEFAULT CURRENT_TIMESTAMP,
+                Last_Used INTEGER
+            );
+        ''')
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(sql, fingerprints):
+        """Hash a rule's SQL text and the fingerprints of the tables it reads."""
+        payload = json.dumps([sql, fingerprints], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _next_use(self):
+        return self.conn.execute('SELECT COALESCE(MAX(Last_Used), 0) + 1 FROM Validation_Cache').fetchone()[0]
+
+    def get(self, key):
+        """Return the cached result for a key (and mark it recently used), or None."""
+        row = self.conn.execute('SELECT Result FROM Validation_Cache WHERE Cache_Key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.conn:
+            self.conn.execute('UPDATE Validation_Cache SET Last_Used = ? WHERE Cache_Key = ?', (self._next_use(), key))
+        return json.loads(row[0])
+
+    def put(self, key, rule, result):
+        """Store a JSON-serialisable result and evict the least recently used overflow."""
+        with self.conn:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO Validation_Cache (Cache_Key, Rule, Result, Last_Used)
+                VALUES (?, ?, ?, ?)
+            ''', (key, rule, json.dumps(result, default=str), self._next_use()))
+            self.conn.execute('''
+                DELETE FROM Validation_Cache
+                WHERE Cache_Key NOT IN (
+                    SELECT Cache_Key FROM Validation_Cache ORDER BY Last_Used DESC LIMIT ?
+                )
+            ''', (self.max_entries,))
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute('DELETE FROM Validation_Cache')
+
+    def stats(self):
+        """Return hit/miss counts for this cache object and the number of stored entries."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self.conn.execute('SELECT COUNT(*) FROM Validation_Cache').fetchone()[0],
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,170 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_db import setup_database
+from sql.sqlite_db.setup_dm_db import setup_dimension_database
+from sql.sqlite_db.create_dm import sync_dimension_table
+from sql.sqlite_db.validation import run_validation
+from sql.sqlite_db.connection import get_connection
+from generate_data import write_dataset
+from load_data import load_data_to_db
+
+# Baseline the results are compared with and, with --save-baseline, written to
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+# A stage regresses when it is this much slower (rows/sec) or hungrier (peak RSS) than the baseline
+REGRESSION_THRESHOLD = 0.20
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _count_rows(db_path, table):
+    return get_connection(db_path, 'read_only').execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+def stage_generate(work_dir, order_count, run, mutation_rate):
+    source_path = os.path.join(work_dir, f'run_{run}')
+    write_dataset(source_path, 'csv', order_count, run=run, mutation_rate=mutation_rate)
+    return order_count
+
+def stage_load(work_dir, order_count, run, mutation_rate):
+    db_path = os.path.join(work_dir, 'etl.db')
+    setup_database(db_path)
+    result = load_data_to_db(os.path.join(work_dir, f'run_{run}'), db_path)
+    return result['products'] + result['orders']
+
+def stage_sync(work_dir, order_count, run, mutation_rate):
+    db_path = os.path.join(work_dir, 'etl.db')
+    dm_db_path = os.path.join(work_dir, 'etl_dm.db')
+    if run == 0:
+        setup_dimension_database(dm_db_path)
+    sync_dimension_table(db_path, dm_db_path)
+    return _count_rows(db_path, 'Orders')
+
+def stage_validate(work_dir, order_count, run, mutation_rate):
+    db_path = os.path.join(work_dir, 'etl.db')
+    run_validation(get_connection(db_path, 'read_only'))
+    return _count_rows(db_path, 'Orders') + _count_rows(db_path, 'Products')
+
+STAGE_FUNCTIONS = {
+    'generate': stage_generate,
+    'load': stage_load,
+    'sync': stage_sync,
+    'validate': stage_validate,
+}
+
+# (name in the report, stage, run): load and sync run 0, then reload a mutated
+# run 1 so the second sync expires and re-inserts the changed versions
+STAGES = [
+    ('generate', 'generate', 0),
+    ('load', 'load', 0),
+    ('sync_initial', 'sync', 0),
+    ('generate_changes', 'generate', 1),
+    ('reload', 'load', 1),
+    ('sync_changes', 'sync', 1),
+    ('validate', 'validate', 1),
+]
+
+def _run_stage(stage, args, result_queue):
+    """Child process: run one stage and report its row count, duration and peak memory."""
+    try:
+        start_time = time.perf_counter()
+        rows = STAGE_FUNCTIONS[stage](*args)
+        seconds = time.perf_counter() - start_time
+        result_queue.put(('ok', rows, seconds, _peak_rss_mb()))
+    except Exception as error:
+        result_queue.put(('error', repr(error), None, None))
+
+def run_stage(stage, *args):
+    """
+    Run a stage in a fresh process so its peak RSS is its own, not the
+    high-water mark of every stage before it.
+    """
+    context = multiprocessing.get_context('spawn')
+    result_queue = context.Queue()
+    process = context.Process(target=_run_stage, args=(stage, args, result_queue))
+    process.start()
+    status, rows, seconds, peak_mb = result_queue.get()
+    process.join()
+    if status != 'ok':
+        raise RuntimeError(f"Benchmark stage {stage} failed: {rows}")
+    return {
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else float('inf'),
+        'peak_rss_mb': peak_mb,
+    }
+
+def run_benchmark(order_count, work_dir, mutation_rate=0.05):
+    """Run every stage on a generated dataset of `order_count` orders and return the per-stage results."""
+    results = {}
+    for name, stage, run in STAGES:
+        results[name] = run_stage(stage, work_dir, order_count, run, mutation_rate)
+        print(f"{name:<18}{results[name]['rows']:>12}{results[name]['seconds']:>10.2f}"
+              f"{results[name]['rows_per_second']:>14,.0f}{results[name]['peak_rss_mb']:>10.1f}")
+    return results
+
+def find_regressions(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Return a message for every stage slower or using more memory than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['rows_per_second'] < expected['rows_per_second'] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['rows_per_second']:,.0f} rows/sec, baseline {expected['rows_per_second']:,.0f}"
+            )
+        if result['peak_rss_mb'] > expected['peak_rss_mb'] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak {result['peak_rss_mb']:.1f} MB, baseline {expected['peak_rss_mb']:.1f} MB"
+            )
+    return regressions
+
+def load_baseline(path, order_count):
+    """Stage results recorded for this dataset size, or {} when there are none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file).get(str(order_count), {})
+
+def save_baseline(path, order_count, results):
+    """Record results as the baseline for this dataset size (other sizes are kept)."""
+    baselines = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as baseline_file:
+            baselines = json.load(baseline_file)
+    baselines[str(order_count)] = results
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time load, sync and validation on generated data.")
+    parser.add_argument('--rows', type=int, default=100000, help="Number of generated Orders rows")
+    parser.add_argument('--mutation-rate', type=float, default=0.05, help="Fraction of rows changed for the resync")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="JSON baseline to compare with")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help="Allowed slowdown (0.2 = 20%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="Record this run as the new baseline")
+    args = parser.parse_args()
+
+    print(f"{'Stage':<18}{'Rows':>12}{'Seconds':>10}{'Rows/sec':>14}{'Peak MB':>10}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_benchmark(args.rows, work_dir, args.mutation_rate)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, args.rows, results)
+        print(f"Baseline for {args.rows} rows saved to {args.baseline}")
+    else:
+        regressions = find_regressions(results, load_baseline(args.baseline, args.rows), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,93 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime
+from openpyxl import Workbook
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_db import setup_database
+from load_data import SHEET_COLUMNS, load_data_to_db
+
+def synthetic_rows(order_count, product_count=100, seed=42):
+    """Build the same seeded Products and Orders rows for every format."""
+    rng = random.Random(seed)
+    products = [(product_id, f'Widget {product_id}') for product_id in range(1, product_count + 1)]
+    orders = [
+        (
+            rng.randint(1000, 99999),
+            f'Customer {i}',
+            datetime(2024, 12, rng.randint(1, 31)),
+            rng.randint(1, product_count),
+            rng.randint(1, 20),
+            f'customer{i}@example.com',
+        )
+        for i in range(order_count)
+    ]
+    return {'Products': products, 'Orders': orders}
+
+def text_value(value):
+    """Write datetimes the way the loader stores them (dd/mm/YYYY)."""
+    return value.strftime('%d/%m/%Y') if isinstance(value, datetime) else value
+
+def write_xlsx(path, sheets):
+    wb = Workbook(write_only=True)
+    for sheet_name, rows in sheets.items():
+        sheet = wb.create_sheet(sheet_name)
+        sheet.append(SHEET_COLUMNS[sheet_name])
+        for row in rows:
+            sheet.append(row)
+    wb.save(path)
+
+def write_csv(export_dir, sheets):
+    os.makedirs(export_dir, exist_ok=True)
+    for sheet_name, rows in sheets.items():
+        with open(os.path.join(export_dir, f'{sheet_name}.csv'), 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(SHEET_COLUMNS[sheet_name])
+            writer.writerows([text_value(value) for value in row] for row in rows)
+
+def write_jsonl(export_dir, sheets):
+    os.makedirs(export_dir, exist_ok=True)
+    for sheet_name, rows in sheets.items():
+        columns = SHEET_COLUMNS[sheet_name]
+        with open(os.path.join(export_dir, f'{sheet_name}.jsonl'), 'w', encoding='utf-8') as jsonl_file:
+            for row in rows:
+                jsonl_file.write(json.dumps(dict(zip(columns, map(text_value, row)))) + '\n')
+
+WRITERS = {
+    'xlsx': (write_xlsx, 'orders.xlsx'),
+    'csv': (write_csv, 'csv_export'),
+    'jsonl': (write_jsonl, 'jsonl_export'),
+}
+
+def run_benchmark(order_count, work_dir):
+    """Load the same synthetic dataset from every format and return rows/sec per format."""
+    sheets = synthetic_rows(order_count)
+    results = {}
+    for source_format, (write, name) in WRITERS.items():
+        source_path = os.path.join(work_dir, name)
+        write(source_path, sheets)
+
+        db_path = os.path.join(work_dir, f'etl_{source_format}.db')
+        setup_database(db_path)
+        results[source_format] = load_data_to_db(source_path, db_path)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare loader throughput for xlsx, csv and jsonl sources.")
+    parser.add_argument('--rows', type=int, default=100000, help="Number of synthetic Orders rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_benchmark(args.rows, work_dir)
+
+    print(f"\n{'Format':<8}{'Rows':>12}{'Seconds':>10}{'Rows/sec':>14}")
+    for source_format, result in results.items():
+        rows = result['products'] + result['orders']
+        print(f"{source_format:<8}{rows:>12}{result['seconds']:>10.2f}{result['rows_per_second']:>14,.0f}")
@@ -0,0 +1,78 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_db import setup_database
+from sql.sqlite_db.setup_dm_db import setup_dimension_database
+
+# Source orders the dimension tests start from:
+# (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email)
+ORDERS = [
+    (1234, 'John Doe', '1/12/2024', 567, 2, 'john.doe@example.com'),
+    (5678, 'Jane Smith', '20/12/2024', 789, 10, 'jane.smith@example.com'),
+    (1111, None, '3/12/2024', 123, 4, None),
+]
+
+# Products of the source; Product_ID 123 of the third order is not one of them
+PRODUCTS = [(567, 'Widget A'), (789, 'Widget B')]
+
+# Dimension history the history and query tests start from:
+# (Order_ID, Customer_ID, Quantity, Start_Date, End_Date, Active)
+VERSIONS = [
+    (1, 1234, 2, '2024-12-01', '2024-12-05', 'N'),
+    (1, 1234, 3, '2024-12-05', '2024-12-05', 'N'),   # replaced the same day
+    (1, 1234, 4, '2024-12-05', '9999-12-31', 'Y'),
+    (2, 5678, 10, '2024-12-01', '9999-12-31', 'Y'),
+    (3, 1111, 4, '2024-12-01', '2024-12-10', 'N'),   # deleted from the source
+    (4, 2222, 1, '2024-12-08', '9999-12-31', 'Y'),
+]
+
+def run_sql(db_path, *queries):
+    """Run statements on a database in one transaction, on a connection of their own."""
+    conn = sqlite3.connect(db_path)
+    for query in queries:
+        conn.execute(query)
+    conn.commit()
+    conn.close()
+
+def insert_orders(db_path, rows=ORDERS):
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''
+        INSERT INTO Orders (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+def insert_products(db_path, rows=PRODUCTS):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO Products (Product_ID, Product_Name) VALUES (?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+def insert_versions(dm_db_path, versions=VERSIONS):
+    conn = sqlite3.connect(dm_db_path)
+    conn.executemany('''
+        INSERT INTO Dimension_Orders (Order_ID, Customer_ID, Quantity, Start_Date, End_Date, Active)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', versions)
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def source_db_path(tmp_path):
+    """Path of an empty source database (etl.db schema) in the test's directory."""
+    source_db_path = str(tmp_path / "etl.db")
+    setup_database(source_db_path)
+    return source_db_path
+
+@pytest.fixture
+def dm_db_path(tmp_path):
+    """Path of an empty dimension database (etl_dm.db schema) in the test's directory."""
+    dm_db_path = str(tmp_path / "etl_dm.db")
+    setup_dimension_database(dm_db_path)
+    return dm_db_path
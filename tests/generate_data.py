@@ -0,0 +1,110 @@
+import argparse
+import os
+import random
+import sys
+from datetime import datetime
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmark_load_formats import WRITERS
+
+# Defects the data-quality tests look for, injected in this rotation
+DEFECT_TYPES = [
+    'duplicate_customer_order_date',   # same Customer_ID and Order_Date as the previous order
+    'invalid_date_format',
+    'missing_customer_name',
+    'negative_quantity',
+    'invalid_email',
+    'out_of_range_date',
+    'invalid_product_reference',
+]
+# Largest sheet an .xlsx workbook can hold (header row excluded)
+XLSX_MAX_ROWS = 1048575
+
+def generate_products(product_count, defect_rate=0.01):
+    """Products 1..product_count; with defects enabled the last one has no Product_Name."""
+    products = [(product_id, f'Widget {product_id}') for product_id in range(1, product_count + 1)]
+    if defect_rate and products:
+        products[-1] = (product_count, None)
+    return products
+
+def generate_orders(order_count, product_count=1000, seed=42, defect_rate=0.01, run=0, mutation_rate=0.0):
+    """
+    Yield seeded Orders rows (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email).
+
+    Rows are generated one at a time, so any scale can be written without
+    holding the dataset in memory. The same seed always gives the same rows,
+    and the loader gives row i Order_ID i + 1, so runs can be compared.
+
+    Every round(1 / defect_rate)-th row carries one defect from DEFECT_TYPES,
+    in rotation. For `run` > 0 a `mutation_rate` fraction of the rows gets a
+    different Quantity than in run 0 (chosen per run), so syncing run N after
+    run N - 1 expires and re-inserts those versions.
+    """
+    rng = random.Random(seed)
+    mutation_rng = random.Random(f"{seed}:{run}")
+    defect_every = round(1 / defect_rate) if defect_rate else 0
+    previous = None
+
+    for i in range(order_count):
+        customer_id = 100000 + i
+        order_date = datetime(2024, 12, rng.randint(1, 31))
+        product_id = rng.randint(1, product_count)
+        quantity = rng.randint(1, 20)
+        customer_name = f'Customer {i}'
+        email = f'customer{i}@example.com'
+
+        if run and mutation_rng.random() < mutation_rate:
+            quantity += run
+
+        if defect_every and i % defect_every == defect_every - 1:
+            defect = DEFECT_TYPES[(i // defect_every) % len(DEFECT_TYPES)]
+            if defect == 'duplicate_customer_order_date' and previous is not None:
+                customer_id, order_date = previous[0], previous[2]
+            elif defect == 'invalid_date_format':
+                order_date = '2024-13-01'
+            elif defect == 'missing_customer_name':
+                customer_name = None
+            elif defect == 'negative_quantity':
+                quantity = -quantity
+            elif defect == 'invalid_email':
+                email = f'customer{i}.example.com'
+            elif defect == 'out_of_range_date':
+                order_date = datetime(2023, 12, order_date.day)
+            elif defect == 'invalid_product_reference':
+                product_id = product_count + 999
+
+        previous = (customer_id, customer_name, order_date, product_id, quantity, email)
+        yield previous
+
+def generate_dataset(order_count, product_count=1000, seed=42, defect_rate=0.01, run=0, mutation_rate=0.0):
+    """Return the Products list and a lazy Orders iterator, keyed by sheet name like the loader."""
+    return {
+        'Products': generate_products(product_count, defect_rate),
+        'Orders': generate_orders(order_count, product_count, seed, defect_rate, run, mutation_rate),
+    }
+
+def write_dataset(path, source_format, order_count, **options):
+    """Write a generated dataset in one of the loader's formats (xlsx, csv, jsonl)."""
+    if source_format == 'xlsx' and order_count > XLSX_MAX_ROWS:
+        raise ValueError(f"An .xlsx sheet holds at most {XLSX_MAX_ROWS} rows, use csv or jsonl for {order_count}")
+    write, _ = WRITERS[source_format]
+    write(path, generate_dataset(order_count, **options))
+    return path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic Orders/Products dataset.")
+    parser.add_argument('path', help="Workbook path (xlsx) or export directory (csv, jsonl)")
+    parser.add_argument('--rows', type=int, default=100000, help="Number of Orders rows (1k to 10M)")
+    parser.add_argument('--products', type=int, default=1000, help="Number of Products rows")
+    parser.add_argument('--format', choices=sorted(WRITERS), default='csv', dest='source_format')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--defect-rate', type=float, default=0.01, help="Fraction of orders carrying a defect")
+    parser.add_argument('--run', type=int, default=0, help="Run number; runs after 0 mutate some rows")
+    parser.add_argument('--mutation-rate', type=float, default=0.05, help="Fraction of rows changed per run")
+    args = parser.parse_args()
+
+    write_dataset(args.path, args.source_format, args.rows, product_count=args.products, seed=args.seed,
+                  defect_rate=args.defect_rate, run=args.run, mutation_rate=args.mutation_rate)
+    print(f"Wrote {args.rows} orders ({args.source_format}, run {args.run}) to {args.path}")
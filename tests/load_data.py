@@ -1,69 +1,548 @@
-import sqlite3
 import os
+import glob
+import time
+import argparse
+import multiprocessing
+import pickle
+import queue as queue_module
+import tempfile
+import traceback
+import csv
+import json
+from collections import Counter
+from itertools import islice
+import sys
 from openpyxl import load_workbook
 from datetime import datetime
 
-# Path to the SQLite database
-DB_PATH = 'sql/sqlite_db/etl.db'
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.order_dates import parse_order_date
+from sql.sqlite_db.connection import DB_PATH, get_connection, close_connections
+from sql.sqlite_db.instrumentation import current_recorder, start_run, finish_run
+from sql.sqlite_db.load_manifest import LoadManifest, ensure_manifest_table
+from sql.sqlite_db.ingest_rules import OrderRowChecker, create_reject_table, write_rejects
+from sql.sqlite_db.summaries import SOURCE_SUMMARIES, add_new_rows, create_summary_tables, last_key
+
 # Path to the Excel file (dynamically resolve the absolute path)
 EXCEL_FILE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../orders_test_data.xlsx'))
+# Number of rows buffered per executemany call
+BATCH_SIZE = 5000
+# Workbooks picked up when a directory is given to load_workbooks_to_db
+WORKBOOK_PATTERN = 'orders_*.xlsx'
 
-def load_data_to_db():
-    # Load the workbook and the 'Products' and 'Orders' sheets
-    wb = load_workbook(EXCEL_FILE_PATH)
+INSERT_PRODUCTS_QUERY = '''
+    INSERT OR IGNORE INTO Products (Product_ID, Product_Name)
+    VALUES (?, ?)
+'''
+INSERT_ORDERS_QUERY = '''
+    INSERT INTO Orders (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email, Order_Date_ISO, Order_Day)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
 
-    # Access the 'Products' and 'Orders' sheets
-    products_sheet = wb['Products']
-    orders_sheet = wb['Orders']
+def is_empty_row(row):
+    """Check if the row is empty (all fields are empty or None)."""
+    return all(cell is None or cell == '' for cell in row)
 
-    # Establish a database connection
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def normalise_product_row(row):
+    """Return the (Product_ID, Product_Name) values to insert, or the reason (a string) to skip the row."""
+    if is_empty_row(row):
+        return 'empty_row'
+    row = tuple(row) + (None,) * (2 - len(row))
+    return row[0], row[1]
+
+def normalise_order_row(row):
+    """
+    Return the Orders values for one sheet row, or the reason (a string) to skip an empty row.
+    Rows missing required values are returned too; the loader's rule check rejects them.
+    """
+    if is_empty_row(row):
+        return 'empty_row'  # Skip the row if it's empty
+    row = tuple(row) + (None,) * (6 - len(row))
+
+    customer_id = row[0]
+    customer_name = row[1]
+    order_date = row[2]  # Order_Date is assumed to be in the third column (index 2)
+    product_id = row[3]
+    quantity = row[4]
+    email = row[5]
+
+    # Ensure that 'Order_Date' stays as a string, not a date object
+    if isinstance(order_date, str):
+        # If the order_date is in string format (like '12/01/2024'), keep it as is
+        order_date = order_date.strip()  # Remove leading/trailing whitespace and newlines
+    elif isinstance(order_date, datetime):
+        # If the order_date is a datetime object, convert it to string
+        order_date = order_date.strftime('%d/%m/%Y') if order_date else None
+    else:
+        order_date = None  # Set to None if the date format is invalid
+
+    # Parse the date once: canonical ISO date and day number for indexed range queries
+    order_date_iso, order_day = parse_order_date(order_date)
+
+    return customer_id, customer_name, order_date, product_id, quantity, email, order_date_iso, order_day
 
-    # Insert data into Products table
-    for row in products_sheet.iter_rows(min_row=2, values_only=True):
-        cursor.execute('''
-            INSERT OR IGNORE INTO Products (Product_ID, Product_Name) 
-            VALUES (?, ?)
-        ''', (row[0], row[1]))
-
-    # Insert data into Orders table
-    for row in orders_sheet.iter_rows(min_row=2, values_only=True):
-        # Check if the row is empty (all fields are empty or None)
-        if all(cell is None or cell == '' for cell in row):
-            continue  # Skip the row if it's empty
-
-        customer_id = row[0]
-        customer_name = row[1]
-        order_date = row[2]  # Order_Date is assumed to be in the third column (index 2)
-        product_id = row[3]
-        quantity = row[4]
-        email = row[5]
-
-        # Ensure that 'Order_Date' stays as a string, not a date object
-        if isinstance(order_date, str):
-            # If the order_date is in string format (like '12/01/2024'), keep it as is
-            order_date = order_date.strip()  # Remove leading/trailing whitespace and newlines
-        elif isinstance(order_date, datetime):
-            # If the order_date is a datetime object, convert it to string
-            order_date = order_date.strftime('%d/%m/%Y') if order_date else None
+def iter_normalised_rows(rows, normalise, stage_name=None, manifest_sheet=None):
+    """
+    Apply a normalise function to sheet rows, dropping the rows it skips.
+    With a stage name, rows read and skipped are added to that stage once the sheet is done,
+    and with a manifest sheet (see load_manifest.py) so are the skip reasons.
+    """
+    rows_in = rows_out = 0
+    skip_reasons = Counter()
+    for row in rows:
+        rows_in += 1
+        values = normalise(row)
+        if isinstance(values, str):
+            skip_reasons[values] += 1
         else:
-            order_date = None  # Set to None if the date format is invalid
+            rows_out += 1
+            yield values
+    if stage_name:
+        current_recorder().add(stage_name, rows_in=rows_in, rows_out=rows_out, rows_rejected=rows_in - rows_out)
+    if manifest_sheet is not None:
+        manifest_sheet.add_parsed(rows_in, skip_reasons)
+
+def iter_batches(rows, batch_size=BATCH_SIZE):
+    """Group an iterable of rows into lists of at most batch_size rows."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+# Sheets loaded from every source, in load order, with their column layout
+SHEET_COLUMNS = {
+    'Products': ('Product_ID', 'Product_Name'),
+    'Orders': ('Customer_ID', 'Customer_Name', 'Order_Date', 'Product_ID', 'Quantity', 'Email'),
+}
+
+def read_xlsx_sheets(excel_file_path):
+    """
+    Yield (sheet_name, rows) for the 'Products' and 'Orders' sheets of a workbook.
+
+    The workbook is opened read-only so rows are parsed as they are iterated
+    instead of loading the whole sheet.
+    """
+    wb = load_workbook(excel_file_path, read_only=True, data_only=True)
+    try:
+        for sheet_name in SHEET_COLUMNS:
+            yield sheet_name, wb[sheet_name].iter_rows(min_row=2, values_only=True)
+    finally:
+        # Release the workbook file handle
+        wb.close()
+
+def read_csv_sheets(export_dir):
+    """
+    Yield (sheet_name, rows) from a CSV export: Products.csv and Orders.csv in one directory.
+
+    Each file has a header row in the same column layout as the workbook sheets.
+    Empty fields are read as None, the way openpyxl returns empty cells.
+    """
+    for sheet_name in SHEET_COLUMNS:
+        with open(os.path.join(export_dir, f'{sheet_name}.csv'), newline='', encoding='utf-8') as csv_file:
+            reader = csv.reader(csv_file)
+            next(reader, None)  # Skip the header row
+            yield sheet_name, (tuple(value if value != '' else None for value in row) for row in reader)
+
+def read_jsonl_sheets(export_dir):
+    """
+    Yield (sheet_name, rows) from a JSON Lines export: Products.jsonl and Orders.jsonl in one directory.
+
+    Each line is an object keyed by column name; missing keys are read as None.
+    """
+    for sheet_name, columns in SHEET_COLUMNS.items():
+        with open(os.path.join(export_dir, f'{sheet_name}.jsonl'), encoding='utf-8') as jsonl_file:
+            records = (json.loads(line) for line in jsonl_file if line.strip())
+            yield sheet_name, (tuple(record.get(column) for column in columns) for record in records)
+
+# Readers by source format; each yields (sheet_name, rows) in SHEET_COLUMNS order
+SOURCE_READERS = {
+    'xlsx': read_xlsx_sheets,
+    'csv': read_csv_sheets,
+    'jsonl': read_jsonl_sheets,
+}
+
+def detect_source_format(source_path):
+    """Return the SOURCE_READERS key for a workbook file or an export directory."""
+    if os.path.isdir(source_path):
+        for source_format in ('csv', 'jsonl'):
+            if os.path.exists(os.path.join(source_path, f'Orders.{source_format}')):
+                return source_format
+        raise ValueError(f"No Orders.csv or Orders.jsonl export found in {source_path}")
+    extension = os.path.splitext(source_path)[1].lower().lstrip('.')
+    if extension not in SOURCE_READERS:
+        raise ValueError(f"Unsupported source format '{extension}' for {source_path}")
+    return extension
+
+# Row normalisation per sheet, shared by every source format
+ROW_NORMALISERS = {
+    'Products': normalise_product_row,
+    'Orders': normalise_order_row,
+}
+
+def iter_source_batches(source_path, batch_size=BATCH_SIZE, source_format=None, manifest=None):
+    """
+    Read a source in any supported format and yield ('Products' | 'Orders', batch)
+    pairs of normalised rows. Products batches come before Orders. Rows seen and
+    skipped per sheet are added to `manifest` (a LoadManifest) when given.
+    """
+    reader = SOURCE_READERS[source_format or detect_source_format(source_path)]
+    for sheet_name, rows in reader(source_path):
+        manifest_sheet = manifest.sheet(source_path, sheet_name) if manifest is not None else None
+        rows = iter_normalised_rows(rows, ROW_NORMALISERS[sheet_name], f'load.parse.{sheet_name}', manifest_sheet)
+        for batch in iter_batches(rows, batch_size):
+            yield sheet_name, batch
+
+INSERT_QUERIES = {
+    'Products': INSERT_PRODUCTS_QUERY,
+    'Orders': INSERT_ORDERS_QUERY,
+}
+
+# Tables a load writes to, emptied first when a load replaces the previous one
+LOADED_TABLES = ('Orders', 'Products', 'Load_Manifest', 'Rejected_Orders') + SOURCE_SUMMARIES
+
+def prepare_load(conn, replace=False):
+    """
+    Create the load's bookkeeping tables if missing and, with `replace`, delete
+    the rows of earlier loads. Run inside the load's transaction, so a failed
+    load keeps the previous data. Deleted rows go through change capture like
+    any other change, so an incremental dimension sync still sees them.
+    """
+    create_reject_table(conn)
+    create_summary_tables(conn, SOURCE_SUMMARIES)
+    if replace:
+        ensure_manifest_table(conn)
+        for table in LOADED_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+
+# Tables inserted with INSERT OR IGNORE, where a batch can lose rows to duplicate keys
+IGNORES_DUPLICATES = {'Products'}
+
+def insert_batch(cursor, table, batch):
+    """
+    Insert one batch with executemany and return the rows that were inserted.
+
+    When INSERT OR IGNORE drops duplicate keys, the batch is rolled back to a
+    savepoint and replayed row by row, so exactly the rows that landed are
+    known (for the load manifest's counts and checksum).
+    """
+    if table not in IGNORES_DUPLICATES:
+        cursor.executemany(INSERT_QUERIES[table], batch)
+        return batch
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")  # Keep the savepoint inside the load's transaction
+    cursor.execute("SAVEPOINT insert_batch")
+    cursor.executemany(INSERT_QUERIES[table], batch)
+    if cursor.rowcount < len(batch):
+        cursor.execute("ROLLBACK TO insert_batch")
+        inserted = []
+        for row in batch:
+            cursor.execute(INSERT_QUERIES[table], row)
+            if cursor.rowcount:
+                inserted.append(row)
+        batch = inserted
+    cursor.execute("RELEASE insert_batch")
+    return batch
+
+def write_batch(cursor, table, batch, checker, source, manifest=None):
+    """
+    Check, reject and insert one (table, batch) pair; returns (rows inserted, rows rejected).
+
+    Orders rows are checked against the row rules while they are in memory
+    (see ingest_rules.OrderRowChecker); failing rows go to Rejected_Orders in
+    one executemany and the rest to Orders in another. The inserted Orders
+    rows are then added to the source summary tables (see summaries.py).
+    """
+    rejected, reject_reasons = [], None
+    if table == 'Orders':
+        batch, rejected = checker.split(batch)
+        if rejected:
+            reject_reasons = write_rejects(cursor, source, rejected)
+        after_order_id = last_key(cursor.connection, 'Summary_Customer_Orders')
+    inserted = insert_batch(cursor, table, batch)
+    if table == 'Orders' and inserted:
+        add_new_rows(cursor.connection, SOURCE_SUMMARIES, after_order_id)
+    if table == 'Products':
+        checker.add_products(inserted)
+    if manifest is not None:
+        manifest.sheet(source, table).add_inserted(inserted, len(batch) - len(inserted), reject_reasons)
+    return inserted, rejected
+
+def insert_batches(cursor, batches, manifest=None, source=None, checker=None):
+    """
+    Insert (table, batch) pairs with one executemany per batch; returns rows inserted per table
+    and rows rejected (under 'Rejected_Orders'). Time spent producing the batches (reading and
+    parsing) and inserting them is recorded separately. Inserted rows are added to the `source`
+    sheets of `manifest` when given. Without a checker only the required-value rules reject rows.
+    """
+    recorder = current_recorder()
+    checker = checker or OrderRowChecker(cursor.connection)
+    counts = {table: 0 for table in INSERT_QUERIES}
+    counts['Rejected_Orders'] = 0
+    batches = iter(batches)
+    while True:
+        with recorder.stage('load.read'):
+            item = next(batches, None)
+        if item is None:
+            return counts
+        table, batch = item
+        with recorder.stage(f'load.insert.{table}') as stage:
+            inserted, rejected = write_batch(cursor, table, batch, checker, source, manifest)
+            stage.add(rows_in=len(batch), rows_out=len(inserted), rows_rejected=len(batch) - len(inserted))
+        counts[table] += len(inserted)
+        counts['Rejected_Orders'] += len(rejected)
 
-        # Skip inserting rows where required data (such as order_date or customer_id) is invalid
-        if not customer_id or not order_date:
-            continue  # Skip this row if customer_id or order_date is missing or invalid
+def report_load(source, counts, elapsed):
+    """Print the load summary with rows/sec and return it as a dict."""
+    rows_loaded = counts['Products'] + counts['Orders']
+    rows_per_second = rows_loaded / elapsed if elapsed > 0 else float('inf')
+    print(
+        f"Data loaded successfully from {source} to database: {counts['Products']} products, "
+        f"{counts['Orders']} orders ({counts['Rejected_Orders']} rejected) in {elapsed:.2f}s "
+        f"({rows_per_second:,.0f} rows/sec)."
+    )
+    return {
+        'products': counts['Products'],
+        'orders': counts['Orders'],
+        'rejected': counts['Rejected_Orders'],
+        'seconds': elapsed,
+        'rows_per_second': rows_per_second,
+    }
 
-        cursor.execute('''
-            INSERT INTO Orders (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (customer_id, customer_name, order_date, product_id, quantity, email))
+def load_data_to_db(source_path=EXCEL_FILE_PATH, db_path=DB_PATH, batch_size=BATCH_SIZE, source_format=None,
+                    reject_invalid=False, replace=False):
+    """
+    Stream the 'Products' and 'Orders' data of a workbook, CSV export or JSON
+    Lines export into the database.
 
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
+    The format is detected from the path unless `source_format` is given. Rows
+    are inserted with executemany in batches of `batch_size` inside a single
+    transaction, so memory use stays bounded by one batch whatever the size of
+    the source.
 
-    print("Data loaded successfully from Excel to database.")
+    A Load_Manifest entry per sheet (rows seen, skipped by reason, inserted,
+    and a content checksum) commits with the rows; load_manifest.reconcile
+    checks the tables against it without reading the source again.
+
+    Orders rows missing Customer_ID or Order_Date always go to Rejected_Orders.
+    With `reject_invalid`, so does every row failing a row-level data-quality
+    rule (see ingest_rules.py), in the same pass that reads it.
+
+    With `replace`, the rows of earlier loads are deleted in the same
+    transaction instead of being appended to.
+    """
+    start_time = time.perf_counter()
+    manifest = LoadManifest()
+
+    # Shared connection tuned for bulk inserts (see connection.py)
+    conn = get_connection(db_path, 'bulk_load')
+    with conn:
+        prepare_load(conn, replace)
+        checker = OrderRowChecker(conn, reject_invalid)
+        batches = iter_source_batches(source_path, batch_size, source_format, manifest)
+        counts = insert_batches(conn.cursor(), batches, manifest, source_path, checker)
+        manifest.write(conn)
+
+    return report_load(source_path, counts, time.perf_counter() - start_time)
+
+def resolve_workbooks(source, pattern=WORKBOOK_PATTERN):
+    """Return the sorted workbook paths for a directory (matched against pattern) or a glob."""
+    if os.path.isdir(source):
+        source = os.path.join(source, pattern)
+    return sorted(glob.glob(source))
+
+# Queue the parser processes put their batches on, set by _init_parser
+_parser_queue = None
+
+def _init_parser(queue):
+    global _parser_queue
+    _parser_queue = queue
+
+def _parse_workbook(task):
+    """Parser process: stream one source's batches to the writer, then mark it done with its parse counts."""
+    file_index, source_path, batch_size = task
+    manifest = LoadManifest()
+    try:
+        for table, batch in iter_source_batches(source_path, batch_size, manifest=manifest):
+            _parser_queue.put(('batch', file_index, table, batch))
+    except Exception:
+        _parser_queue.put(('error', file_index, source_path, traceback.format_exc()))
+    else:
+        parsed = {entry.sheet: (entry.rows_seen, dict(entry.skip_reasons)) for entry in manifest.sheets.values()}
+        _parser_queue.put(('done', file_index, None, parsed))
+
+class _SpilledBatches:
+    """
+    Batches of later files, parked in a scratch database file until their turn.
+
+    The scratch file is attached to the writer's connection as 'spill'. It is
+    on disk rather than a temp table, which the bulk_load profile keeps in memory
+    (temp_store=MEMORY). Only its small default page cache stays in memory, so
+    the writer's memory does not grow with how far the parsers run ahead.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        descriptor, self.path = tempfile.mkstemp(prefix='load_spill_', suffix='.db')
+        os.close(descriptor)
+        conn.execute("ATTACH DATABASE ? AS spill", (self.path,))
+        conn.execute("PRAGMA spill.synchronous = OFF")
+        conn.execute('''
+            CREATE TABLE spill.Pending_Batches (
+                Seq INTEGER PRIMARY KEY,
+                File_Index INTEGER,
+                Table_Name TEXT,
+                Payload BLOB
+            )
+        ''')
+        conn.execute("CREATE INDEX spill.idx_pending_batches_file ON Pending_Batches (File_Index, Seq)")
+
+    def put(self, file_index, table, batch):
+        self.conn.execute('''
+            INSERT INTO spill.Pending_Batches (File_Index, Table_Name, Payload) VALUES (?, ?, ?)
+        ''', (file_index, table, pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def pop(self, file_index):
+        """Yield a file's parked batches in arrival order, one at a time, and drop them."""
+        last_seq = 0
+        while True:
+            row = self.conn.execute('''
+                SELECT Seq, Table_Name, Payload FROM spill.Pending_Batches
+                WHERE File_Index = ? AND Seq > ? ORDER BY Seq LIMIT 1
+            ''', (file_index, last_seq)).fetchone()
+            if row is None:
+                break
+            last_seq = row[0]
+            yield row[1], pickle.loads(row[2])
+        self.conn.execute("DELETE FROM spill.Pending_Batches WHERE File_Index = ?", (file_index,))
+
+    def close(self):
+        self.conn.execute("DETACH DATABASE spill")
+        os.remove(self.path)
+
+def _write_batches(db_path, queue, sources, result_queue, reject_invalid=False, replace=False):
+    """
+    Writer process: the only process holding the SQLite connection.
+
+    Batches arrive in whatever order the parsers finish, so they are written
+    in file order: batches of the file currently being written go straight to
+    the database, batches of later files are parked on disk (_SpilledBatches)
+    until every earlier file is done. Row order, and so every Order_ID, is the
+    same on every run. The load manifest combines the parsers' counts with the
+    rows written.
+    """
+    conn = get_connection(db_path, 'bulk_load')
+    cursor = conn.cursor()
+    manifest = LoadManifest()
+    file_count = len(sources)
+    checker = OrderRowChecker(conn, reject_invalid)
+    counts = {table: 0 for table in INSERT_QUERIES}
+    counts['Rejected_Orders'] = 0
+    pending = _SpilledBatches(conn)
+    finished = set()
+    next_index = 0
+
+    def write(file_index, table, batch):
+        inserted, rejected = write_batch(cursor, table, batch, checker, sources[file_index], manifest)
+        counts[table] += len(inserted)
+        counts['Rejected_Orders'] += len(rejected)
+
+    try:
+        with conn:
+            prepare_load(conn, replace)
+            while next_index < file_count:
+                kind, file_index, table, payload = queue.get()
+                if kind == 'error':
+                    raise RuntimeError(f"Failed to parse {table}:\n{payload}")
+                if kind == 'done':
+                    finished.add(file_index)
+                    for sheet, (rows_seen, skip_reasons) in payload.items():
+                        manifest.sheet(sources[file_index], sheet).add_parsed(rows_seen, skip_reasons)
+                elif file_index == next_index:
+                    write(file_index, table, payload)
+                else:
+                    pending.put(file_index, table, payload)
+
+                # Flush every later file that is already complete, in order
+                while next_index in finished:
+                    next_index += 1
+                    if next_index < file_count:
+                        for buffered in pending.pop(next_index):
+                            write(next_index, *buffered)
+            manifest.write(conn)
+        result_queue.put(('ok', counts))
+    except Exception as error:
+        result_queue.put(('error', str(error)))
+    finally:
+        pending.close()
+        close_connections()
+
+def _wait_for_writer(writer, result_queue):
+    """Wait for the writer's result, failing instead of hanging if it dies without one."""
+    while True:
+        try:
+            return result_queue.get(timeout=1)
+        except queue_module.Empty:
+            if not writer.is_alive():
+                return 'error', f"writer process exited with code {writer.exitcode}"
+
+def load_workbooks_to_db(source, db_path=DB_PATH, workers=None, batch_size=BATCH_SIZE, reject_invalid=False,
+                         replace=False):
+    """
+    Load every workbook in a directory or glob with a pool of parser processes.
+
+    Parsing (including row filtering and Order_Date normalisation) runs in up to
+    `workers` processes, one workbook per task, and all parsed batches go to a
+    single writer process because SQLite allows only one writer. Workbooks are
+    written in sorted path order in one transaction, so the result does not
+    depend on which parser finishes first. Rows are checked and rejected, and
+    earlier loads replaced, as in load_data_to_db, by the writer.
+    """
+    start_time = time.perf_counter()
+    paths = resolve_workbooks(source)
+    if not paths:
+        raise FileNotFoundError(f"No workbooks found for {source}")
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+
+    # Bounded so fast parsers wait for the writer instead of filling memory
+    queue = multiprocessing.Queue(maxsize=workers * 4)
+    result_queue = multiprocessing.Queue()
+    writer = multiprocessing.Process(target=_write_batches, args=(db_path, queue, paths, result_queue, reject_invalid, replace))
+    writer.start()
+
+    with multiprocessing.Pool(workers, initializer=_init_parser, initargs=(queue,)) as pool:
+        parsing = pool.map_async(_parse_workbook, [(index, path, batch_size) for index, path in enumerate(paths)])
+        status, payload = _wait_for_writer(writer, result_queue)
+        if status == 'error':
+            pool.terminate()
+        else:
+            parsing.get()
+    writer.join()
+
+    if status == 'error':
+        raise RuntimeError(f"Loading workbooks from {source} failed: {payload}")
+    return report_load(f"{len(paths)} workbooks", payload, time.perf_counter() - start_time)
 
 if __name__ == '__main__':
-    load_data_to_db()
+    parser = argparse.ArgumentParser(description="Load Products and Orders into the database.")
+    parser.add_argument('source', nargs='?',
+                        help=f"Directory (matched against {WORKBOOK_PATTERN}) or glob of workbooks to load in parallel")
+    parser.add_argument('--workers', type=int, help="Number of parser processes (default: CPU count)")
+    parser.add_argument('--report', help="Write a JSON run report (stage timings and SQL statement stats)")
+    parser.add_argument('--reject-invalid', action='store_true',
+                        help="Send Orders rows failing a row-level data-quality rule to Rejected_Orders")
+    parser.add_argument('--replace', action='store_true', help="Delete the rows of earlier loads first")
+    args = parser.parse_args()
+
+    if args.report:
+        start_run()
+    if args.source:
+        load_workbooks_to_db(args.source, workers=args.workers, reject_invalid=args.reject_invalid,
+                             replace=args.replace)
+    else:
+        load_data_to_db(reject_invalid=args.reject_invalid, replace=args.replace)
+    if args.report:
+        finish_run(args.report)
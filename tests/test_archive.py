@@ -0,0 +1,146 @@
+import sqlite3
+import pytest
+import sys
+import os
+from datetime import date, timedelta
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_dm_db import setup_dimension_database
+from sql.sqlite_db.create_dm import sync_dimension_table
+from sql.sqlite_db.archive import ARCHIVE_TABLE, archive_expired_versions, attach_archive, detach_archive
+from sql.sqlite_db.dm_history import get_order_histories, get_order_as_of
+from sql.sqlite_db.summaries import DM_SUMMARIES, check_summaries, rebuild_summaries
+from conftest import insert_orders, insert_versions, run_sql
+
+# Older versions than the shared VERSIONS, so some are past the retention period:
+# (Order_ID, Customer_ID, Quantity, Start_Date, End_Date, Active)
+ARCHIVE_VERSIONS = [
+    (1, 1234, 2, '2023-01-01', '2023-06-01', 'N'),
+    (1, 1234, 3, '2023-06-01', '2024-12-05', 'N'),
+    (1, 1234, 4, '2024-12-05', '9999-12-31', 'Y'),
+    (2, 5678, 10, '2023-01-01', '9999-12-31', 'Y'),
+    (3, 1111, 4, '2023-01-01', '2023-03-01', 'N'),   # deleted from the source
+]
+# Archiving as of this date with a 365-day retention moves versions ending before 2024-12-01
+TODAY = '2025-12-01'
+
+def build_dimension(dm_db_path, versions=ARCHIVE_VERSIONS):
+    insert_versions(dm_db_path, versions)
+    conn = sqlite3.connect(dm_db_path)
+    rebuild_summaries(conn, DM_SUMMARIES)
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def dm_paths(tmp_path, dm_db_path):
+    archive_db_path = str(tmp_path / "etl_dm_archive.db")
+    build_dimension(dm_db_path)
+    return dm_db_path, archive_db_path
+
+def test_old_expired_versions_move_to_the_archive(dm_paths):
+    dm_db_path, archive_db_path = dm_paths
+    counts = archive_expired_versions(dm_db_path, archive_db_path, retention_days=365, batch_size=1, today=TODAY)
+
+    assert counts['archived'] == 2 and counts['batches'] == 2
+    conn = sqlite3.connect(dm_db_path)
+    remaining = conn.execute("SELECT Order_ID, End_Date FROM Dimension_Orders ORDER BY EID").fetchall()
+    assert remaining == [(1, '2024-12-05'), (1, '9999-12-31'), (2, '9999-12-31')]
+    # Customer 1111 has no versions left, so it has no summary row either
+    assert check_summaries(conn, DM_SUMMARIES) == {'Summary_Customer_Versions': 0}
+    conn.close()
+
+    archive = sqlite3.connect(archive_db_path)
+    assert archive.execute(f"SELECT EID, Quantity FROM {ARCHIVE_TABLE} ORDER BY EID").fetchall() == [(1, 2), (5, 4)]
+    archive.close()
+
+    # Nothing is left to archive on the next run
+    assert archive_expired_versions(dm_db_path, archive_db_path, retention_days=365, today=TODAY)['archived'] == 0
+
+def test_rebuilt_dimension_reusing_eids_is_archived_too(dm_paths):
+    dm_db_path, archive_db_path = dm_paths
+    archive_expired_versions(dm_db_path, archive_db_path, retention_days=365, today=TODAY)
+
+    # A reset rebuild starts EIDs from 1 again, so these versions get the archived EIDs 1 and 2
+    rebuilt = [(7, 4321, 1, '2022-01-01', '2022-05-01', 'N'), (8, 8765, 2, '2022-02-01', '2022-06-01', 'N')]
+    live = [version for version in ARCHIVE_VERSIONS if version[4] >= '2024-12-01']
+    setup_dimension_database(dm_db_path)
+    build_dimension(dm_db_path, rebuilt + live)
+    counts = archive_expired_versions(dm_db_path, archive_db_path, retention_days=365, today=TODAY)
+
+    assert counts['archived'] == 2
+    archive = sqlite3.connect(archive_db_path)
+    assert archive.execute(f"SELECT EID, Order_ID, Quantity FROM {ARCHIVE_TABLE} ORDER BY Archive_ID").fetchall() == \
+        [(1, 1, 2), (5, 3, 4), (1, 7, 1), (2, 8, 2)]
+    archive.close()
+    conn = sqlite3.connect(dm_db_path)
+    assert conn.execute("SELECT COUNT(*) FROM Dimension_Orders").fetchone()[0] == 3
+    conn.close()
+
+def test_versions_with_the_same_content_are_each_archived(tmp_path, source_db_path, dm_db_path):
+    archive_db_path = str(tmp_path / "etl_dm_archive.db")
+    insert_orders(source_db_path)
+    # Four same-day versions of order 1, the first and third with identical content
+    for quantity in (2, 99, 2, 99):
+        run_sql(source_db_path, f"UPDATE Orders SET Quantity = {quantity} WHERE Order_ID = 1")
+        sync_dimension_table(source_db_path, dm_db_path)
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+
+    counts = archive_expired_versions(dm_db_path, archive_db_path, retention_days=0, today=tomorrow)
+
+    assert counts['archived'] == 3
+    archive = sqlite3.connect(archive_db_path)
+    assert archive.execute(f"SELECT EID, Quantity FROM {ARCHIVE_TABLE} ORDER BY EID").fetchall() == \
+        [(1, 2), (4, 99), (5, 2)]
+    archive.close()
+
+def test_batch_that_cannot_be_archived_in_full_raises(dm_paths):
+    dm_db_path, archive_db_path = dm_paths
+    archive_expired_versions(dm_db_path, archive_db_path, retention_days=365, today=TODAY)
+    # An archived row under the key of an expired version, with other content
+    run_sql(dm_db_path, "UPDATE Dimension_Orders SET Row_Hash = 'hash' WHERE EID = 2")
+    run_sql(archive_db_path, f'''
+        INSERT INTO {ARCHIVE_TABLE} (EID, Order_ID, Customer_ID, Quantity, Start_Date, End_Date, Active, Row_Hash)
+        VALUES (2, 1, 1234, 3, '2023-06-01', '2024-12-05', 'Y', 'hash')
+    ''')
+
+    with pytest.raises(RuntimeError, match="Archived only 0 of 1"):
+        archive_expired_versions(dm_db_path, archive_db_path, retention_days=0, today=TODAY)
+    conn = sqlite3.connect(dm_db_path)
+    assert conn.execute("SELECT COUNT(*) FROM Dimension_Orders WHERE EID = 2").fetchone()[0] == 1
+    conn.close()
+
+def test_history_queries_can_include_the_archive(dm_paths):
+    dm_db_path, archive_db_path = dm_paths
+    archive_expired_versions(dm_db_path, archive_db_path, retention_days=365, today=TODAY)
+    conn = sqlite3.connect(dm_db_path)
+
+    assert [version['EID'] for version in get_order_histories(conn, [(1234, 1)])[(1234, 1)]] == [2, 3]
+    assert get_order_as_of(conn, [3], '2023-02-01') == {3: None}
+
+    attach_archive(conn, archive_db_path)
+    assert [version['EID'] for version in get_order_histories(conn, [(1234, 1)], include_archive=True)[(1234, 1)]] == \
+        [1, 2, 3]
+    assert get_order_as_of(conn, [3], '2023-02-01', include_archive=True)[3]['Quantity'] == 4
+    detach_archive(conn)
+    conn.close()
+
+def test_archiving_reclaims_space_incrementally(dm_paths):
+    dm_db_path, archive_db_path = dm_paths
+    conn = sqlite3.connect(dm_db_path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+    conn.executemany('''
+        INSERT INTO Dimension_Orders (Order_ID, Customer_ID, Email, Start_Date, End_Date, Active)
+        VALUES (?, NULL, ?, '2022-01-01', '2022-02-01', 'N')
+    ''', [(100 + i, 'x' * 500) for i in range(2000)])
+    conn.commit()
+    pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+
+    counts = archive_expired_versions(dm_db_path, archive_db_path, retention_days=365, today=TODAY)
+
+    assert counts['archived'] == 2002
+    assert counts['pages_freed'] > 0
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert conn.execute("PRAGMA page_count").fetchone()[0] < pages_before
+    conn.close()
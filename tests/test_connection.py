@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.connection import connect, get_connection, close_connections, resolve_db_path
+
+def pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "etl.db")
+    conn = connect(path)
+    conn.execute("CREATE TABLE Orders (Order_ID INTEGER PRIMARY KEY, Quantity INTEGER)")
+    conn.commit()
+    conn.close()
+    yield path
+    close_connections()
+
+def test_profiles_apply_their_pragmas(db_path):
+    conn = connect(db_path, 'bulk_load')
+    assert pragma(conn, 'journal_mode') == 'wal'
+    assert pragma(conn, 'synchronous') == 0
+    assert pragma(conn, 'cache_size') == -512000
+    assert pragma(conn, 'temp_store') == 2
+    conn.close()
+
+    conn = connect(db_path)
+    assert pragma(conn, 'synchronous') == 1
+    conn.close()
+
+def test_read_only_profile_rejects_writes(db_path):
+    conn = connect(db_path, 'read_only')
+    assert conn.execute("SELECT COUNT(*) FROM Orders").fetchone()[0] == 0
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO Orders (Quantity) VALUES (1)")
+    conn.close()
+
+    with pytest.raises(FileNotFoundError):
+        connect(db_path + ".missing", 'read_only')
+
+def test_connections_are_shared_per_thread(db_path):
+    conn = get_connection(db_path)
+    assert get_connection(db_path) is conn
+    assert get_connection(db_path, 'read_only') is not conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_connection(db_path)))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    close_connections()
+    assert get_connection(db_path) is not conn
+
+def test_unknown_profile_and_relative_paths():
+    with pytest.raises(ValueError):
+        connect(':memory:', 'fast')
+    assert resolve_db_path('sql/sqlite_db/etl.db') == os.path.abspath(
+        os.path.join(os.path.dirname(__file__), '../sql/sqlite_db/etl.db'))
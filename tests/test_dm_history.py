@@ -0,0 +1,60 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.dm_history import get_order_histories, get_order_as_of
+from sql.sqlite_db.dbm_queries import get_scd_integrity_violations
+from conftest import insert_versions
+
+@pytest.fixture
+def dm_connection(dm_db_path):
+    insert_versions(dm_db_path)
+    conn = sqlite3.connect(dm_db_path)
+    yield conn
+    conn.close()
+
+def test_histories_for_many_keys(dm_connection):
+    histories = get_order_histories(dm_connection, [(1234, 1), (5678, 2), (9999, 9)])
+
+    assert [version['EID'] for version in histories[(1234, 1)]] == [1, 2, 3]
+    assert [version['Active'] for version in histories[(1234, 1)]] == ['N', 'N', 'Y']
+    assert len(histories[(5678, 2)]) == 1
+    assert histories[(9999, 9)] == []
+
+def test_order_as_of_date(dm_connection):
+    assert {order_id: version and version['Quantity']
+            for order_id, version in get_order_as_of(dm_connection, [1, 2, 3, 4], '2024-12-03').items()} == \
+        {1: 2, 2: 10, 3: 4, 4: None}
+
+    # On the day of a change the version that survived the day is current
+    versions = get_order_as_of(dm_connection, [1, 3], '2024-12-05')
+    assert versions[1]['Quantity'] == 4
+    assert versions[3]['Quantity'] == 4
+
+    # Deleted orders have no version after their End_Date
+    assert get_order_as_of(dm_connection, [3], '2024-12-10') == {3: None}
+
+def test_consistent_history_has_no_violations(dm_connection):
+    assert dm_connection.execute(get_scd_integrity_violations()).fetchall() == []
+
+def test_history_violations_are_reported(dm_connection):
+    dm_connection.executemany('''
+        INSERT INTO Dimension_Orders (Order_ID, Customer_ID, Quantity, Start_Date, End_Date, Active)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        (2, 5678, 11, '2024-12-03', '9999-12-31', 'Y'),   # second active version, overlapping
+        (3, 1111, 5, '2024-12-12', '9999-12-31', 'N'),    # re-added after a gap, not active
+    ])
+    violations = {
+        (eid, order_id): reasons
+        for order_id, _, eid, _, _, _, reasons in dm_connection.execute(get_scd_integrity_violations())
+    }
+    assert violations == {
+        (4, 2): 'active_not_latest,multiple_active',
+        (7, 2): 'overlap,multiple_active',
+        (8, 3): 'gap,end_date_mismatch',
+    }
@@ -0,0 +1,83 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.create_dm import sync_dimension_table
+from sql.sqlite_db.connection import get_connection
+from sql.sqlite_db.fact_orders import SurrogateKeyMap, load_fact_orders
+from sql.sqlite_db.dbm_queries import get_order_facts_for_customer
+from conftest import insert_orders, insert_products, run_sql
+
+# Each fact must point at the active version of its order
+MISMATCHED_FACTS_QUERY = '''
+    SELECT f.Order_ID
+    FROM Fact_Orders f
+    LEFT JOIN Dimension_Orders d ON d.EID = f.EID
+    WHERE d.EID IS NULL OR d.Order_ID <> f.Order_ID OR d.Active <> 'Y' OR d.Quantity IS NOT f.Quantity
+'''
+
+@pytest.fixture
+def databases(source_db_path, dm_db_path):
+    # The third order's product is not in Products
+    insert_products(source_db_path)
+    insert_orders(source_db_path)
+    sync_dimension_table(source_db_path, dm_db_path)
+    return source_db_path, dm_db_path
+
+def fact_rows(dm_db_path):
+    conn = sqlite3.connect(dm_db_path)
+    rows = conn.execute("SELECT Order_ID, EID, Customer_ID, Product_ID, Quantity FROM Fact_Orders ORDER BY Order_ID")
+    rows = rows.fetchall()
+    mismatched = conn.execute(MISMATCHED_FACTS_QUERY).fetchall()
+    conn.close()
+    assert mismatched == []
+    return rows
+
+def test_facts_reference_current_versions(databases):
+    source_db_path, dm_db_path = databases
+    counts = load_fact_orders(source_db_path, dm_db_path)
+
+    assert counts['upserted'] == 3
+    assert counts['unresolved_products'] == 1
+    rows = fact_rows(dm_db_path)
+    assert [(row[0], row[3]) for row in rows] == [(1, 567), (2, 789), (3, None)]
+
+    conn = sqlite3.connect(dm_db_path)
+    facts = conn.execute(get_order_facts_for_customer(), (5678,)).fetchall()
+    conn.close()
+    assert facts == [(2, rows[1][1], 'Jane Smith', '20/12/2024', 789, 10)]
+
+def test_reused_key_map_picks_up_new_versions(databases):
+    source_db_path, dm_db_path = databases
+    key_map = SurrogateKeyMap(get_connection(dm_db_path))
+    load_fact_orders(source_db_path, dm_db_path, key_map=key_map)
+    eids_before = {row[0]: row[1] for row in fact_rows(dm_db_path)}
+
+    run_sql(source_db_path, "UPDATE Orders SET Quantity = 11 WHERE Order_ID = 2")
+    run_sql(source_db_path, "DELETE FROM Orders WHERE Order_ID = 3")
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+    counts = load_fact_orders(source_db_path, dm_db_path, key_map=key_map)
+
+    # Only the changed order is rewritten, and the deleted order's fact is removed
+    assert counts['upserted'] == 1
+    assert counts['deleted'] == 1
+    rows = fact_rows(dm_db_path)
+    assert [row[0] for row in rows] == [1, 2]
+    assert rows[0][1] == eids_before[1]
+    assert rows[1][1] > eids_before[2] and rows[1][4] == 11
+    assert load_fact_orders(source_db_path, dm_db_path, key_map=key_map)['upserted'] == 0
+
+def test_orders_without_a_dimension_version_are_skipped(databases):
+    source_db_path, dm_db_path = databases
+    run_sql(source_db_path, '''
+        INSERT INTO Orders (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email)
+        VALUES (2222, 'Not Synced', '5/12/2024', 567, 1, NULL)
+    ''')
+    counts = load_fact_orders(source_db_path, dm_db_path)
+
+    assert counts['unresolved_orders'] == 1
+    assert [row[0] for row in fact_rows(dm_db_path)] == [1, 2, 3]
@@ -0,0 +1,59 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_db import setup_database
+from sql.sqlite_db.create_dm import sync_dimension_table
+from sql.sqlite_db.validation import run_validation
+from generate_data import DEFECT_TYPES, generate_orders, write_dataset
+from load_data import load_data_to_db
+from benchmark import find_regressions
+
+def load_run(tmp_path, run, order_count=700, mutation_rate=0.1):
+    source_path = write_dataset(str(tmp_path / f"run_{run}"), 'csv', order_count, product_count=50,
+                                defect_rate=0.02, run=run, mutation_rate=mutation_rate)
+    db_path = str(tmp_path / "etl.db")
+    setup_database(db_path)
+    load_data_to_db(source_path, db_path)
+    return db_path
+
+def test_generation_is_seeded():
+    assert list(generate_orders(200, seed=7)) == list(generate_orders(200, seed=7))
+    assert list(generate_orders(200, seed=7)) != list(generate_orders(200, seed=8))
+
+def test_injected_defects_fail_every_rule(tmp_path):
+    db_path = load_run(tmp_path, 0)
+
+    conn = sqlite3.connect(db_path)
+    results = run_validation(conn)
+    conn.close()
+
+    # 700 rows with a defect every 50th row: each defect type appears twice
+    failing = {name for name, result in results.items() if result.count}
+    assert failing == set(results)
+    assert results['negative_quantity'].count == 700 // 50 // len(DEFECT_TYPES)
+
+def test_mutated_run_expires_changed_versions(tmp_path, dm_db_path):
+    sync_dimension_table(load_run(tmp_path, 0), dm_db_path)
+    sync_dimension_table(load_run(tmp_path, 1), dm_db_path)
+
+    changed = sum(
+        before != after
+        for before, after in zip(generate_orders(700, 50, defect_rate=0.02),
+                                 generate_orders(700, 50, defect_rate=0.02, run=1, mutation_rate=0.1))
+    )
+    conn = sqlite3.connect(dm_db_path)
+    expired = conn.execute("SELECT COUNT(*) FROM Dimension_Orders WHERE Active = 'N'").fetchone()[0]
+    conn.close()
+    assert 30 < changed < 110
+    assert expired == changed
+
+def test_regressions_past_the_threshold_are_flagged():
+    baseline = {'load': {'rows_per_second': 1000.0, 'peak_rss_mb': 100.0}}
+    assert find_regressions({'load': {'rows_per_second': 850.0, 'peak_rss_mb': 110.0}}, baseline, 0.2) == []
+    assert len(find_regressions({'load': {'rows_per_second': 700.0, 'peak_rss_mb': 130.0}}, baseline, 0.2)) == 2
+    assert find_regressions({'sync': {'rows_per_second': 1.0, 'peak_rss_mb': 1.0}}, baseline, 0.2) == []
@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.create_dm import sync_dimension_table
+from sql.sqlite_db.connection import get_connection
+from sql.sqlite_db.validation import run_validation
+from sql.sqlite_db.instrumentation import RunRecorder, current_recorder, finish_run, normalise_sql, start_run
+from load_data import load_data_to_db
+from benchmark_load_formats import write_csv
+from conftest import PRODUCTS
+
+ORDERS = [
+    (1234, 'John Doe', '01/12/2024', 567, 2, 'john.doe@example.com'),
+    (None, 'No Customer', '02/12/2024', 567, 1, None),    # rejected by the loader
+    (5678, None, '03/12/2024', 789, -1, 'jane'),
+]
+
+@pytest.fixture
+def instrumented_run():
+    recorder = start_run()
+    yield recorder
+    finish_run()
+
+def test_report_covers_load_sync_and_validation(tmp_path, source_db_path, dm_db_path, instrumented_run):
+    source_dir = str(tmp_path / "export")
+    write_csv(source_dir, {'Products': PRODUCTS, 'Orders': ORDERS})
+
+    load_data_to_db(source_dir, source_db_path)
+    sync_dimension_table(source_db_path, dm_db_path)
+    run_validation(get_connection(source_db_path, 'read_only'))
+
+    report_path = str(tmp_path / "report.json")
+    finish_run(report_path)
+    with open(report_path, encoding='utf-8') as report_file:
+        report = json.load(report_file)
+
+    stages = report['stages']
+    assert stages['load.parse.Orders']['rows_in'] == 3
+    # Rows missing required values are rejected by the rule check at insert time
+    assert stages['load.parse.Orders']['rows_rejected'] == 0
+    assert stages['load.insert.Orders']['rows_out'] == 2
+    assert stages['load.insert.Orders']['rows_rejected'] == 1
+    assert stages['sync.insert']['rows_out'] == 2
+    assert stages['validate.scan.Orders']['calls'] == 1
+
+    # Statements run with different parameters are one entry with the slowest call as sample
+    statements = {statement['sql']: statement for statement in report['statements']}
+    insert_orders = [sql for sql in statements if sql.startswith('INSERT INTO Orders')]
+    assert len(insert_orders) == 1
+    assert statements[insert_orders[0]]['count'] == 2
+    # sqlite3 reports the change-capture trigger of each row under the insert's text:
+    # once for the trigger program, once for its statement
+    assert statements[insert_orders[0]]['trigger_callbacks'] == 2 * 2
+    assert "'john.doe@example.com'" in statements[insert_orders[0]]['slowest_sample'] or \
+        "'jane'" in statements[insert_orders[0]]['slowest_sample']
+
+def test_repeated_identical_statements_are_each_counted():
+    recorder = RunRecorder()
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (a)")
+    recorder.trace(conn)
+    with recorder.stage('repeat'):
+        conn.executemany("INSERT INTO t VALUES (?)", [(1,), (1,), (1,)])
+        for _ in range(2):
+            conn.execute("SELECT COUNT(*) FROM t WHERE a = 1").fetchone()
+    recorder.finish()
+    conn.close()
+
+    counts = {statement['sql']: statement['count'] for statement in recorder.report()['statements']}
+    assert counts['INSERT INTO t VALUES (?)'] == 3
+    assert counts['SELECT COUNT(*) FROM t WHERE a = ?'] == 2
+
+def test_trigger_callbacks_are_not_counted_as_executions():
+    recorder = RunRecorder()
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (a)")
+    conn.execute("CREATE TABLE t_log (a)")
+    recorder.trace(conn)
+    # Created after tracing started: the recorder learns of it from the traced statement
+    conn.execute("CREATE TRIGGER t_insert AFTER INSERT ON t BEGIN INSERT INTO t_log VALUES (new.a); END")
+    with recorder.stage('insert'):
+        conn.execute("INSERT INTO t SELECT 1 UNION ALL SELECT 2")
+        conn.executemany("INSERT INTO t VALUES (?)", [(3,), (4,)])
+    recorder.finish()
+    conn.close()
+
+    statements = {statement['sql']: statement for statement in recorder.report()['statements']}
+    assert statements['INSERT INTO t SELECT ? UNION ALL SELECT ?']['count'] == 1
+    assert statements['INSERT INTO t SELECT ? UNION ALL SELECT ?']['trigger_callbacks'] == 2 * 2
+    assert statements['INSERT INTO t VALUES (?)']['count'] == 2
+    assert statements['INSERT INTO t VALUES (?)']['trigger_callbacks'] == 2 * 2
+
+def test_recorder_is_a_no_op_when_switched_off():
+    recorder = current_recorder()
+    assert not recorder.enabled
+    with recorder.stage('load') as stage:
+        stage.add(rows_in=1)
+    assert finish_run() is None
+
+def test_normalise_sql_replaces_literals():
+    assert normalise_sql("SELECT *  FROM Orders\n WHERE Order_ID = 12 AND Email = 'a''b' AND Quantity IS NULL") == \
+        "SELECT * FROM Orders WHERE Order_ID = ? AND Email = ? AND Quantity IS NULL"
+    assert normalise_sql("INSERT INTO t VALUES (1, NULL, -2.5)") == "INSERT INTO t VALUES (?, ?, ?)"
@@ -1,46 +1,43 @@
-import pandas as pd
-import sqlite3
+import json
+import sys
 import os
 
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.connection import DB_PATH, connect
+from sql.sqlite_db.load_manifest import reconcile
+
 def test_row_count():
-    # Path to SQLite database
-    DB_PATH = 'sql/sqlite_db/etl.db'
     print(f"Database path: {DB_PATH}")
 
-    # Establish a connection
-    conn = sqlite3.connect(DB_PATH)
-
-    # Path to Excel file
-    EXCEL_FILE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../orders_test_data.xlsx'))
-    print(f"Excel file path: {EXCEL_FILE_PATH}")
-    
-    # Read source data from Excel file for both sheets
-    source_orders_df = pd.read_excel(EXCEL_FILE_PATH, sheet_name="Orders")
-    source_products_df = pd.read_excel(EXCEL_FILE_PATH, sheet_name="Products")
-    
-    # Drop empty rows in both sheets
-    source_orders_df = source_orders_df.dropna(how='all')
-    source_products_df = source_products_df.dropna(how='all')
-    
-    print(f"Source Orders Rows: {len(source_orders_df)}")
-    print(f"Source Products Rows: {len(source_products_df)}")
-
-    # Read target data from the database for both tables
-    target_orders_df = pd.read_sql_query("SELECT * FROM Orders", conn)
-    target_products_df = pd.read_sql_query("SELECT * FROM Products", conn)
-    
-    print(f"Target Orders Rows: {len(target_orders_df)}")
-    print(f"Target Products Rows: {len(target_products_df)}")
-
-    # Validate row count for Orders
-    assert len(source_orders_df) == len(target_orders_df), (
-        f"Row count mismatch for Orders: Source ({len(source_orders_df)}) vs Target ({len(target_orders_df)})"
-    )
-
-    # Validate row count for Products
-    assert len(source_products_df) == len(target_products_df), (
-        f"Row count mismatch for Products: Source ({len(source_products_df)}) vs Target ({len(target_products_df)})"
-    )
+    # Establish a read-only connection
+    conn = connect(DB_PATH, 'read_only')
 
-    print("Row count validation passed for both Orders and Products.")
+    # Source side: what the loader recorded per sheet while reading the source
+    # (see load_manifest.py), instead of parsing the Excel file again
+    source_rows = {}
+    for sheet, rows_seen, skip_reasons in conn.execute(
+            "SELECT Target_Table, Rows_Seen, Skip_Reasons FROM Load_Manifest"):
+        # Empty rows are not source rows
+        non_empty_rows = rows_seen - json.loads(skip_reasons).get('empty_row', 0)
+        source_rows[sheet] = source_rows.get(sheet, 0) + non_empty_rows
+
+    # Target side: one COUNT(*) and one checksum aggregate per table
+    results = reconcile(conn)
     conn.close()
+
+    for table in ('Orders', 'Products'):
+        result = results[table]
+        print(f"Source {table} Rows: {source_rows.get(table, 0)}")
+        print(f"Target {table} Rows: {result['target_rows']}")
+
+        # Validate row count
+        assert source_rows.get(table, 0) == result['target_rows'], (
+            f"Row count mismatch for {table}: Source ({source_rows.get(table, 0)}) vs Target ({result['target_rows']})"
+        )
+
+        # Validate that the loaded rows are the rows the manifest recorded
+        assert result['matches'], f"Manifest mismatch for {table}: {result}"
+
+    print("Row count validation passed for both Orders and Products.")
@@ -0,0 +1,238 @@
+import sqlite3
+import pytest
+import sys
+import os
+import queue as queue_module
+from datetime import datetime
+from openpyxl import Workbook
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_db import setup_database
+from sql.sqlite_db.order_dates import to_order_day
+from sql.sqlite_db.load_manifest import reconcile
+import load_data
+from load_data import _write_batches, iter_source_batches, load_data_to_db, load_workbooks_to_db
+from sql.sqlite_db.validation import RULES
+from sql.sqlite_db.ingest_rules import ORDER_ROW_RULES, REQUIRED_RULES
+from benchmark_load_formats import WRITERS
+from generate_data import write_dataset
+
+PRODUCT_HEADER = ['Product_ID', 'Product_Name']
+ORDER_HEADER = ['Customer_ID', 'Customer_Name', 'Order_Date', 'Product_ID', 'Quantity', 'Email']
+
+def write_workbook(path, products, orders):
+    wb = Workbook(write_only=True)
+    for title, header, rows in (('Products', PRODUCT_HEADER, products), ('Orders', ORDER_HEADER, orders)):
+        sheet = wb.create_sheet(title)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+    wb.save(path)
+
+def workbook_orders(file_number, count=25):
+    return [
+        (file_number * 1000 + i, f'Customer {i}', datetime(2024, 12, 1 + i % 28), 567, i, f'c{i}@example.com')
+        for i in range(count)
+    ] + [
+        (None, None, None, None, None, None),             # empty row, skipped
+        (file_number, 'No Date', None, 567, 1, None),      # missing Order_Date, skipped
+        (file_number, 'Text Date', ' 3/12/2024\n', 789, 1, None),
+    ]
+
+def table_rows(db_path, query, params=()):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    return rows
+
+ORDERS_QUERY = '''
+    SELECT Order_ID, Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email
+    FROM Orders ORDER BY Order_ID
+'''
+
+@pytest.fixture
+def workbook_dir(tmp_path):
+    drop_dir = tmp_path / "drops"
+    drop_dir.mkdir()
+    for file_number in range(1, 4):
+        write_workbook(
+            drop_dir / f"orders_{file_number:02d}.xlsx",
+            [(567, 'Widget A'), (789, 'Widget B'), (file_number * 100, f'Widget {file_number}')],
+            workbook_orders(file_number)
+        )
+    return drop_dir
+
+def test_streaming_load_skips_invalid_rows(tmp_path, workbook_dir):
+    db_path = str(tmp_path / "etl.db")
+    setup_database(db_path)
+
+    result = load_data_to_db(str(workbook_dir / "orders_01.xlsx"), db_path, batch_size=7)
+
+    assert result['orders'] == 26
+    assert result['products'] == 3
+    orders = table_rows(db_path, ORDERS_QUERY)
+    assert len(orders) == 26
+    assert orders[0][3] == '01/12/2024'
+    assert orders[-1][3] == '3/12/2024'
+    assert result['rejected'] == 1
+    assert table_rows(db_path, "SELECT Customer_ID, Customer_Name, Rule_Codes FROM Rejected_Orders") == [
+        (1, 'No Date', 'missing_order_date'),
+    ]
+
+def test_load_stores_parsed_order_dates(tmp_path, workbook_dir):
+    db_path = str(tmp_path / "etl.db")
+    setup_database(db_path)
+    load_data_to_db(str(workbook_dir / "orders_01.xlsx"), db_path)
+
+    rows = table_rows(db_path, 'SELECT Order_Date, Order_Date_ISO, Order_Day FROM Orders ORDER BY Order_ID')
+    assert rows[0] == ('01/12/2024', '2024-12-01', to_order_day('2024-12-01'))
+    assert rows[-1] == ('3/12/2024', '2024-12-03', to_order_day('2024-12-03'))
+
+def test_parallel_load_matches_sequential_load(tmp_path, workbook_dir):
+    sequential_db = str(tmp_path / "sequential.db")
+    parallel_db = str(tmp_path / "parallel.db")
+    setup_database(sequential_db)
+    setup_database(parallel_db)
+
+    for path in sorted(workbook_dir.glob("orders_*.xlsx")):
+        load_data_to_db(str(path), sequential_db, batch_size=10)
+    result = load_workbooks_to_db(str(workbook_dir), parallel_db, workers=3, batch_size=10)
+
+    assert result['orders'] == 3 * 26
+    assert table_rows(parallel_db, ORDERS_QUERY) == table_rows(sequential_db, ORDERS_QUERY)
+    assert table_rows(parallel_db, "SELECT * FROM Products ORDER BY Product_ID") == \
+        table_rows(sequential_db, "SELECT * FROM Products ORDER BY Product_ID")
+
+def test_writer_parks_later_files_on_disk_until_their_turn(tmp_path, workbook_dir, monkeypatch):
+    sequential_db = str(tmp_path / "sequential.db")
+    writer_db = str(tmp_path / "writer.db")
+    setup_database(sequential_db)
+    setup_database(writer_db)
+    paths = [str(path) for path in sorted(workbook_dir.glob("orders_*.xlsx"))]
+    for path in paths:
+        load_data_to_db(path, sequential_db, batch_size=10)
+
+    # Every batch of the later files arrives before any batch of the first one
+    messages = queue_module.Queue()
+    for file_index in reversed(range(len(paths))):
+        for table, batch in iter_source_batches(paths[file_index], 10):
+            messages.put(('batch', file_index, table, batch))
+    for file_index, path in enumerate(paths):
+        parsed = {sheet: (0, {}) for sheet in ('Products', 'Orders')}
+        messages.put(('done', file_index, None, parsed))
+    monkeypatch.setattr(load_data.tempfile, 'tempdir', str(tmp_path))
+    parked = []
+    park = load_data._SpilledBatches.put
+    monkeypatch.setattr(load_data._SpilledBatches, 'put',
+                        lambda self, file_index, *batch: parked.append(file_index) or park(self, file_index, *batch))
+    results = queue_module.Queue()
+    _write_batches(writer_db, messages, paths, results)
+
+    assert results.get_nowait()[0] == 'ok'
+    assert set(parked) == set(range(1, len(paths)))
+    assert table_rows(writer_db, ORDERS_QUERY) == table_rows(sequential_db, ORDERS_QUERY)
+    # The scratch file is removed once the load commits
+    assert not list(tmp_path.glob("load_spill_*.db"))
+
+MANIFEST_QUERY = '''
+    SELECT Source, Sheet, Rows_Seen, Rows_Skipped, Skip_Reasons, Rows_Inserted, Checksum
+    FROM Load_Manifest ORDER BY Source, Sheet
+'''
+
+def test_load_manifest_reconciles_with_tables(tmp_path, workbook_dir):
+    db_path = str(tmp_path / "etl.db")
+    setup_database(db_path)
+    source = str(workbook_dir / "orders_01.xlsx")
+    load_data_to_db(source, db_path, batch_size=7)
+
+    manifest = table_rows(db_path, MANIFEST_QUERY)
+    assert [row[:6] for row in manifest] == [
+        (source, 'Orders', 28, 2, '{"empty_row": 1, "missing_order_date": 1}', 26),
+        (source, 'Products', 3, 0, '{}', 3),
+    ]
+    conn = sqlite3.connect(db_path)
+    assert all(result['matches'] for result in reconcile(conn).values())
+
+    # A row changed after the load no longer matches the manifest checksum
+    conn.execute("UPDATE Orders SET Quantity = Quantity + 1 WHERE Order_ID = 1")
+    results = reconcile(conn)
+    conn.close()
+    assert results['Orders']['manifest_rows'] == results['Orders']['target_rows']
+    assert not results['Orders']['matches']
+    assert results['Products']['matches']
+
+def test_parallel_load_manifest_matches_sequential_load(tmp_path, workbook_dir):
+    sequential_db = str(tmp_path / "sequential.db")
+    parallel_db = str(tmp_path / "parallel.db")
+    setup_database(sequential_db)
+    setup_database(parallel_db)
+
+    for path in sorted(workbook_dir.glob("orders_*.xlsx")):
+        load_data_to_db(str(path), sequential_db, batch_size=2)
+    load_workbooks_to_db(str(workbook_dir), parallel_db, workers=3, batch_size=2)
+
+    # Products 567 and 789 are in every workbook; only the first copy is inserted
+    manifest = table_rows(parallel_db, MANIFEST_QUERY)
+    assert manifest == table_rows(sequential_db, MANIFEST_QUERY)
+    assert [(row[1], row[3], row[5]) for row in manifest if row[1] == 'Products'] == [
+        ('Products', 0, 3), ('Products', 2, 1), ('Products', 2, 1),
+    ]
+    conn = sqlite3.connect(parallel_db)
+    assert all(result['matches'] for result in reconcile(conn).values())
+    conn.close()
+
+def test_parallel_load_without_workbooks_fails(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_workbooks_to_db(str(tmp_path), str(tmp_path / "etl.db"))
+
+def test_csv_and_jsonl_sources_load_like_excel(tmp_path):
+    sheets = {
+        'Products': [(567, 'Widget A'), (789, None)],
+        'Orders': workbook_orders(1, count=5),
+    }
+    loaded = {}
+    for source_format, (write, name) in WRITERS.items():
+        source_path = str(tmp_path / name)
+        write(source_path, sheets)
+        db_path = str(tmp_path / f"etl_{source_format}.db")
+        setup_database(db_path)
+        load_data_to_db(source_path, db_path)
+        loaded[source_format] = (
+            table_rows(db_path, ORDERS_QUERY),
+            table_rows(db_path, "SELECT * FROM Products ORDER BY Product_ID"),
+        )
+
+    assert len(loaded['xlsx'][0]) == 6
+    assert loaded['csv'] == loaded['xlsx']
+    assert loaded['jsonl'] == loaded['xlsx']
+
+def test_rejected_rows_match_post_load_rule_scans(tmp_path):
+    source_dir = str(tmp_path / "export")
+    write_dataset(source_dir, 'csv', 700, product_count=50)
+    checked_db = str(tmp_path / "checked.db")
+    unchecked_db = str(tmp_path / "unchecked.db")
+    for db_path in (checked_db, unchecked_db):
+        setup_database(db_path)
+    result = load_data_to_db(source_dir, checked_db, batch_size=64, reject_invalid=True)
+    load_data_to_db(source_dir, unchecked_db, batch_size=64)
+
+    # Each rule rejects at ingest exactly the rows its predicate flags after a plain load
+    predicates = {rule.name: rule.predicate for rule in RULES if rule.kind == 'row' and rule.table == 'Orders'}
+    for name in ORDER_ROW_RULES:
+        if name in REQUIRED_RULES:
+            continue
+        flagged = table_rows(unchecked_db, f"SELECT COUNT(*) FROM Orders WHERE {predicates[name]}")[0][0]
+        rejected = table_rows(
+            checked_db, "SELECT COUNT(*) FROM Rejected_Orders WHERE ',' || Rule_Codes || ',' LIKE ?", (f'%,{name},%',)
+        )[0][0]
+        assert flagged > 0 and rejected == flagged, name
+        assert table_rows(checked_db, f"SELECT COUNT(*) FROM Orders WHERE {predicates[name]}")[0][0] == 0, name
+
+    orders_loaded = table_rows(unchecked_db, "SELECT COUNT(*) FROM Orders")[0][0]
+    assert result['orders'] + result['rejected'] == orders_loaded
+
+def test_unsupported_source_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        load_data_to_db(str(tmp_path / "orders.parquet"), str(tmp_path / "etl.db"))
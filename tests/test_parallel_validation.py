@@ -0,0 +1,109 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_db import setup_database
+from sql.sqlite_db.order_dates import to_order_day
+from sql.sqlite_db.validation import RULES, run_validation
+from sql.sqlite_db.parallel_validation import Check, TableScan, data_checks, run_checks, run_check
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = str(tmp_path / "etl.db")
+    setup_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO Products (Product_ID, Product_Name) VALUES (567, 'Widget A')")
+    conn.executemany('''
+        INSERT INTO Orders (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email, Order_Day)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (1234, 'John Doe', '01/12/2024', 567, 2, 'john.doe@example.com', to_order_day('2024-12-01')),
+        (5678, None, '02/12/2024', 567, -1, 'jane.example.com', to_order_day('2024-12-02')),
+    ])
+    conn.commit()
+    conn.close()
+    return db_path
+
+def test_results_match_the_single_scan_engine(db_path):
+    checks = data_checks(db_path)
+    # One scan per table over the registered rules
+    assert [scan.table for scan in checks] == ['Orders', 'Products']
+    report = run_checks(checks, workers=2)
+
+    conn = sqlite3.connect(db_path)
+    expected = run_validation(conn)
+    for rule in RULES:
+        result = report[rule.name]
+        assert result.error is None
+        assert (result.count, result.sample) == (expected[rule.name].count, expected[rule.name].sample), rule.name
+        # The rule's standalone query agrees on the count
+        assert result.count == len(conn.execute(rule.query()).fetchall()), rule.name
+    conn.close()
+
+    assert list(report.results) == [rule.name for rule in RULES]
+    assert {result.name for result in report.failures()} == {
+        'missing_customer_name', 'negative_quantity', 'invalid_email', 'duplicate_product_id',
+    }
+    summary = report.to_dict()
+    assert summary['checks']['negative_quantity']['passed'] is False
+    assert summary['checks']['order_date_format'] == {
+        'db_path': db_path, 'count': 0, 'sample': [], 'seconds': summary['checks']['order_date_format']['seconds'],
+        'passed': True, 'error': None,
+    }
+
+def test_samples_are_the_first_violations_in_key_order(db_path):
+    conn = sqlite3.connect(db_path)
+    # Unparseable dates on orders stored out of key order, with customers and
+    # products the scan's windows partition (and so return) in other orders
+    conn.executemany('''
+        INSERT INTO Orders (Order_ID, Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email)
+        VALUES (?, ?, 'Customer', '31/02/2024', ?, 1, 'customer@example.com')
+    ''', [(order_id, 9000 - order_id, 800 - order_id % 3) for order_id in (40, 12, 31, 7, 25, 18)])
+    conn.commit()
+    conn.close()
+
+    report = run_checks(data_checks(db_path), sample_size=3)
+
+    assert report['order_date_format'].count == 6
+    assert [row['Order_ID'] for row in report['order_date_format'].sample] == [7, 12, 18]
+
+def test_connections_are_read_only_and_errors_are_reported(db_path):
+    report = run_checks([
+        Check('write_attempt', db_path, "DELETE FROM Orders"),
+        Check('missing_table', db_path, "SELECT * FROM No_Such_Table"),
+        Check('order_count', db_path, "SELECT COUNT(*) FROM Orders", informational=True),
+    ])
+
+    assert report['write_attempt'].error.startswith('OperationalError')
+    assert report['missing_table'].error.startswith('OperationalError')
+    assert report['order_count'].sample == [{'COUNT(*)': 2}]
+    assert [result.name for result in report.failures()] == ['write_attempt', 'missing_table']
+
+def test_check_names_must_be_unique(db_path):
+    with pytest.raises(ValueError):
+        run_checks([Check('same', db_path, "SELECT 1"), Check('same', db_path, "SELECT 2")])
+    with pytest.raises(ValueError):
+        run_checks(data_checks(db_path) + [Check('negative_quantity', db_path, "SELECT 1")])
+
+def test_failed_scan_fails_each_of_its_rules(db_path):
+    report = run_checks([TableScan('Orders', str(db_path) + '.missing', ('negative_quantity', 'invalid_email'))])
+
+    assert [result.name for result in report.failures()] == ['negative_quantity', 'invalid_email']
+    assert report['invalid_email'].error.startswith('FileNotFoundError')
+
+def test_count_is_exact_and_sample_is_capped(db_path, monkeypatch):
+    # Violations span several fetches; only the first rows in query order are kept
+    monkeypatch.setattr('sql.sqlite_db.parallel_validation.FETCH_SIZE', 7)
+    query = """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100)
+        SELECT i AS Order_ID FROM n ORDER BY i
+    """
+    result = run_check(Check('many_violations', db_path, query), sample_size=5)
+
+    assert result.count == 100
+    assert result.sample == [{'Order_ID': i} for i in range(1, 6)]
+    assert run_check(Check('many_violations', db_path, query), sample_size=5).sample == result.sample
@@ -0,0 +1,145 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_db import setup_database
+from sql.sqlite_db.create_dm import sync_dimension_table, shard_expression, shard_of
+from sql.sqlite_db.partitioned_dm import (
+    SHARD_EID_BLOCK, shard_paths, setup_partitioned_dimension, sync_partitioned_dimension, query_shards,
+)
+from sql.sqlite_db.dbm_queries import get_customers_with_duplicates, get_order_history_for_keys
+from conftest import insert_orders, run_sql
+
+SHARD_COUNT = 3
+
+ORDERS = [
+    (1000 + i, f'Customer {i}', f'{i % 28 + 1}/12/2024', 500 + i, i % 7 + 1, f'customer{i}@example.com')
+    for i in range(30)
+]
+
+# Order columns compared between the single-file and the partitioned dimension (EIDs differ)
+VERSION_QUERY = '''
+    SELECT Order_ID, Customer_ID, Quantity, Row_Hash, Start_Date, End_Date, Active
+    FROM Dimension_Orders
+    ORDER BY Order_ID, Start_Date, Active
+'''
+
+@pytest.fixture
+def databases(tmp_path, source_db_path, dm_db_path):
+    # The shard index is part of the source schema, as with `setup_db.py --keep --shards 3`
+    setup_database(source_db_path, reset=False, shard_count=SHARD_COUNT)
+    insert_orders(source_db_path, ORDERS)
+    partitioned_path = str(tmp_path / "etl_dm_partitioned.db")
+    setup_partitioned_dimension(partitioned_path, SHARD_COUNT)
+    return source_db_path, dm_db_path, partitioned_path
+
+def sync_both(source_db_path, single_path, partitioned_path, workers=1):
+    sync_dimension_table(source_db_path, single_path)
+    sync_partitioned_dimension(source_db_path, partitioned_path, SHARD_COUNT, workers=workers)
+
+def test_shard_expression_matches_shard_of():
+    conn = sqlite3.connect(':memory:')
+    for order_id in (1, 2, 3, 1000, 2 ** 31, 2 ** 40 + 7, -42):
+        sql_shard = conn.execute(f"SELECT {shard_expression('?', 5)}", (order_id,)).fetchone()[0]
+        assert sql_shard == shard_of(order_id, 5)
+    conn.close()
+
+def test_shard_paths():
+    assert shard_paths('sql/sqlite_db/etl_dm.db', 2) == [
+        'sql/sqlite_db/etl_dm_shard_00.db', 'sql/sqlite_db/etl_dm_shard_01.db',
+    ]
+
+def test_each_order_lives_in_its_own_shard(databases):
+    source_db_path, single_path, partitioned_path = databases
+    sync_both(source_db_path, single_path, partitioned_path)
+
+    for index, path in enumerate(shard_paths(partitioned_path, SHARD_COUNT)):
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT Order_ID, EID FROM Dimension_Orders").fetchall()
+        conn.close()
+        assert rows, f"Shard {index} is empty"
+        assert all(shard_of(order_id, SHARD_COUNT) == index for order_id, _ in rows)
+        # Every shard issues EIDs from its own block
+        assert all(index * SHARD_EID_BLOCK < eid <= (index + 1) * SHARD_EID_BLOCK for _, eid in rows)
+
+def test_shard_sync_seeks_its_slice_of_orders(databases):
+    source_db_path, single_path, partitioned_path = databases
+    sync_both(source_db_path, single_path, partitioned_path)
+
+    conn = sqlite3.connect(source_db_path)
+    plan = [row[-1] for row in conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT Order_ID FROM Orders WHERE {shard_expression('Order_ID', SHARD_COUNT)} = 1"
+    )]
+    conn.close()
+    assert any(f"idx_orders_shard_{SHARD_COUNT}" in detail for detail in plan), plan
+
+def source_indexes(source_db_path):
+    conn = sqlite3.connect(source_db_path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return names
+
+def test_sync_needs_the_shard_index_and_leaves_the_source_schema_alone(databases):
+    source_db_path, _, partitioned_path = databases
+    indexes = source_indexes(source_db_path)
+
+    # Another shard count has no index: the sync refuses instead of creating one
+    other_path = partitioned_path.replace('.db', '_other.db')
+    setup_partitioned_dimension(other_path, SHARD_COUNT + 1)
+    with pytest.raises(ValueError, match=f"idx_orders_shard_{SHARD_COUNT + 1}"):
+        sync_partitioned_dimension(source_db_path, other_path, SHARD_COUNT + 1, workers=1)
+    sync_partitioned_dimension(source_db_path, partitioned_path, SHARD_COUNT, workers=1)
+    assert source_indexes(source_db_path) == indexes
+
+    # Setting up for a new shard count replaces the old shard index
+    setup_database(source_db_path, reset=False, shard_count=SHARD_COUNT + 1)
+    shard_indexes = {name for name in source_indexes(source_db_path) if name.startswith('idx_orders_shard_')}
+    assert shard_indexes == {f"idx_orders_shard_{SHARD_COUNT + 1}"}
+
+def test_parallel_sync_matches_single_file_history(databases):
+    source_db_path, single_path, partitioned_path = databases
+    sync_both(source_db_path, single_path, partitioned_path, workers=SHARD_COUNT)
+
+    # Change, delete and add orders, then resync both (full and incremental merges)
+    run_sql(source_db_path, "UPDATE Orders SET Quantity = Quantity + 10 WHERE Order_ID % 4 = 0")
+    run_sql(source_db_path, "DELETE FROM Orders WHERE Order_ID IN (5, 17)")
+    run_sql(source_db_path, '''
+        INSERT INTO Orders (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email)
+        VALUES (9999, 'New Customer', '31/12/2024', 999, 3, 'new@example.com')
+    ''')
+    sync_dimension_table(source_db_path, single_path, incremental=True)
+    sync_partitioned_dimension(source_db_path, partitioned_path, SHARD_COUNT, incremental=True,
+                               workers=SHARD_COUNT)
+
+    conn = sqlite3.connect(single_path)
+    expected = conn.execute(VERSION_QUERY).fetchall()
+    conn.close()
+    _, rows = query_shards(VERSION_QUERY, dm_db_path=partitioned_path, shard_count=SHARD_COUNT,
+                           key=lambda row: (row[0], row[4], row[6]))
+    assert rows == expected
+
+def test_fan_out_queries(databases):
+    source_db_path, single_path, partitioned_path = databases
+    sync_both(source_db_path, single_path, partitioned_path)
+    run_sql(source_db_path, "UPDATE Orders SET Quantity = Quantity + 1")
+    sync_both(source_db_path, single_path, partitioned_path)
+
+    keys = '[[1000, 1], [1010, 11], [1029, 30]]'
+    conn = sqlite3.connect(single_path)
+    expected_history = conn.execute(get_order_history_for_keys(), (keys,)).fetchall()
+    expected_duplicates = sorted(conn.execute(get_customers_with_duplicates()).fetchall())
+    conn.close()
+
+    columns, history = query_shards(get_order_history_for_keys(), (keys,), partitioned_path, SHARD_COUNT,
+                                    key=lambda row: (row[0], row[1], row[3]))
+    assert columns[:2] == ['Customer_ID', 'Order_ID']
+    # EIDs come from each shard's block, so compare everything else
+    assert [row[:2] + row[3:] for row in history] == [row[:2] + row[3:] for row in expected_history]
+
+    _, duplicates = query_shards(get_customers_with_duplicates(), dm_db_path=partitioned_path,
+                                 shard_count=SHARD_COUNT, parallel=False)
+    assert sorted(duplicates) == expected_duplicates
@@ -0,0 +1,139 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.pipeline import PROJECT_ROOT, STAGES, PipelineConfig, Stage, code_files, run_pipeline
+from generate_data import write_dataset
+
+def statuses(results):
+    return {name: result.status for name, result in results.items()}
+
+@pytest.fixture
+def pipeline(tmp_path):
+    export_dir = str(tmp_path / "export")
+    write_dataset(export_dir, 'csv', 300, product_count=20)
+    config = PipelineConfig(export_dir, str(tmp_path / "etl.db"), str(tmp_path / "etl_dm.db"))
+    state_path = str(tmp_path / "pipeline_state.db")
+    return config, state_path
+
+def test_unchanged_inputs_skip_every_stage(pipeline):
+    config, state_path = pipeline
+    first = run_pipeline(config, state_path=state_path)
+    assert set(statuses(first).values()) == {'ran'}
+
+    # Writing the same files again (a no-op drop) changes no content hash
+    write_dataset(config.source_path, 'csv', 300, product_count=20)
+    second = run_pipeline(config, state_path=state_path)
+    assert set(statuses(second).values()) == {'skipped'}
+    # Skipped stages report their last run's summary
+    assert second['load_data'].result == first['load_data'].result
+
+def test_changed_source_reruns_downstream_stages(pipeline):
+    config, state_path = pipeline
+    run_pipeline(config, state_path=state_path)
+    write_dataset(config.source_path, 'csv', 300, product_count=20, run=1, mutation_rate=0.1)
+    results = run_pipeline(config, state_path=state_path)
+
+    assert statuses(results) == {
+        'setup_db': 'skipped', 'setup_dm_db': 'skipped', 'load_data': 'ran',
+        'create_dm': 'ran', 'validate_orders': 'ran', 'validate_scd': 'ran',
+    }
+    # The reload replaced the rows instead of appending them
+    conn = sqlite3.connect(config.db_path)
+    assert conn.execute("SELECT COUNT(*) FROM Orders").fetchone()[0] == results['load_data'].result['orders']
+    conn.close()
+    conn = sqlite3.connect(config.dm_db_path)
+    expired = conn.execute("SELECT COUNT(*) FROM Dimension_Orders WHERE Active = 'N'").fetchone()[0]
+    conn.close()
+    assert expired > 0
+
+def dimension_counts(dm_db_path):
+    conn = sqlite3.connect(dm_db_path)
+    counts = [
+        conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ('Dimension_Orders', 'Fact_Orders')
+    ]
+    conn.close()
+    return counts
+
+def test_dropped_output_tables_are_rebuilt(pipeline):
+    config, state_path = pipeline
+    run_pipeline(config, state_path=state_path)
+    expected = dimension_counts(config.dm_db_path)
+    assert min(expected) > 0
+
+    conn = sqlite3.connect(config.dm_db_path)
+    conn.execute("DROP TABLE Fact_Orders")
+    conn.execute("DROP TABLE Dimension_Orders")
+    conn.close()
+    results = run_pipeline(config, state_path=state_path)
+
+    assert results['setup_dm_db'].status == 'ran'
+    assert results['create_dm'].status == 'ran'
+    assert results['load_data'].status == 'skipped'
+    # The recreated dimension is filled again from the unchanged source, not left empty
+    assert dimension_counts(config.dm_db_path) == expected
+    assert set(statuses(run_pipeline(config, state_path=state_path)).values()) == {'skipped'}
+
+def test_emptied_dimension_is_resynced(pipeline):
+    config, state_path = pipeline
+    run_pipeline(config, state_path=state_path)
+    expected = dimension_counts(config.dm_db_path)
+
+    conn = sqlite3.connect(config.dm_db_path)
+    conn.execute("DELETE FROM Fact_Orders")
+    conn.execute("DELETE FROM Dimension_Orders")
+    conn.commit()
+    conn.close()
+    results = run_pipeline(config, state_path=state_path)
+
+    assert results['create_dm'].status == 'ran'
+    assert dimension_counts(config.dm_db_path) == expected
+
+def test_stage_code_includes_the_modules_it_imports():
+    code = {stage.name: {os.path.relpath(path, PROJECT_ROOT) for path in code_files(stage.code)} for stage in STAGES}
+    assert {'sql/sqlite_db/order_dates.py', 'sql/sqlite_db/load_manifest.py', 'sql/sqlite_db/row_hash.py',
+            'sql/sqlite_db/summaries.py', 'sql/sqlite_db/connection.py'} <= code['load_data']
+    assert {'sql/sqlite_db/change_capture.py', 'sql/sqlite_db/indexes.py', 'sql/sqlite_db/summaries.py',
+            'sql/sqlite_db/connection.py'} <= code['create_dm']
+
+def test_changed_transitive_dependency_reruns_the_stage(pipeline, tmp_path):
+    config, state_path = pipeline
+    # stage.py imports helper.py, which imports constants.py
+    (tmp_path / "stage.py").write_text("import json\nfrom helper import double\n")
+    (tmp_path / "helper.py").write_text("from constants import FACTOR\n\ndef double(value):\n    return value * FACTOR\n")
+    (tmp_path / "constants.py").write_text("FACTOR = 2\n")
+    stages = [Stage('custom', (), (str(tmp_path / "stage.py"),),
+                    lambda config: {}, lambda config: {}, lambda config: {})]
+
+    assert statuses(run_pipeline(config, stages=stages, state_path=state_path)) == {'custom': 'ran'}
+    assert statuses(run_pipeline(config, stages=stages, state_path=state_path)) == {'custom': 'skipped'}
+    (tmp_path / "constants.py").write_text("FACTOR = 3\n")
+    assert statuses(run_pipeline(config, stages=stages, state_path=state_path)) == {'custom': 'ran'}
+
+def test_failed_stage_blocks_downstream_only(pipeline):
+    config, state_path = pipeline
+
+    def fail(config):
+        raise RuntimeError("source unavailable")
+
+    stages = [stage._replace(run=fail) if stage.name == 'load_data' else stage for stage in STAGES]
+    results = run_pipeline(config, stages=stages, state_path=state_path)
+
+    assert statuses(results) == {
+        'setup_db': 'ran', 'setup_dm_db': 'ran', 'load_data': 'failed',
+        'create_dm': 'blocked', 'validate_orders': 'blocked', 'validate_scd': 'blocked',
+    }
+    assert 'source unavailable' in results['load_data'].error
+
+def test_cyclic_graph_is_rejected(pipeline):
+    config, state_path = pipeline
+    stages = [
+        Stage('a', ('b',), (), lambda config: {}, lambda config: {}, lambda config: {}),
+        Stage('b', ('a',), (), lambda config: {}, lambda config: {}, lambda config: {}),
+    ]
+    with pytest.raises(ValueError):
+        run_pipeline(config, stages=stages, state_path=state_path)
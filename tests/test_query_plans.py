@@ -0,0 +1,79 @@
+import sqlite3
+import inspect
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db import db_queries, dbm_queries
+from sql.sqlite_db.setup_db import setup_database
+from sql.sqlite_db.setup_dm_db import setup_dimension_database
+from sql.sqlite_db.create_dm import ACTIVE_VERSION_QUERY
+from sql.sqlite_db.indexes import INDEXES, apply_indexes, find_full_scans
+from sql.sqlite_db.summaries import DM_SUMMARIES
+
+def registered_queries(module):
+    """Every public query function defined in a query module, called with placeholders for its required arguments."""
+    queries = []
+    for name, function in inspect.getmembers(module, inspect.isfunction):
+        if function.__module__ != module.__name__ or name.startswith('_'):
+            continue
+        required = [parameter for parameter in inspect.signature(function).parameters.values()
+                    if parameter.default is inspect.Parameter.empty]
+        sql = function(*[1] * len(required))
+        if sql.strip().upper().startswith('PRAGMA'):
+            continue
+        queries.append((name, sql))
+    return queries
+
+# Whole-table data-quality checks that read every row by design; indexing their
+# predicates would only slow down every load
+FULL_SCAN_QUERIES = {
+    'get_orders_with_negative_quantity',
+    'get_orders_with_missing_customer_name',
+    'get_orders_with_null_product_name',
+    'get_invalid_email_customers',
+}
+
+QUERIES = (registered_queries(db_queries) + registered_queries(dbm_queries)
+           + [('active_version_lookup', ACTIVE_VERSION_QUERY)])
+
+@pytest.fixture(scope="module")
+def databases(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("plans")
+    source_db = str(directory / "etl.db")
+    dm_db = str(directory / "etl_dm.db")
+    setup_database(source_db)
+    setup_dimension_database(dm_db)
+    source_conn = sqlite3.connect(source_db)
+    dm_conn = sqlite3.connect(dm_db)
+    yield source_conn, dm_conn
+    source_conn.close()
+    dm_conn.close()
+
+@pytest.mark.parametrize("name, sql", [(name, sql) for name, sql in QUERIES if name not in FULL_SCAN_QUERIES])
+def test_registered_query_uses_an_index(databases, name, sql):
+    source_conn, dm_conn = databases
+    conn = dm_conn if any(table in sql for table in ('Dimension_Orders',) + DM_SUMMARIES) else source_conn
+    full_scans = find_full_scans(conn, sql, (0,) * sql.count('?'))
+    assert not full_scans, f"{name} scans a large table without an index: {full_scans}"
+
+def test_full_scan_allow_list_names_registered_queries():
+    assert FULL_SCAN_QUERIES <= {name for name, _ in QUERIES}
+
+def test_full_scan_is_reported(databases):
+    source_conn, _ = databases
+    assert find_full_scans(source_conn, "SELECT * FROM Orders o WHERE o.Email = ?", ('x',)) == ['SCAN o']
+
+def test_apply_indexes_is_idempotent(databases):
+    source_conn, _ = databases
+    assert apply_indexes(source_conn, ['Orders', 'Products']) == []
+
+    # An index whose definition drifted from the spec is rebuilt
+    source_conn.execute("DROP INDEX idx_orders_product_id")
+    source_conn.execute("CREATE INDEX idx_orders_product_id ON Orders (Product_ID, Order_ID)")
+    assert apply_indexes(source_conn, ['Orders']) == ['idx_orders_product_id']
+    names = {row[0] for row in source_conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {spec.name for spec in INDEXES['Orders'] + INDEXES['Products']} <= names
@@ -0,0 +1,85 @@
+import sqlite3
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.query_service import QueryService, dimension_query_service, module_queries
+from sql.sqlite_db import dbm_queries
+from conftest import insert_versions
+
+@pytest.fixture
+def service(dm_db_path):
+    insert_versions(dm_db_path)
+    service = dimension_query_service(dm_db_path, pool_size=2)
+    yield service
+    service.close()
+
+def test_dbm_queries_are_registered_as_bound_statements(service):
+    assert 'get_order_history_for_customer' in service.queries
+    assert module_queries(dbm_queries)['get_order_history_for_customer'] == \
+        service.queries['get_order_history_for_customer']
+
+    result = service.run('get_order_history_for_customer', (1234, 1))
+    assert result.columns == ('EID', 'Start_Date', 'End_Date', 'Active')
+    assert [row[3] for row in result.rows] == ['N', 'N', 'Y']
+    # Values are bound, so text that looks like SQL matches nothing instead of running
+    assert service.run('get_order_history_for_customer', ("1 OR 1=1", 1)).rows == ()
+
+    with pytest.raises(KeyError):
+        service.run('no_such_query')
+
+def test_repeated_lookups_are_served_from_the_cache(service):
+    for _ in range(4):
+        service.run('get_order_history_for_customer', (1234, 1))
+    service.run('get_order_history_for_customer', (5678, 2))
+
+    stats = service.stats()
+    assert stats['calls'] == 5 and stats['hits'] == 3
+    query_stats = stats['queries']['get_order_history_for_customer']
+    assert query_stats['executions'] == 2
+    assert query_stats['hit_rate'] == pytest.approx(0.6)
+    assert query_stats['max_ms'] >= query_stats['mean_ms'] > 0
+
+def test_commits_from_other_connections_invalidate_the_cache(service, dm_db_path):
+    before = service.run('get_order_history_for_customer', (5678, 2))
+    assert len(before.rows) == 1
+
+    conn = sqlite3.connect(dm_db_path)
+    conn.execute("UPDATE Dimension_Orders SET End_Date = '2025-01-01', Active = 'N' WHERE Order_ID = 2")
+    conn.execute('''
+        INSERT INTO Dimension_Orders (Order_ID, Customer_ID, Quantity, Start_Date, End_Date, Active)
+        VALUES (2, 5678, 12, '2025-01-01', '9999-12-31', 'Y')
+    ''')
+    conn.commit()
+    conn.close()
+
+    after = service.run('get_order_history_for_customer', (5678, 2))
+    assert [row[3] for row in after.rows] == ['N', 'Y']
+    assert service.stats()['invalidations'] == 1
+
+def test_least_recently_used_results_are_evicted(dm_db_path):
+    service = QueryService(dm_db_path, {'versions': "SELECT EID FROM Dimension_Orders WHERE Order_ID = ?"},
+                           cache_size=2)
+    service.run('versions', (1,))
+    service.run('versions', (2,))
+    service.run('versions', (1,))   # (1,) is now the most recently used
+    service.run('versions', (3,))   # evicts (2,)
+    service.run('versions', (1,))
+    service.run('versions', (2,))
+
+    stats = service.stats()
+    assert stats['entries'] == 2
+    assert stats['queries']['versions']['hits'] == 2
+    service.close()
+
+def test_pooled_connections_serve_concurrent_lookups(service):
+    keys = [(1234, 1), (5678, 2)] * 20
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda key: service.run('get_order_history_for_customer', key), keys))
+
+    assert [len(result.rows) for result in results] == [3, 1] * 20
+    assert service.stats()['calls'] == 40
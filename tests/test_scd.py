@@ -1,4 +1,3 @@
-import sqlite3
 import pytest
 import pandas as pd
 import sys
@@ -7,12 +6,9 @@ import os
 # Add the root directory of the project to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from sql.sqlite_db.dbm_queries import (
-    get_customers_with_duplicates,
-    get_order_history_for_customer,
-    get_all_column_names,
-    get_active_records_count_per_customer
-)
+from sql.sqlite_db.dbm_queries import get_all_column_names
+from sql.sqlite_db.connection import connect
+from sql.sqlite_db.parallel_validation import scd_checks, run_checks, describe
 
 # Fixture to set up and tear down the SQLite connection
 @pytest.fixture(scope="module")
@@ -21,71 +17,51 @@ def db_connection():
     db_path = os.path.join(os.path.dirname(__file__), "../sql/sqlite_db/etl_dm.db")
     assert os.path.exists(db_path), f"Database file not found at {db_path}"
 
-    conn = sqlite3.connect(db_path)
+    # Validation only reads, so open the database read-only (see connection.py)
+    conn = connect(db_path, 'read_only')
     yield conn
     conn.close()
 
-def test_only_one_active_record_for_each_customer(db_connection):
-    # Use the query from db_queries.py to verify only one active record for each customer
-    query = get_active_records_count_per_customer()
-    df = pd.read_sql(query, db_connection)
+# Run the SCD checks once, at the same time, each on its own read-only connection
+# (see parallel_validation.py); the tests below assert on their results
+@pytest.fixture(scope="module")
+def check_report():
+    dm_db_path = os.path.join(os.path.dirname(__file__), "../sql/sqlite_db/etl_dm.db")
+    assert os.path.exists(dm_db_path), f"Database file not found at {dm_db_path}"
+    return run_checks(scd_checks(dm_db_path))
+
+def check_result(report, name):
+    """Exact row count and capped sample of one check; a check whose query failed fails its test."""
+    result = report[name]
+    assert result.error is None, f"Check {name} could not run: {result.error}"
+    return result
+
+def test_only_one_active_record_for_each_customer(check_report):
+    # Customer_ID/Order_ID combinations with more than one active record
+    result = check_result(check_report, 'multiple_active_records')
 
     # Ensure there is only one active record per customer
-    for record in df.itertuples():
-        customer_id = record.Customer_ID  # Access the Customer_ID by column name
-        active_count = record.Active_Count  # Access the Active_Count by the column alias
-        assert active_count == 1, f"Multiple active records for Customer_ID {customer_id}"
+    assert result.count == 0, f"Multiple active records:\n{describe(result)}"
 
-def test_customer_has_history_data(db_connection):
+def test_customer_has_history_data(check_report):
     # Fetch Order_ID and Customer_ID combinations with historical changes
-    query = get_customers_with_duplicates()
-    df = pd.read_sql(query, db_connection)
-
-    if df.empty:
+    changed = check_result(check_report, 'changed_orders')
+    if changed.count == 0:
         print("No historical changes found (all orders have only one record).")
-        assert True  # No historical changes, so the test passes
-    else:
-        for record in df.itertuples():
-            customer_id = record.Customer_ID
-            order_id = record.Order_ID
-
-            # Fetch all records for the same Customer_ID and Order_ID
-            query = get_order_history_for_customer(customer_id, order_id)
-            history = pd.read_sql(query, db_connection)
-
-            # Validate historical continuity and active status
-            for i, row in history.iterrows():
-                if i > 0:
-                    # Ensure previous End_Date matches current Start_Date
-                    prev_end_date = history.iloc[i - 1]['End_Date']
-                    current_start_date = row['Start_Date']
-                    assert prev_end_date == current_start_date, (
-                        f"Mismatch in dates for Customer_ID = {customer_id}, Order_ID = {order_id}: "
-                        f"End_Date ({prev_end_date}) does not match Start_Date ({current_start_date})"
-                    )
-
-                # Ensure only the latest record is active
-                if i == len(history) - 1:
-                    assert row['Active'] == 'Y', (
-                        f"Last record for Customer_ID = {customer_id}, Order_ID = {order_id} is not active"
-                    )
-                    print(
-                        f"✅ PASS: Customer_ID = {customer_id}, Order_ID = {order_id} - "
-                        f"New record (EID = {row['EID']}) is active."
-                    )
-                else:
-                    assert row['Active'] == 'N', (
-                        f"Inactive record for Customer_ID = {customer_id}, Order_ID = {order_id} not marked as 'N'"
-                    )
-                    print(
-                        f"✅ PASS: Customer_ID = {customer_id}, Order_ID = {order_id} - "
-                        f"Old record (EID = {row['EID']}) is inactive."
-                    )
+
+    # Check historical continuity and active status of every order in one query
+    violations = check_result(check_report, 'scd_integrity')
+    if violations.count:
+        print("\nVersions violating SCD Type 2 rules:")
+        print(describe(violations))
+
+    assert violations.count == 0, f"SCD Type 2 history is inconsistent:\n{describe(violations)}"
+    print(f"✅ PASS: history of {changed.count} changed Customer_ID/Order_ID combinations is consistent.")
 
 def test_schema_matches_source(db_connection):
     # Fetch the actual columns from the source database (etl.db), table 'Orders'
     source_db_path = os.path.join(os.path.dirname(__file__), "../sql/sqlite_db/etl.db")
-    source_conn = sqlite3.connect(source_db_path)
+    source_conn = connect(source_db_path, 'read_only')
     source_cursor = source_conn.cursor()
     source_cursor.execute("PRAGMA table_info(Orders)")  # Get columns for the 'Orders' table
     source_columns = {row[1] for row in source_cursor.fetchall()}  # Column name is at index 1
@@ -0,0 +1,151 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.setup_dm_db import setup_dimension_database
+from sql.sqlite_db.create_dm import sync_dimension_table
+from sql.sqlite_db.change_capture import purge_change_log
+from conftest import ORDERS, insert_orders, run_sql
+
+def dimension_rows(dm_db_path):
+    conn = sqlite3.connect(dm_db_path)
+    rows = conn.execute('''
+        SELECT EID, Order_ID, Customer_ID, Customer_Name, Order_Date, Product_ID,
+               Quantity, Email, Row_Hash, Start_Date, End_Date, Active
+        FROM Dimension_Orders
+        ORDER BY EID
+    ''').fetchall()
+    conn.close()
+    return rows
+
+@pytest.fixture
+def databases(tmp_path, source_db_path):
+    insert_orders(source_db_path)
+
+    dm_paths = {}
+    for mode in ('row', 'merge'):
+        dm_paths[mode] = str(tmp_path / f"etl_dm_{mode}.db")
+        setup_dimension_database(dm_paths[mode])
+    return source_db_path, dm_paths
+
+def sync_both(source_db_path, dm_paths):
+    for mode, dm_db_path in dm_paths.items():
+        sync_dimension_table(source_db_path, dm_db_path, mode=mode)
+    return dimension_rows(dm_paths['row']), dimension_rows(dm_paths['merge'])
+
+def test_merge_matches_row_loop_on_initial_load(databases):
+    row_result, merge_result = sync_both(*databases)
+
+    assert len(merge_result) == len(ORDERS)
+    assert merge_result == row_result
+
+def test_merge_matches_row_loop_after_changes(databases):
+    source_db_path, dm_paths = databases
+    sync_both(source_db_path, dm_paths)
+
+    # Update one order, fill a NULL with a value, add a new order and re-sync twice
+    run_sql(source_db_path, "UPDATE Orders SET Quantity = 20 WHERE Customer_Name = 'Jane Smith'")
+    run_sql(source_db_path, "UPDATE Orders SET Email = 'anon@example.com' WHERE Customer_ID = 1111")
+    insert_orders(source_db_path, [(8765, 'Tim Lee', '1/12/2024', 789, 1, 'tim.lee@example.com')])
+    sync_both(source_db_path, dm_paths)
+    row_result, merge_result = sync_both(source_db_path, dm_paths)
+
+    assert merge_result == row_result
+    active_flags = [row[-1] for row in merge_result]
+    assert active_flags.count('N') == 2
+    assert active_flags.count('Y') == len(ORDERS) + 1
+
+def test_added_source_column_does_not_flag_every_row(databases):
+    source_db_path, dm_paths = databases
+    sync_both(source_db_path, dm_paths)
+
+    # A new source column is NULL on existing rows, so their fingerprints are unchanged
+    run_sql(source_db_path, "ALTER TABLE Orders ADD COLUMN Channel TEXT")
+    row_result, merge_result = sync_both(source_db_path, dm_paths)
+    assert len(merge_result) == len(ORDERS)
+    assert merge_result == row_result
+
+    # Populating the new column for one order is a real change
+    run_sql(source_db_path, "UPDATE Orders SET Channel = 'web' WHERE Customer_ID = 1234")
+    sync_both(source_db_path, dm_paths)
+    for dm_db_path in dm_paths.values():
+        conn = sqlite3.connect(dm_db_path)
+        versions = conn.execute('''
+            SELECT Customer_ID, COUNT(*) FROM Dimension_Orders GROUP BY Customer_ID
+        ''').fetchall()
+        conn.close()
+        assert dict(versions) == {1111: 1, 1234: 2, 5678: 1}
+
+def test_incremental_sync_applies_logged_changes(databases):
+    source_db_path, dm_paths = databases
+    dm_db_path = dm_paths['merge']
+    # First run has no watermark and rescans the whole table
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+    assert len(dimension_rows(dm_db_path)) == len(ORDERS)
+
+    run_sql(source_db_path, "UPDATE Orders SET Quantity = 20 WHERE Customer_Name = 'Jane Smith'")
+    run_sql(source_db_path, "DELETE FROM Orders WHERE Customer_ID = 1111")
+    insert_orders(source_db_path, [(8765, 'Tim Lee', '1/12/2024', 789, 1, 'tim.lee@example.com')])
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+
+    conn = sqlite3.connect(dm_db_path)
+    versions = conn.execute('''
+        SELECT Customer_ID, Quantity, Active FROM Dimension_Orders ORDER BY EID
+    ''').fetchall()
+    conn.close()
+    assert versions == [
+        (1234, 2, 'Y'),
+        (5678, 10, 'N'),
+        (1111, 4, 'N'),
+        (5678, 20, 'Y'),
+        (8765, 1, 'Y'),
+    ]
+
+    # Nothing logged since the last run: the next sync is a no-op
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+    assert len(dimension_rows(dm_db_path)) == 5
+
+def test_incremental_sync_rescans_after_log_purge(databases):
+    source_db_path, dm_paths = databases
+    dm_db_path = dm_paths['merge']
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+
+    # Drop the pending entries so the log no longer covers the change
+    run_sql(source_db_path, "UPDATE Orders SET Quantity = 99 WHERE Customer_ID = 1234")
+    conn = sqlite3.connect(source_db_path)
+    purge_change_log(conn, 10 ** 9)
+    conn.close()
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+
+    conn = sqlite3.connect(dm_db_path)
+    active = conn.execute('''
+        SELECT Quantity FROM Dimension_Orders WHERE Customer_ID = 1234 AND Active = 'Y'
+    ''').fetchall()
+    conn.close()
+    assert active == [(99,)]
+
+def test_incremental_sync_rescans_a_reset_or_emptied_dimension(databases):
+    source_db_path, dm_paths = databases
+    dm_db_path = dm_paths['merge']
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+
+    # Nothing changed in the source, but the rebuilt dimension has to be filled again
+    setup_dimension_database(dm_db_path)
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+    assert len(dimension_rows(dm_db_path)) == len(ORDERS)
+
+    # An emptied dimension is rescanned even though its watermark is still current
+    run_sql(dm_db_path, "DELETE FROM Dimension_Orders")
+    sync_dimension_table(source_db_path, dm_db_path, incremental=True)
+    assert len(dimension_rows(dm_db_path)) == len(ORDERS)
+
+def test_unknown_sync_mode_is_rejected(databases):
+    source_db_path, dm_paths = databases
+    with pytest.raises(ValueError):
+        sync_dimension_table(source_db_path, dm_paths['merge'], mode='bulk')
+    with pytest.raises(ValueError):
+        sync_dimension_table(source_db_path, dm_paths['row'], mode='row', incremental=True)
@@ -0,0 +1,85 @@
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.create_dm import sync_dimension_table
+from sql.sqlite_db.summaries import (
+    DM_SUMMARIES,
+    SOURCE_SUMMARIES,
+    check_summaries,
+    create_summary_tables,
+    rebuild_summaries
+)
+from sql.sqlite_db.db_queries import get_top_customers_by_quantity
+from sql.sqlite_db.dbm_queries import get_customers_with_most_expired_versions
+from load_data import load_data_to_db
+from generate_data import write_dataset
+from conftest import run_sql
+
+def summary_state(db_path, tables):
+    conn = sqlite3.connect(db_path)
+    results = check_summaries(conn, tables)
+    conn.close()
+    return results
+
+@pytest.fixture
+def databases(tmp_path, source_db_path, dm_db_path):
+    # Small batches, so the summaries are built from many increments
+    export_dir = write_dataset(str(tmp_path / "export"), 'csv', 500, product_count=20)
+    load_data_to_db(export_dir, source_db_path, batch_size=64)
+    return source_db_path, dm_db_path
+
+def test_loader_keeps_source_summaries_consistent(databases):
+    source_db_path, _ = databases
+    assert summary_state(source_db_path, SOURCE_SUMMARIES) == {table: 0 for table in SOURCE_SUMMARIES}
+
+    conn = sqlite3.connect(source_db_path)
+    top_customers = conn.execute(get_top_customers_by_quantity(), (3,)).fetchall()
+    expected = conn.execute('''
+        SELECT Customer_ID, COUNT(*), SUM(Quantity), MAX(Order_Day) FROM Orders
+        WHERE Customer_ID IS NOT NULL
+        GROUP BY Customer_ID ORDER BY SUM(Quantity) DESC, Customer_ID LIMIT 3
+    ''').fetchall()
+    conn.close()
+    assert top_customers == expected
+
+@pytest.mark.parametrize("mode", ['merge', 'row'])
+def test_sync_keeps_version_counts_consistent(databases, mode):
+    source_db_path, dm_db_path = databases
+    sync_dimension_table(source_db_path, dm_db_path, mode=mode)
+    run_sql(source_db_path,
+            "UPDATE Orders SET Quantity = Quantity + 1 WHERE Order_ID % 10 = 0",
+            "DELETE FROM Orders WHERE Order_ID % 25 = 1")
+    sync_dimension_table(source_db_path, dm_db_path, mode=mode, incremental=(mode == 'merge'))
+
+    assert summary_state(dm_db_path, DM_SUMMARIES) == {'Summary_Customer_Versions': 0}
+    conn = sqlite3.connect(dm_db_path)
+    expired = sum(row[2] for row in conn.execute(get_customers_with_most_expired_versions(), (1000,)))
+    conn.close()
+    # Row mode does not expire deleted orders
+    assert expired == 50 + (20 if mode == 'merge' else 0)
+
+def test_check_detects_changes_outside_the_loader(databases):
+    source_db_path, _ = databases
+    run_sql(source_db_path, "UPDATE Orders SET Quantity = Quantity + 1 WHERE Order_ID = 1")
+    state = summary_state(source_db_path, SOURCE_SUMMARIES)
+    assert state['Summary_Product_Day'] > 0 and state['Summary_Customer_Orders'] > 0
+
+    conn = sqlite3.connect(source_db_path)
+    with conn:
+        rebuild_summaries(conn, SOURCE_SUMMARIES)
+    conn.close()
+    assert summary_state(source_db_path, SOURCE_SUMMARIES) == {table: 0 for table in SOURCE_SUMMARIES}
+
+def test_summary_added_to_a_loaded_database_is_rebuilt(databases):
+    source_db_path, _ = databases
+    run_sql(source_db_path, "DROP TABLE Summary_Customer_Orders")
+    conn = sqlite3.connect(source_db_path)
+    with conn:
+        assert create_summary_tables(conn, SOURCE_SUMMARIES) == ['Summary_Customer_Orders']
+    conn.close()
+    assert summary_state(source_db_path, SOURCE_SUMMARIES) == {table: 0 for table in SOURCE_SUMMARIES}
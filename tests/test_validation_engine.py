@@ -0,0 +1,75 @@
+import pandas as pd
+import sqlite3
+import pytest
+import sys
+import os
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.sqlite_db.validation import RULES, SAMPLE_SIZE, run_validation, compile_table_scan
+from sql.sqlite_db.connection import connect
+
+# Fixture to set up and tear down the SQLite connection
+@pytest.fixture(scope="module")
+def db_connection():
+    # Ensure the database file exists
+    db_path = os.path.join(os.path.dirname(__file__), "../sql/sqlite_db/etl.db")
+    assert os.path.exists(db_path), f"Database file not found at {db_path}"
+
+    # Validation only reads, so open the database read-only (see connection.py)
+    conn = connect(db_path, 'read_only')
+    yield conn
+    conn.close()
+
+@pytest.fixture(scope="module")
+def validation_results(db_connection):
+    return run_validation(db_connection)
+
+@pytest.mark.parametrize("rule", RULES, ids=[rule.name for rule in RULES])
+def test_engine_count_matches_standalone_query(rule, db_connection, validation_results):
+    # Each rule's count must equal the number of rows its own db_queries query returns
+    expected = pd.read_sql(rule.query(), db_connection)
+    result = validation_results[rule.name]
+
+    assert result.count == len(expected), (
+        f"{rule.name}: engine found {result.count} violations, query returned {len(expected)}"
+    )
+    assert len(result.sample) == min(result.count, SAMPLE_SIZE)
+
+def test_orders_rules_compile_to_one_scan():
+    orders_rules = [rule for rule in RULES if rule.table == 'Orders']
+    sql, _ = compile_table_scan('Orders', orders_rules)
+
+    assert sql.count("FROM Orders") == 1
+
+def test_cached_results_are_reused_until_a_table_changes(tmp_path):
+    from sql.sqlite_db.setup_db import setup_database
+    from sql.sqlite_db.validation_cache import ValidationCache
+
+    db_path = str(tmp_path / "etl.db")
+    setup_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO Products (Product_ID, Product_Name) VALUES (567, 'Widget A')")
+    conn.execute('''
+        INSERT INTO Orders (Customer_ID, Customer_Name, Order_Date, Product_ID, Quantity, Email)
+        VALUES (1234, 'John Doe', '2024-12-01', 567, -2, 'john.doe@example.com')
+    ''')
+    conn.commit()
+    cache = ValidationCache(str(tmp_path / "validation_cache.db"), max_entries=len(RULES))
+
+    first = run_validation(conn, cache=cache)
+    assert cache.stats()['misses'] == len(RULES)
+    assert run_validation(conn, cache=cache) == first
+    assert cache.stats()['hits'] == len(RULES)
+
+    # An in-place update of Orders invalidates the Orders rules only
+    conn.execute("UPDATE Orders SET Quantity = 2")
+    conn.commit()
+    third = run_validation(conn, cache=cache)
+    assert third['negative_quantity'].count == 0
+    assert cache.stats()['hits'] == len(RULES) + 1  # null_product_name reads only Products
+    assert cache.stats()['entries'] == len(RULES)
+
+    cache.close()
+    conn.close()